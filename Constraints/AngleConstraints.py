@@ -14,13 +14,13 @@ import numpy as np
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, LOGGER
 from fullrmc.Core.Collection import is_number, raise_if_collected, reset_if_collected_out_of_date
-from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint
-from fullrmc.Core.angles import full_angles_coords
+from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint, BondedConstraint
+from fullrmc.Core.bonded_terms import full_angles_coords
 
 
 
 
-class BondsAngleConstraint(RigidConstraint, SingularConstraint):
+class BondsAngleConstraint(RigidConstraint, SingularConstraint, BondedConstraint):
     """
     Controls angle defined between 3 defined atoms, a first atom called central
     and the remain two called left and right.
@@ -84,6 +84,11 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
 
 
     """
+    # number of atoms index columns in anglesList
+    _TERMS_ATOMS = 3
+    # bonded_terms keyword of anglesList
+    _TERMS_KEYWORD = 'angles'
+
     def __init__(self, rejectProbability=1):
         # initialize constraint
         RigidConstraint.__init__(self, rejectProbability=rejectProbability)
@@ -92,6 +97,8 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         # init angles data
         self.__anglesList = [[],[],[],[],[]]
         self.__angles     = {}
+        # atoms to angles CSR index, built upon need
+        self._RT_termsCSR = None
         # set computation cost
         self.set_computation_cost(2.0)
         # create dump flag
@@ -110,14 +117,14 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         """ Defined angles list."""
         return self.__anglesList
 
+    def _get_terms_list(self):
+        return self.__anglesList
+
     @property
     def angles(self):
         """ Angles dictionary of every and each atom."""
         return self.__angles
 
-    def _on_collector_reset(self):
-        self._atomsCollector._randomData = set([])
-
     def listen(self, message, argument=None):
         """
         Listen to any message sent from the Broadcaster.
@@ -213,6 +220,7 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
             # finalize angles
             for idx in xrange(NUMBER_OF_ATOMS):
                 self.__angles[INT_TYPE(idx)] = self.__angles.get(INT_TYPE(idx),  {"left":[],"right":[],"centralMap":[],"otherMap":[]}  )
+        self._RT_termsCSR = None
         # dump to repository
         self._dump_to_repository({'_BondsAngleConstraint__anglesList' :self.__anglesList,
                                   '_BondsAngleConstraint__angles'     :self.__angles})
@@ -313,6 +321,7 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         self.__angles[centralIdx] = anglesCentral
         self.__angles[leftIdx]    = anglesLeft
         self.__angles[rightIdx]   = anglesRight
+        self._RT_termsCSR = None
         # dump to repository
         if self.__dumpAngles:
             self._dump_to_repository({'_BondsAngleConstraint__anglesList' :self.__anglesList,
@@ -465,8 +474,7 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         if len(self._atomsCollector):
             anglesData  = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
             reducedData = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
-            anglesIndex = set(set(range(self.__anglesList[0].shape[0])))
-            anglesIndex = list( anglesIndex-self._atomsCollector._randomData )
+            anglesIndex = np.flatnonzero(~self._get_collected_terms_mask())
             central = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndex])
             left    = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndex])
             right   = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndex])
@@ -479,17 +487,15 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
             lowerLimit = self.__anglesList[3]
             upperLimit = self.__anglesList[4]
         # compute data
-        angles, reduced = full_angles_coords(central            = central,
-                                             left               = left,
-                                             right              = right,
-                                             lowerLimit         = lowerLimit,
-                                             upperLimit         = upperLimit,
-                                             boxCoords          = self.engine.boxCoordinates,
-                                             basis              = self.engine.basisVectors,
-                                             isPBC              = self.engine.isPBC,
-                                             reduceAngleToUpper = False,
-                                             reduceAngleToLower = False,
-                                             ncores             = INT_TYPE(1))
+        angles, reduced = full_angles_coords(boxCoords = self.engine.boxCoordinates,
+                                             basis     = self.engine.basisVectors,
+                                             isPBC     = self.engine.isPBC,
+                                             angles    = (central,
+                                                          left,
+                                                          right,
+                                                          lowerLimit,
+                                                          upperLimit),
+                                             ncores    = self.engine._runtime_ncores)
         # create full length data
         if len(self._atomsCollector):
             anglesData[anglesIndex]  = angles
@@ -515,29 +521,8 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
                be applied to.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        # get angles indexes
-        anglesIndex = []
-        #for idx in relativeIndexes:
-        for idx in realIndexes:
-            anglesIndex.extend( self.__angles[idx]['centralMap'] )
-            anglesIndex.extend( self.__angles[idx]['otherMap'] )
-        anglesIndex = list( set(anglesIndex)-self._atomsCollector._randomData )
-        # compute data before move
-        if len(anglesIndex):
-            angles, reduced =  full_angles_coords( central            = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndex]),
-                                                   left               = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndex]),
-                                                   right              = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndex]),
-                                                   lowerLimit         = self.__anglesList[3][anglesIndex],
-                                                   upperLimit         = self.__anglesList[4][anglesIndex],
-                                                   boxCoords          = self.engine.boxCoordinates,
-                                                   basis              = self.engine.basisVectors ,
-                                                   isPBC              = self.engine.isPBC,
-                                                   reduceAngleToUpper = False,
-                                                   reduceAngleToLower = False,
-                                                   ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # get not collected angles indexes and compute data before move
+        anglesIndex, angles, reduced = self._compute_terms_before_move(realIndexes)
         # set data before move
         self.set_active_atoms_data_before_move( {"anglesIndex":anglesIndex, "angles":angles, "reducedAngles":reduced} )
         self.set_active_atoms_data_after_move(None)
@@ -554,29 +539,10 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         """
         # get angles indexes
         anglesIndex = self.activeAtomsDataBeforeMove["anglesIndex"]
-        # change coordinates temporarily
-        boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
-        self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
-        # compute data before move
-        if len(anglesIndex):
-            angles, reduced =  full_angles_coords( central            = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndex]),
-                                                   left               = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndex]),
-                                                   right              = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndex]),
-                                                   lowerLimit         = self.__anglesList[3][anglesIndex],
-                                                   upperLimit         = self.__anglesList[4][anglesIndex],
-                                                   boxCoords          = self.engine.boxCoordinates,
-                                                   basis              = self.engine.basisVectors ,
-                                                   isPBC              = self.engine.isPBC,
-                                                   reduceAngleToUpper = False,
-                                                   reduceAngleToLower = False,
-                                                   ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # compute data after move
+        angles, reduced = self._compute_terms_after_move(anglesIndex, relativeIndexes, movedBoxCoordinates)
         # set active data after move
         self.set_active_atoms_data_after_move( {"angles":angles, "reducedAngles":reduced} )
-        # reset coordinates
-        self.engine.boxCoordinates[relativeIndexes] = boxData
         # compute standardError after move
         if angles is None:
             self.set_after_move_standard_error( self.standardError )
@@ -635,11 +601,7 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
         # WHEN IMPLEMENTING ATOMS RELEASING. MAYBE WE NEED TO COLLECT DATA INSTEAD, REMOVE
         # AND ADD UPON RELEASE
         # get all involved data
-        anglesIndex = []
-        for idx in realIndex:
-            anglesIndex.extend( self.__angles[idx]['centralMap'] )
-            anglesIndex.extend( self.__angles[idx]['otherMap'] )
-        anglesIndex = list(set(anglesIndex))
+        anglesIndex = self._get_terms_indexes(realIndex)
         if len(anglesIndex):
             # set new data
             data = self.data
@@ -665,8 +627,8 @@ class BondsAngleConstraint(RigidConstraint, SingularConstraint):
     def _on_collector_collect_atom(self, realIndex):
         # get angle indexes
         AI = self.__angles[realIndex]['centralMap'] + self.__angles[realIndex]['otherMap']
-        # append all mapped bonds to collector's random data
-        self._atomsCollector._randomData = self._atomsCollector._randomData.union( set(AI) )
+        # flag all mapped angles in collector's random data mask
+        self._get_collected_terms_mask()[AI] = True
         # collect atom anglesIndex
         self._atomsCollector.collect(realIndex, dataDict={'centralMap':self.__angles[realIndex]['centralMap'],
                                                           'otherMap':  self.__angles[realIndex]['otherMap']})
@@ -112,6 +112,9 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         # atoms to cores and shells pointers
         self.__asCoreDefIdxs  = []
         self.__inShellDefIdxs = []
+        # shells standard error deviations of current and after move data
+        self._RT_shellsDeviations          = None
+        self._RT_shellsDeviationsAfterMove = None
         # no need to dump to repository because all of those attributes will be written
         # at the point of setting the definition.
 
@@ -352,6 +355,8 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         # set all to arrays
         #self.__coordNumData  = np.array( self.__coordNumData, dtype=FLOAT_TYPE )
         self.__weights       = np.array( self.__weights, dtype=FLOAT_TYPE )
+        self.__minAtoms      = np.array( self.__minAtoms, dtype=FLOAT_TYPE )
+        self.__maxAtoms      = np.array( self.__maxAtoms, dtype=FLOAT_TYPE )
         self.__numberOfCores = np.array( [len(idxs) for idxs in self.__coresIndexes], dtype=FLOAT_TYPE )
         # set definition
         self.__coordNumDef = coordNumDef
@@ -403,14 +408,28 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
             #. standardError (number): The calculated standardError of the
                constraint.
         """
-        coordNum = data/self.__numberOfCores
-        StdErr   = 0.
-        for idx, cn in enumerate( coordNum ):
-            if cn < self.__minAtoms[idx]:
-                StdErr += self.__weights[idx]*(self.__minAtoms[idx]-cn)
-            elif cn > self.__maxAtoms[idx]:
-                StdErr += self.__weights[idx]*(cn-self.__maxAtoms[idx])
-        return StdErr
+        return np.sum( self.__get_shells_deviations(data) )
+
+    def __get_shells_deviations(self, data, shells=None):
+        # compute shells standard error deviations Dev_{i} of all or given shells
+        if shells is None:
+            coordNum = data/self.__numberOfCores
+            minAtoms = self.__minAtoms
+            maxAtoms = self.__maxAtoms
+            weights  = self.__weights
+        else:
+            coordNum = data[shells]/self.__numberOfCores[shells]
+            minAtoms = self.__minAtoms[shells]
+            maxAtoms = self.__maxAtoms[shells]
+            weights  = self.__weights[shells]
+        return weights*( np.clip(minAtoms-coordNum, 0, None) + np.clip(coordNum-maxAtoms, 0, None) )
+
+    def __get_data_shells_deviations(self):
+        # deviations are cached along with the data they were computed from
+        cache = self._RT_shellsDeviations
+        if cache is None or cache[0] is not self.__coordNumData:
+            cache = self._RT_shellsDeviations = (self.__coordNumData, self.__get_shells_deviations(self.__coordNumData))
+        return cache[1]
 
     # THIS NEEDS TO BE FORMATTED HUMAN READABLE RETURN 2017-07-29
     def get_constraint_value(self):
@@ -425,7 +444,9 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
     @reset_if_collected_out_of_date
     def compute_data(self):
         """ Compute constraint's data. """
-        self.__coordNumData = np.array( [FLOAT_TYPE(0) for _ in self.__coordNumData], dtype=FLOAT_TYPE )
+        # coordination numbers are computed in FLOAT_TYPE and accumulated
+        # upon accepted moves in engine's precision
+        coordNumData = np.zeros(len(self.__coordNumData), dtype=FLOAT_TYPE)
         all_atoms_coord_number_coords(boxCoords      = self.engine.boxCoordinates,
                                       basis          = self.engine.basisVectors,
                                       isPBC          = self.engine.isPBC,
@@ -435,9 +456,11 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
                                       upperShells    = self.__upperShells,
                                       asCoreDefIdxs  = self.__asCoreDefIdxs,
                                       inShellDefIdxs = self.__inShellDefIdxs,
-                                      coordNumData   = self.__coordNumData,
-                                      ncores         = self.engine._runtime_ncores)
-        self.__coordNumData /= FLOAT_TYPE(2.)
+                                      coordNumData   = coordNumData,
+                                      ncores         = self.engine._runtime_ncores,
+                                      useCells       = True)
+        coordNumData /= FLOAT_TYPE(2.)
+        self.__coordNumData = np.array(coordNumData, dtype=self.engine.precision)
         # update data
         self.set_data( self.__coordNumData )
         self.set_active_atoms_data_before_move(None)
@@ -458,7 +481,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
             #. relativeIndexes (numpy.ndarray): Group atoms relative index
                the move will be applied to.
         """
-        beforeMoveData = np.zeros(self.__coordNumData.shape, dtype=self.__coordNumData.dtype)
+        beforeMoveData = np.zeros(self.__coordNumData.shape, dtype=FLOAT_TYPE)
         multi_atoms_coord_number_coords( indexes        = relativeIndexes,
                                          boxCoords      = self.engine.boxCoordinates,
                                          basis          = self.engine.basisVectors,
@@ -489,7 +512,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
         self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
         # compute after move data
-        afterMoveData = np.zeros(self.__coordNumData.shape, dtype=self.__coordNumData.dtype)
+        afterMoveData = np.zeros(self.__coordNumData.shape, dtype=FLOAT_TYPE)
         multi_atoms_coord_number_coords( indexes        = relativeIndexes,
                                          boxCoords      = self.engine.boxCoordinates,
                                          basis          = self.engine.basisVectors,
@@ -506,9 +529,14 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         self.engine.boxCoordinates[relativeIndexes] = boxData
         # set active atoms data after move
         self.set_active_atoms_data_after_move( afterMoveData )
-        # compute after move standard error
-        self.__coordNumDataAfterMove = self.__coordNumData-self.activeAtomsDataBeforeMove+self.activeAtomsDataAfterMove
-        self.set_after_move_standard_error( self.compute_standard_error(data = self.__coordNumDataAfterMove) )
+        # compute after move standard error updating only shells changed by the move
+        shells     = np.flatnonzero(self.activeAtomsDataBeforeMove != self.activeAtomsDataAfterMove)
+        deviations = np.array(self.__get_data_shells_deviations())
+        self.__coordNumDataAfterMove = np.array(self.__coordNumData)
+        self.__coordNumDataAfterMove[shells] += self.activeAtomsDataAfterMove[shells]-self.activeAtomsDataBeforeMove[shells]
+        deviations[shells] = self.__get_shells_deviations(self.__coordNumDataAfterMove, shells=shells)
+        self._RT_shellsDeviationsAfterMove = deviations
+        self.set_after_move_standard_error( np.sum(deviations) )
 
     def accept_move(self, realIndexes, relativeIndexes):
         """
@@ -518,8 +546,10 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
             #. realIndexes (numpy.ndarray): not used here.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        self.__coordNumData = self.__coordNumDataAfterMove
+        self.__coordNumData = np.asarray(self.__coordNumDataAfterMove, dtype=self.engine.precision)
         self.set_data( self.__coordNumData ) # ADDED LATER 2016-11-27 to be verified.
+        self._RT_shellsDeviations          = (self.__coordNumData, self._RT_shellsDeviationsAfterMove)
+        self._RT_shellsDeviationsAfterMove = None
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
@@ -538,6 +568,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
+        self._RT_shellsDeviationsAfterMove = None
         # update standardError
         self.set_after_move_standard_error( None )
 
@@ -610,6 +641,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         # correct number of cores without collecting
         for idx, ci in enumerate(coresIndexes):
             self.__numberOfCores[idx] -= len(ci)
+        self._RT_shellsDeviations = None
         # collect atom
         self._atomsCollector.collect(realIndex, dataDict=dataDict)
 
@@ -698,14 +730,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
         plt.xticks(ind+width/2., ["%s-%s"%(e[:2]) for e in self.__coordNumDef])
         # compute standard errors
         if stdErrors:
-            StdErrs  = []
-            for idx, cn in enumerate( CN ):
-                if cn < self.__minAtoms[idx]:
-                    StdErrs.append( self.__weights[idx]*(self.__minAtoms[idx]-cn) )
-                elif cn > self.__maxAtoms[idx]:
-                    StdErrs.append( self.__weights[idx]*(cn-self.__maxAtoms[idx]) )
-                else:
-                    StdErrs.append( 0. )
+            StdErrs  = self.__get_shells_deviations(self.data)
             for mi,ma, std, rect in zip(self.__minAtoms,self.__maxAtoms,StdErrs, AXES.patches):
                 height = rect.get_height()
                 t = AXES.text(x     = rect.get_x() + rect.get_width()/2,
@@ -763,14 +788,7 @@ class AtomicCoordinationNumberConstraint(RigidConstraint, SingularConstraint):
             LOGGER.warn("%s constraint data are not computed."%(self.__class__.__name__))
             return
         CN = self.data/self.__numberOfCores
-        StdErrs  = []
-        for idx, cn in enumerate( CN ):
-            if cn < self.__minAtoms[idx]:
-                StdErrs.append( self.__weights[idx]*(self.__minAtoms[idx]-cn) )
-            elif cn > self.__maxAtoms[idx]:
-                StdErrs.append( self.__weights[idx]*(cn-self.__maxAtoms[idx]) )
-            else:
-                StdErrs.append( 0. )
+        StdErrs  = self.__get_shells_deviations(self.data)
         # create header
         header = ["core-shell","ninimum_coord_num","naximum_coord_num","mean_coord_num","standard_error"]
         # create data lists
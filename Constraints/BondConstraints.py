@@ -14,13 +14,13 @@ import numpy as np
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, LOGGER
 from fullrmc.Core.Collection import is_number, is_integer, raise_if_collected, reset_if_collected_out_of_date
-from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint
-from fullrmc.Core.bonds import full_bonds_coords
+from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint, BondedConstraint
+from fullrmc.Core.bonded_terms import full_bonds_coords
 
 
 
 
-class BondConstraint(RigidConstraint, SingularConstraint):
+class BondConstraint(RigidConstraint, SingularConstraint, BondedConstraint):
     """
     Controls the bond's length defined between two atoms.
 
@@ -76,6 +76,11 @@ class BondConstraint(RigidConstraint, SingularConstraint):
 
     """
 
+    # number of atoms index columns in bondsList
+    _TERMS_ATOMS = 2
+    # bonded_terms keyword of bondsList
+    _TERMS_KEYWORD = 'bonds'
+
     def __init__(self, rejectProbability=1):
         # initialize constraint
         RigidConstraint.__init__(self, rejectProbability=rejectProbability)
@@ -84,6 +89,8 @@ class BondConstraint(RigidConstraint, SingularConstraint):
         # init bonds data
         self.__bondsList = [[],[],[],[]]
         self.__bonds     = {}
+        # atoms to bonds CSR index, built upon need
+        self._RT_termsCSR = None
         # set computation cost
         self.set_computation_cost(1.0)
         # create dump flag
@@ -102,14 +109,14 @@ class BondConstraint(RigidConstraint, SingularConstraint):
         """ List of defined bonds"""
         return self.__bondsList
 
+    def _get_terms_list(self):
+        return self.__bondsList
+
     @property
     def bonds(self):
         """ Bonds dictionary map of every and each atom"""
         return self.__bonds
 
-    def _on_collector_reset(self):
-        self._atomsCollector._randomData = set([])
-
     def listen(self, message, argument=None):
         """
         Listens to any message sent from the Broadcaster.
@@ -198,6 +205,7 @@ class BondConstraint(RigidConstraint, SingularConstraint):
             for idx in xrange(NUMBER_OF_ATOMS):
                 self.__bonds[INT_TYPE(idx)] = self.__bonds.get(INT_TYPE(idx), {"indexes":[],"map":[]} )
         # dump to repository
+        self._RT_termsCSR = None
         self._dump_to_repository({'_BondConstraint__bondsList':self.__bondsList,
                                   '_BondConstraint__bonds'    :self.__bonds})
         # reset constraint
@@ -269,6 +277,7 @@ class BondConstraint(RigidConstraint, SingularConstraint):
             self.__bondsList[3] = np.append(self.__bondsList[3],upper)
         self.__bonds[idx1] = bondsIdx1
         self.__bonds[idx2] = bondsIdx2
+        self._RT_termsCSR  = None
         # dump to repository
         if self.__dumpBonds:
             self._dump_to_repository({'_BondConstraint__bondsList' :self.__bondsList,
@@ -418,8 +427,7 @@ class BondConstraint(RigidConstraint, SingularConstraint):
         if len(self._atomsCollector):
             bondsData   = np.zeros(self.__bondsList[0].shape[0], dtype=FLOAT_TYPE)
             reducedData = np.zeros(self.__bondsList[0].shape[0], dtype=FLOAT_TYPE)
-            bondsIndexes = set(set(range(self.__bondsList[0].shape[0])))
-            bondsIndexes = list( bondsIndexes-self._atomsCollector._randomData )
+            bondsIndexes = np.flatnonzero(~self._get_collected_terms_mask())
             idx1 = self._atomsCollector.get_relative_indexes(self.__bondsList[0][bondsIndexes])
             idx2 = self._atomsCollector.get_relative_indexes(self.__bondsList[1][bondsIndexes])
             lowerLimit = self.__bondsList[2][bondsIndexes]
@@ -430,16 +438,14 @@ class BondConstraint(RigidConstraint, SingularConstraint):
             lowerLimit = self.__bondsList[2]
             upperLimit = self.__bondsList[3]
         # compute
-        bonds, reduced = full_bonds_coords(idx1                  = idx1,
-                                           idx2                  = idx2,
-                                           lowerLimit            = lowerLimit,
-                                           upperLimit            = upperLimit,
-                                           boxCoords             = self.engine.boxCoordinates,
-                                           basis                 = self.engine.basisVectors,
-                                           isPBC                 = self.engine.isPBC,
-                                           reduceDistanceToUpper = False,
-                                           reduceDistanceToLower = False,
-                                           ncores                = INT_TYPE(1))
+        bonds, reduced = full_bonds_coords(boxCoords = self.engine.boxCoordinates,
+                                           basis     = self.engine.basisVectors,
+                                           isPBC     = self.engine.isPBC,
+                                           bonds     = (idx1,
+                                                        idx2,
+                                                        lowerLimit,
+                                                        upperLimit),
+                                           ncores    = self.engine._runtime_ncores)
         # create full length data
         if len(self._atomsCollector):
             bondsData[bondsIndexes]   = bonds
@@ -464,29 +470,8 @@ class BondConstraint(RigidConstraint, SingularConstraint):
                be applied to.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        # get bonds indexes
-        bondsIndexes = []
-        #for idx in relativeIndexes:
-        for idx in realIndexes:
-            bondsIndexes.extend( self.__bonds[idx]['map'] )
-        #bondsIndexes = list(set(bondsIndexes))
-        # remove collected bonds
-        bondsIndexes = list( set(bondsIndexes)-set(self._atomsCollector._randomData) )
-        # compute data before move
-        if len(bondsIndexes):
-            bonds, reduced = full_bonds_coords(idx1                  = self._atomsCollector.get_relative_indexes(self.__bondsList[0][bondsIndexes]),
-                                               idx2                  = self._atomsCollector.get_relative_indexes(self.__bondsList[1][bondsIndexes]),
-                                               lowerLimit            = self.__bondsList[2][bondsIndexes],
-                                               upperLimit            = self.__bondsList[3][bondsIndexes],
-                                               boxCoords             = self.engine.boxCoordinates,
-                                               basis                 = self.engine.basisVectors,
-                                               isPBC                 = self.engine.isPBC,
-                                               reduceDistanceToUpper = False,
-                                               reduceDistanceToLower = False,
-                                               ncores                = INT_TYPE(1))
-        else:
-            bonds   = None
-            reduced = None
+        # get not collected bonds indexes and compute data before move
+        bondsIndexes, bonds, reduced = self._compute_terms_before_move(realIndexes)
         # set data before move
         self.set_active_atoms_data_before_move( {"bondsIndexes":bondsIndexes, "bondsLength":bonds, "reducedLengths":reduced} )
         self.set_active_atoms_data_after_move(None)
@@ -503,28 +488,10 @@ class BondConstraint(RigidConstraint, SingularConstraint):
                coordinates.
         """
         bondsIndexes = self.activeAtomsDataBeforeMove["bondsIndexes"]
-        # change coordinates temporarily
-        boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
-        self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
         # compute data after move
-        if len(bondsIndexes):
-            bonds, reduced = full_bonds_coords(idx1                  = self._atomsCollector.get_relative_indexes(self.__bondsList[0][bondsIndexes]),#self.__bondsList[0][bondsIndexes],
-                                               idx2                  = self._atomsCollector.get_relative_indexes(self.__bondsList[1][bondsIndexes]),#self.__bondsList[1][bondsIndexes],
-                                               lowerLimit            = self.__bondsList[2][bondsIndexes],
-                                               upperLimit            = self.__bondsList[3][bondsIndexes],
-                                               boxCoords             = self.engine.boxCoordinates,
-                                               basis                 = self.engine.basisVectors,
-                                               isPBC                 = self.engine.isPBC,
-                                               reduceDistanceToUpper = False,
-                                               reduceDistanceToLower = False,
-                                               ncores                = INT_TYPE(1))
-        else:
-            bonds   = None
-            reduced = None
+        bonds, reduced = self._compute_terms_after_move(bondsIndexes, relativeIndexes, movedBoxCoordinates)
         # set active data after move
         self.set_active_atoms_data_after_move( {"bondsLength":bonds, "reducedLengths":reduced} )
-        # reset coordinates
-        self.engine.boxCoordinates[relativeIndexes] = boxData
         # compute standardError after move
         if bonds is None:
             self.set_after_move_standard_error( self.standardError )
@@ -593,10 +560,7 @@ class BondConstraint(RigidConstraint, SingularConstraint):
         # WHEN IMPLEMENTING ATOMS RELEASING. MAYBE WE NEED TO COLLECT DATA INSTEAD, REMOVE
         # AND ADD UPON RELEASE
         # get all involved data
-        bondsIndexes = []
-        for idx in realIndex:
-            bondsIndexes.extend( self.__bonds[idx]['map'] )
-        bondsIndexes = list(set(bondsIndexes))
+        bondsIndexes = self._get_terms_indexes(realIndex)
         if len(bondsIndexes):
             # set new data
             data = self.data
@@ -622,9 +586,8 @@ class BondConstraint(RigidConstraint, SingularConstraint):
     def _on_collector_collect_atom(self, realIndex):
         # get bond indexes
         BI = self.__bonds[realIndex]['map']
-        # append all mapped bonds to collector's random data
-        self._atomsCollector._randomData = self._atomsCollector._randomData.union( set(BI) )
-        #print realIndex, BI, self._atomsCollector._randomData
+        # flag all mapped bonds in collector's random data mask
+        self._get_collected_terms_mask()[BI] = True
         # collect atom bondIndexes
         self._atomsCollector.collect(realIndex, dataDict={'map':BI})
 
@@ -8,7 +8,7 @@ Collection of methods and classes definition useful for constraints computation
 import numpy as np
 
 # fullrmc library imports
-from fullrmc.Globals import LOGGER, FLOAT_TYPE, PI
+from fullrmc.Globals import LOGGER, INT_TYPE, FLOAT_TYPE, PI
 from fullrmc.Core.Collection import is_number
 
 
@@ -116,3 +116,203 @@ class ShapeFunction(object):
         sFunc = self.get_Gr_shape_function(rValues=rValues, compute=compute)
         rho0  = self.engine.numberDensity #(self._SFC.engine.numberOfAtoms/self._SFC.engine.volume).astype(FLOAT_TYPE)
         return sFunc / (FLOAT_TYPE(4.)*PI*rho0*rValues)
+
+
+class WindowConvolution(object):
+    """
+    Window function convolution operator. It computes the same as
+    numpy.convolve(data, window, 'same') for data at least as long as the
+    window. Narrow windows are convolved directly while wide ones are
+    convolved using FFT where window transforms are computed once
+    and cached per transform size.
+
+    :Parameters:
+        #. window (numpy.ndarray): The window function.
+        #. method (string): The convolution method. It can be 'direct',
+           'fft' or 'auto' to automatically pick the cheapest one given
+           data and window sizes.
+    """
+    def __init__(self, window, method='auto'):
+        assert isinstance(window, np.ndarray), LOGGER.error("window must be a numpy.ndarray")
+        assert len(window.shape) == 1, LOGGER.error("window must be of dimension 1")
+        assert method in ('auto', 'direct', 'fft'), LOGGER.error("method must be 'auto', 'direct' or 'fft'")
+        self.__window     = window
+        self.__method     = method
+        self.__offset     = len(window)-1-len(window)//2
+        self.__transforms = {}
+
+    @property
+    def window(self):
+        """ Window function."""
+        return self.__window
+
+    @property
+    def method(self):
+        """ Convolution method."""
+        return self.__method
+
+    def __get_transform_size(self, size):
+        return 1 << int( np.ceil(np.log2(size+len(self.__window)-1)) )
+
+    def get_method(self, size):
+        """
+        Get convolution method used for data of the given size.
+
+        :Parameters:
+            #. size (integer): Data size.
+
+        :Returns:
+            #. method (string): 'direct' or 'fft'.
+        """
+        if size < len(self.__window):
+            return 'direct'
+        if self.__method != 'auto':
+            return self.__method
+        # direct convolution costs size*window operations while FFT
+        # costs three transforms of few n*log2(n) operations each
+        n = self.__get_transform_size(size)
+        if size*len(self.__window) <= 5*n*np.log2(n):
+            return 'direct'
+        return 'fft'
+
+    def convolve(self, data):
+        """
+        Convolve data with window function.
+
+        :Parameters:
+            #. data (numpy.ndarray): The data to convolve.
+
+        :Returns:
+            #. convolved (numpy.ndarray): The convolved data of the same
+               size as data.
+        """
+        size = len(data)
+        if self.get_method(size) == 'direct':
+            return np.convolve(data, self.__window, 'same')
+        n = self.__get_transform_size(size)
+        transform = self.__transforms.get(n, None)
+        if transform is None:
+            transform = self.__transforms[n] = np.fft.rfft(self.__window, n)
+        full = np.fft.irfft(np.fft.rfft(data, n)*transform, n)
+        return full[self.__offset:self.__offset+size].astype(np.result_type(data, self.__window))
+
+
+class _PairsHistogramsConstraint(object):
+    """
+    Runtime helpers shared by constraints computed from elements pairs
+    intra and inter molecular distances histograms such as pair
+    distribution and structure factor constraints. Meant to be mixed
+    with an ExperimentalConstraint defining histogramSize, elementsPairs,
+    weightingScheme and windowFunction properties. For internal use only.
+    """
+    # runtime buffers and caches used by this class helpers
+    _HISTOGRAMS_RUNTIME_CACHES = ('_RT_histogramsBuffers', '_RT_weightedHistogram',
+                                  '_RT_weightedHistogramAfterMove', '_RT_windowConvolution',
+                                  '_RT_ownedData')
+
+    def _reset_histograms_runtime_caches(self):
+        """ Reset histograms runtime buffers and caches."""
+        for name in self._HISTOGRAMS_RUNTIME_CACHES:
+            setattr(self, name, None)
+
+    def _set_default_runtime_caches(self, names=()):
+        """ Initialize histograms and given runtime buffers and caches
+        of constraints saved before they were introduced."""
+        for name in self._HISTOGRAMS_RUNTIME_CACHES+tuple(names):
+            self.__dict__.setdefault(name, None)
+
+    def _get_histograms_buffers(self, name):
+        """ Get named (intra, inter) preallocated histograms buffers
+        used at runtime to compute moves data without allocating arrays."""
+        shape = (self.engine.numberOfElements, self.engine.numberOfElements, self.histogramSize)
+        if self._RT_histogramsBuffers is None:
+            self._RT_histogramsBuffers = {}
+        buffers = self._RT_histogramsBuffers.get(name, None)
+        if buffers is None or buffers[0].shape != shape:
+            buffers = (np.zeros(shape, dtype=INT_TYPE), np.zeros(shape, dtype=INT_TYPE))
+            self._RT_histogramsBuffers[name] = buffers
+        return buffers
+
+    def _get_pairs_weights(self):
+        """ Get the (numberOfElements, numberOfElements) elements pairs
+        weights matrix W where the weighted total histogram is the sum of
+        W[i,j]*(intra[i,j,:]+inter[i,j,:]) over all i and j."""
+        weights = np.zeros((self.engine.numberOfElements, self.engine.numberOfElements), dtype=FLOAT_TYPE)
+        for pair in self.elementsPairs:
+            # get weighting scheme
+            wij = self.weightingScheme.get(pair[0]+"-"+pair[1], None)
+            if wij is None:
+                wij = self.weightingScheme[pair[1]+"-"+pair[0]]
+            # get number of atoms per element
+            ni = self.engine.numberOfAtomsPerElement[pair[0]]
+            nj = self.engine.numberOfAtomsPerElement[pair[1]]
+            # get index of element
+            idi = self.engine.elements.index(pair[0])
+            idj = self.engine.elements.index(pair[1])
+            # get Nij
+            if idi == idj:
+                Nij = ni*(ni-1)/2.0
+            else:
+                Nij = ni*nj
+            Dij = FLOAT_TYPE( Nij/self.engine.volume )
+            weights[idi,idj] = weights[idj,idi] = wij/Dij
+        return weights
+
+    def _get_data_weighted_histogram(self, weights):
+        """ Get constraint's data weighted total histogram. It is cached
+        as long as data and weights don't change."""
+        intra, inter = self.data["intra"], self.data["inter"]
+        cache = self._RT_weightedHistogram
+        if cache is None or cache[0] is not intra or cache[1] is not inter or not np.array_equal(cache[2], weights):
+            weighted = np.tensordot(weights, intra+inter, axes=([0,1],[0,1]))
+            cache    = self._RT_weightedHistogram = (intra, inter, weights, weighted)
+        return cache[3]
+
+    def _get_after_move_weighted_histogram(self):
+        """ Get weighted total histogram after move by updating constraint's
+        data weighted total histogram only at the bins changed by the move."""
+        weights  = self._get_pairs_weights()
+        weighted = np.array(self._get_data_weighted_histogram(weights))
+        delta, _ = self._get_histograms_buffers('delta')
+        np.subtract(self.activeAtomsDataAfterMove["intra"], self.activeAtomsDataBeforeMove["intra"], out=delta)
+        delta += self.activeAtomsDataAfterMove["inter"]
+        delta -= self.activeAtomsDataBeforeMove["inter"]
+        bins = np.nonzero( delta.reshape((-1,delta.shape[2])).any(axis=0) )[0]
+        if len(bins):
+            weighted[bins] += np.tensordot(weights, delta[:,:,bins], axes=([0,1],[0,1]))
+        self._RT_weightedHistogramAfterMove = (weights, weighted, bins)
+        return weighted
+
+    def _accept_after_move_histograms(self):
+        """ Update constraint's data histograms in place at the bins changed
+        by the move and set data weighted total histogram cache to the after
+        move one. Data histograms are copied once before being updated in
+        place if they were not created here, as they can be shared with
+        original or amputation data."""
+        data = self.data
+        if self._RT_ownedData is not data:
+            data = {"intra":np.array(data["intra"]), "inter":np.array(data["inter"])}
+            self.set_data( data )
+            # set_data may wrap data in a new dictionary
+            self._RT_ownedData = data = self.data
+        for key in ("intra", "inter"):
+            before = self.activeAtomsDataBeforeMove[key]
+            after  = self.activeAtomsDataAfterMove[key]
+            bins   = np.nonzero( (before!=after).reshape((-1,before.shape[2])).any(axis=0) )[0]
+            if len(bins):
+                data[key][:,:,bins] += after[:,:,bins]-before[:,:,bins]
+        # set weighted total histogram cache
+        if self._RT_weightedHistogramAfterMove is not None:
+            weights, weighted, _ = self._RT_weightedHistogramAfterMove
+            self._RT_weightedHistogram = (data["intra"], data["inter"], weights, weighted)
+        else:
+            self._RT_weightedHistogram = None
+        self._RT_weightedHistogramAfterMove = None
+
+    def _get_window_convolution(self):
+        """ Get window function convolution operator. It's cached as long
+        as window function doesn't change."""
+        convolution = self._RT_windowConvolution
+        if convolution is None or convolution.window is not self.windowFunction:
+            convolution = self._RT_windowConvolution = WindowConvolution(self.windowFunction)
+        return convolution
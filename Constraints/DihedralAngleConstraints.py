@@ -14,13 +14,13 @@ import numpy as np
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, LOGGER
 from fullrmc.Core.Collection import is_number, is_integer, raise_if_collected, reset_if_collected_out_of_date
-from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint
-from fullrmc.Core.dihedral_angles import full_dihedral_angles_coords
+from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint, BondedConstraint
+from fullrmc.Core.bonded_terms import full_dihedral_angles_coords
 
 
 
 
-class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
+class DihedralAngleConstraint(RigidConstraint, SingularConstraint, BondedConstraint):
     """
     Dihedral angle is defined between two intersecting planes formed
     with defined atoms. Dihedral angle constraint can control up to three
@@ -80,6 +80,11 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
 
     """
 
+    # number of atoms index columns in anglesList
+    _TERMS_ATOMS = 4
+    # bonded_terms keyword of anglesList
+    _TERMS_KEYWORD = 'dihedrals'
+
     def __init__(self, rejectProbability=1):
         # initialize constraint
         RigidConstraint.__init__(self, rejectProbability=rejectProbability)
@@ -88,6 +93,8 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         # init angles data
         self.__anglesList = [[],[],[],[],[],[],[],[],[],[]]
         self.__angles     = {}
+        # atoms to angles CSR index, built upon need
+        self._RT_termsCSR = None
         # set computation cost
         self.set_computation_cost(3.0)
         # create dump flag
@@ -106,14 +113,14 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         """ Improper angles list."""
         return self.__anglesList
 
+    def _get_terms_list(self):
+        return self.__anglesList
+
     @property
     def angles(self):
         """ Angles dictionary for every and each atom."""
         return self.__angles
 
-    def _on_collector_reset(self):
-        self._atomsCollector._randomData = set([])
-
     def listen(self, message, argument=None):
         """
         Listens to any message sent from the Broadcaster.
@@ -255,6 +262,7 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
             # finalize angles
             for idx in xrange(NUMBER_OF_ATOMS):
                 self.__angles[INT_TYPE(idx)] = self.__angles.get(INT_TYPE(idx), {"idx2":[],"idx3":[],"idx4":[],"dihedralMap":[],"otherMap":[]}  )
+        self._RT_termsCSR = None
         # dump to repository
         self._dump_to_repository({'_DihedralAngleConstraint__anglesList' :self.__anglesList,
                                   '_DihedralAngleConstraint__angles'     :self.__angles})
@@ -442,6 +450,7 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         self.__angles[idx2] = angles2
         self.__angles[idx3] = angles3
         self.__angles[idx4] = angles4
+        self._RT_termsCSR = None
         # dump to repository
         if self.__dumpAngles:
             self._dump_to_repository({'_DihedralAngleConstraint__anglesList' :self.__anglesList,
@@ -605,8 +614,7 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         if len(self._atomsCollector):
             anglesData    = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
             reducedData   = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
-            anglesIndexes = set(set(range(self.__anglesList[0].shape[0])))
-            anglesIndexes  = list( anglesIndexes-self._atomsCollector._randomData )
+            anglesIndexes = np.flatnonzero(~self._get_collected_terms_mask())
 
             indexes1 = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes])
             indexes2 = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes])
@@ -630,22 +638,20 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
             lowerLimit3 = self.__anglesList[8]
             upperLimit3 = self.__anglesList[9]
         # compute data
-        angles, reduced =  full_dihedral_angles_coords( indexes1           = indexes1,
-                                                        indexes2           = indexes2,
-                                                        indexes3           = indexes3,
-                                                        indexes4           = indexes4,
-                                                        lowerLimit1        = lowerLimit1,
-                                                        upperLimit1        = upperLimit1,
-                                                        lowerLimit2        = lowerLimit2,
-                                                        upperLimit2        = upperLimit2,
-                                                        lowerLimit3        = lowerLimit3,
-                                                        upperLimit3        = upperLimit3,
-                                                        boxCoords          = self.engine.boxCoordinates,
-                                                        basis              = self.engine.basisVectors ,
-                                                        isPBC              = self.engine.isPBC,
-                                                        reduceAngleToUpper = False,
-                                                        reduceAngleToLower = False,
-                                                        ncores             = INT_TYPE(1))
+        angles, reduced =  full_dihedral_angles_coords(boxCoords = self.engine.boxCoordinates,
+                                                       basis     = self.engine.basisVectors,
+                                                       isPBC     = self.engine.isPBC,
+                                                       dihedrals = (indexes1,
+                                                                    indexes2,
+                                                                    indexes3,
+                                                                    indexes4,
+                                                                    lowerLimit1,
+                                                                    upperLimit1,
+                                                                    lowerLimit2,
+                                                                    upperLimit2,
+                                                                    lowerLimit3,
+                                                                    upperLimit3),
+                                                       ncores    = self.engine._runtime_ncores)
         # create full length data
         if len(self._atomsCollector):
             anglesData[anglesIndexes]  = angles
@@ -671,35 +677,8 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
                be applied to.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        # get angles indexes
-        anglesIndexes = []
-        #for idx in relativeIndexes:
-        for idx in realIndexes:
-            anglesIndexes.extend( self.__angles[idx]['dihedralMap'] )
-            anglesIndexes.extend( self.__angles[idx]['otherMap'] )
-        #anglesIndexes = list(set(anglesIndexes))
-        anglesIndexes = list( set(anglesIndexes)-set(self._atomsCollector._randomData) )
-        # compute data before move
-        if len(anglesIndexes):
-            angles, reduced =  full_dihedral_angles_coords( indexes1           = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes]),
-                                                            indexes2           = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes]),
-                                                            indexes3           = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndexes]),
-                                                            indexes4           = self._atomsCollector.get_relative_indexes(self.__anglesList[3][anglesIndexes]),
-                                                            lowerLimit1        = self.__anglesList[4][anglesIndexes],
-                                                            upperLimit1        = self.__anglesList[5][anglesIndexes],
-                                                            lowerLimit2        = self.__anglesList[6][anglesIndexes],
-                                                            upperLimit2        = self.__anglesList[7][anglesIndexes],
-                                                            lowerLimit3        = self.__anglesList[8][anglesIndexes],
-                                                            upperLimit3        = self.__anglesList[9][anglesIndexes],
-                                                            boxCoords          = self.engine.boxCoordinates,
-                                                            basis              = self.engine.basisVectors ,
-                                                            isPBC              = self.engine.isPBC,
-                                                            reduceAngleToUpper = False,
-                                                            reduceAngleToLower = False,
-                                                            ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # get not collected angles indexes and compute data before move
+        anglesIndexes, angles, reduced = self._compute_terms_before_move(realIndexes)
         # set data before move
         self.set_active_atoms_data_before_move( {"anglesIndexes":anglesIndexes, "angles":angles, "reducedAngles":reduced} )
         self.set_active_atoms_data_after_move(None)
@@ -717,34 +696,10 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         """
         # get angles indexes
         anglesIndexes = self.activeAtomsDataBeforeMove["anglesIndexes"]
-        # change coordinates temporarily
-        boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
-        self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
-        # compute data before move
-        if len(anglesIndexes):
-            angles, reduced =  full_dihedral_angles_coords( indexes1           = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes]),
-                                                            indexes2           = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes]),
-                                                            indexes3           = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndexes]),
-                                                            indexes4           = self._atomsCollector.get_relative_indexes(self.__anglesList[3][anglesIndexes]),
-                                                            lowerLimit1        = self.__anglesList[4][anglesIndexes],
-                                                            upperLimit1        = self.__anglesList[5][anglesIndexes],
-                                                            lowerLimit2        = self.__anglesList[6][anglesIndexes],
-                                                            upperLimit2        = self.__anglesList[7][anglesIndexes],
-                                                            lowerLimit3        = self.__anglesList[8][anglesIndexes],
-                                                            upperLimit3        = self.__anglesList[9][anglesIndexes],
-                                                            boxCoords          = self.engine.boxCoordinates,
-                                                            basis              = self.engine.basisVectors ,
-                                                            isPBC              = self.engine.isPBC,
-                                                            reduceAngleToUpper = False,
-                                                            reduceAngleToLower = False,
-                                                            ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # compute data after move
+        angles, reduced = self._compute_terms_after_move(anglesIndexes, relativeIndexes, movedBoxCoordinates)
         # set active data after move
         self.set_active_atoms_data_after_move( {"angles":angles, "reducedAngles":reduced} )
-        # reset coordinates
-        self.engine.boxCoordinates[relativeIndexes] = boxData
         # compute standardError after move
         if angles is None:
             self.set_after_move_standard_error( self.standardError )
@@ -802,11 +757,7 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
         # WHEN IMPLEMENTING ATOMS RELEASING. MAYBE WE NEED TO COLLECT DATA INSTEAD, REMOVE
         # AND ADD UPON RELEASE
         # get all involved data
-        anglesIndexes = []
-        for idx in realIndex:
-            anglesIndexes.extend( self.__angles[idx]['dihedralMap'] )
-            anglesIndexes.extend( self.__angles[idx]['otherMap'] )
-        anglesIndexes = list(set(anglesIndexes))
+        anglesIndexes = self._get_terms_indexes(realIndex)
         if len(anglesIndexes):
             # set new data
             data = self.data
@@ -832,8 +783,8 @@ class DihedralAngleConstraint(RigidConstraint, SingularConstraint):
     def _on_collector_collect_atom(self, realIndex):
         # get angle indexes
         AI = self.__angles[realIndex]['dihedralMap'] + self.__angles[realIndex]['otherMap']
-        # append all mapped bonds to collector's random data
-        self._atomsCollector._randomData = self._atomsCollector._randomData.union( set(AI) )
+        # flag all mapped angles in collector's random data mask
+        self._get_collected_terms_mask()[AI] = True
         # collect atom anglesIndexes
         self._atomsCollector.collect(realIndex, dataDict={'dihedralMap':self.__angles[realIndex]['dihedralMap'],
                                                           'otherMap'   :self.__angles[realIndex]['otherMap']})
@@ -548,7 +548,8 @@ class _MolecularDistanceConstraint(_DistanceConstraint):
                                       reduceDistanceToUpper = self._reduceDistanceToUpper,
                                       reduceDistanceToLower = self._reduceDistanceToLower,
                                       countWithinLimits     = self._countWithinLimits,
-                                      ncores                = self.engine._runtime_ncores)
+                                      ncores                = self.engine._runtime_ncores,
+                                      useCells              = True)
         if self._interMolecular:
             number      = ninter
             distanceSum = dinter
@@ -14,13 +14,13 @@ import numpy as np
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, LOGGER
 from fullrmc.Core.Collection import is_number, is_integer, raise_if_collected, reset_if_collected_out_of_date
-from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint
-from fullrmc.Core.improper_angles import full_improper_angles_coords
+from fullrmc.Core.Constraint import Constraint, SingularConstraint, RigidConstraint, BondedConstraint
+from fullrmc.Core.bonded_terms import full_improper_angles_coords
 
 
 
 
-class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
+class ImproperAngleConstraint(RigidConstraint, SingularConstraint, BondedConstraint):
     """
     Controls the improper angle formed with 4 defined atoms. It's mainly used
     to keep the improper atom in the plane defined with three other atoms.
@@ -88,6 +88,11 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
 
     """
 
+    # number of atoms index columns in anglesList
+    _TERMS_ATOMS = 4
+    # bonded_terms keyword of anglesList
+    _TERMS_KEYWORD = 'impropers'
+
     def __init__(self, rejectProbability=1):
         # initialize constraint
         RigidConstraint.__init__(self, rejectProbability=rejectProbability)
@@ -96,6 +101,8 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         # init angles data
         self.__anglesList = [[],[],[],[],[],[]]
         self.__angles     = {}
+        # atoms to angles CSR index, built upon need
+        self._RT_termsCSR = None
         # set computation cost
         self.set_computation_cost(3.0)
         # create dump flag
@@ -114,14 +121,14 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         """ Get improper angles list."""
         return self.__anglesList
 
+    def _get_terms_list(self):
+        return self.__anglesList
+
     @property
     def angles(self):
         """ Get angles dictionary for every and each atom."""
         return self.__angles
 
-    def _on_collector_reset(self):
-        self._atomsCollector._randomData = set([])
-
     def listen(self, message, argument=None):
         """
         Listens to any message sent from the Broadcaster.
@@ -217,6 +224,7 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
             # finalize angles
             for idx in xrange(NUMBER_OF_ATOMS):
                 self.__angles[INT_TYPE(idx)] = self.__angles.get(INT_TYPE(idx), {"oIdx":[],"xIdx":[],"yIdx":[],"improperMap":[],"otherMap":[]}  )
+        self._RT_termsCSR = None
         # dump to repository
         self._dump_to_repository({'_ImproperAngleConstraint__anglesList' :self.__anglesList,
                                   '_ImproperAngleConstraint__angles'     :self.__angles})
@@ -360,6 +368,7 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         self.__angles[oIdx]        = anglesO
         self.__angles[xIdx]        = anglesX
         self.__angles[yIdx]        = anglesY
+        self._RT_termsCSR = None
         # dump to repository
         if self.__dumpAngles:
             self._dump_to_repository({'_ImproperAngleConstraint__anglesList' :self.__anglesList,
@@ -505,8 +514,7 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         if len(self._atomsCollector):
             anglesData    = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
             reducedData   = np.zeros(self.__anglesList[0].shape[0], dtype=FLOAT_TYPE)
-            anglesIndexes = set(set(range(self.__anglesList[0].shape[0])))
-            anglesIndexes  = list( anglesIndexes-self._atomsCollector._randomData )
+            anglesIndexes = np.flatnonzero(~self._get_collected_terms_mask())
             improperIdxs = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes])
             oIdxs        = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes])
             xIdxs        = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndexes])
@@ -521,18 +529,16 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
             lowerLimit = self.__anglesList[4]
             upperLimit = self.__anglesList[5]
         # compute data
-        angles, reduced =  full_improper_angles_coords( improperIdxs       = improperIdxs,
-                                                        oIdxs              = oIdxs,
-                                                        xIdxs              = xIdxs,
-                                                        yIdxs              = yIdxs,
-                                                        lowerLimit         = lowerLimit,
-                                                        upperLimit         = upperLimit,
-                                                        boxCoords          = self.engine.boxCoordinates,
-                                                        basis              = self.engine.basisVectors,
-                                                        isPBC              = self.engine.isPBC,
-                                                        reduceAngleToUpper = False,
-                                                        reduceAngleToLower = False,
-                                                        ncores             = INT_TYPE(1))
+        angles, reduced =  full_improper_angles_coords(boxCoords = self.engine.boxCoordinates,
+                                                       basis     = self.engine.basisVectors,
+                                                       isPBC     = self.engine.isPBC,
+                                                       impropers = (improperIdxs,
+                                                                    oIdxs,
+                                                                    xIdxs,
+                                                                    yIdxs,
+                                                                    lowerLimit,
+                                                                    upperLimit),
+                                                       ncores    = self.engine._runtime_ncores)
         # create full length data
         if len(self._atomsCollector):
             anglesData[anglesIndexes]  = angles
@@ -558,31 +564,8 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
                be applied to.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        # get angles indexes
-        anglesIndexes = []
-        #for idx in relativeIndexes:
-        for idx in realIndexes:
-            anglesIndexes.extend( self.__angles[idx]['improperMap'] )
-            anglesIndexes.extend( self.__angles[idx]['otherMap'] )
-        #anglesIndexes = list(set(anglesIndexes))
-        anglesIndexes = list( set(anglesIndexes)-set(self._atomsCollector._randomData) )
-        # compute data before move
-        if len(anglesIndexes):
-            angles, reduced =  full_improper_angles_coords( improperIdxs       = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes]),
-                                                            oIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes]),
-                                                            xIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndexes]),
-                                                            yIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[3][anglesIndexes]),
-                                                            lowerLimit         = self.__anglesList[4][anglesIndexes],
-                                                            upperLimit         = self.__anglesList[5][anglesIndexes],
-                                                            boxCoords          = self.engine.boxCoordinates,
-                                                            basis              = self.engine.basisVectors ,
-                                                            isPBC              = self.engine.isPBC,
-                                                            reduceAngleToUpper = False,
-                                                            reduceAngleToLower = False,
-                                                            ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # get not collected angles indexes and compute data before move
+        anglesIndexes, angles, reduced = self._compute_terms_before_move(realIndexes)
         # set data before move
         self.set_active_atoms_data_before_move( {"anglesIndexes":anglesIndexes, "angles":angles, "reducedAngles":reduced} )
         self.set_active_atoms_data_after_move(None)
@@ -600,30 +583,10 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         """
         # get angles indexes
         anglesIndexes = self.activeAtomsDataBeforeMove["anglesIndexes"]
-        # change coordinates temporarily
-        boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
-        self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
-        # compute data before move
-        if len(anglesIndexes):
-            angles, reduced =  full_improper_angles_coords( improperIdxs       = self._atomsCollector.get_relative_indexes(self.__anglesList[0][anglesIndexes]),
-                                                            oIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[1][anglesIndexes]),
-                                                            xIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[2][anglesIndexes]),
-                                                            yIdxs              = self._atomsCollector.get_relative_indexes(self.__anglesList[3][anglesIndexes]),
-                                                            lowerLimit         = self.__anglesList[4][anglesIndexes],
-                                                            upperLimit         = self.__anglesList[5][anglesIndexes],
-                                                            boxCoords          = self.engine.boxCoordinates,
-                                                            basis              = self.engine.basisVectors ,
-                                                            isPBC              = self.engine.isPBC,
-                                                            reduceAngleToUpper = False,
-                                                            reduceAngleToLower = False,
-                                                            ncores             = INT_TYPE(1))
-        else:
-            angles  = None
-            reduced = None
+        # compute data after move
+        angles, reduced = self._compute_terms_after_move(anglesIndexes, relativeIndexes, movedBoxCoordinates)
         # set active data after move
         self.set_active_atoms_data_after_move( {"angles":angles, "reducedAngles":reduced} )
-        # reset coordinates
-        self.engine.boxCoordinates[relativeIndexes] = boxData
         # compute standardError after move
         if angles is None:
             self.set_after_move_standard_error( self.standardError )
@@ -682,11 +645,7 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
         # WHEN IMPLEMENTING ATOMS RELEASING. MAYBE WE NEED TO COLLECT DATA INSTEAD, REMOVE
         # AND ADD UPON RELEASE
         # get all involved data
-        anglesIndexes = []
-        for idx in realIndex:
-            anglesIndexes.extend( self.__angles[idx]['improperMap'] )
-            anglesIndexes.extend( self.__angles[idx]['otherMap'] )
-        anglesIndexes = list(set(anglesIndexes))
+        anglesIndexes = self._get_terms_indexes(realIndex)
         if len(anglesIndexes):
             # set new data
             data = self.data
@@ -712,8 +671,8 @@ class ImproperAngleConstraint(RigidConstraint, SingularConstraint):
     def _on_collector_collect_atom(self, realIndex):
         # get angle indexes
         AI = self.__angles[realIndex]['improperMap'] + self.__angles[realIndex]['otherMap']
-        # append all mapped bonds to collector's random data
-        self._atomsCollector._randomData = self._atomsCollector._randomData.union( set(AI) )
+        # flag all mapped angles in collector's random data mask
+        self._get_collected_terms_mask()[AI] = True
         # collect atom anglesIndexes
         self._atomsCollector.collect(realIndex, dataDict={'improperMap':self.__angles[realIndex]['improperMap'],
                                                           'otherMap'   :self.__angles[realIndex]['otherMap']})
@@ -102,50 +102,34 @@ class PairCorrelationConstraint(PairDistributionConstraint):
     def _reset_standard_error(self):
         # recompute squared deviation
         if self.data is not None:
-            totalPCF = self.__get_total_gr(self.data)
-            self.set_standard_error(self.compute_standard_error(modelData = totalPCF))
+            weighted = self._get_data_weighted_histogram(self._get_pairs_weights())
+            totalPCF = self._get_unscaled_total(weighted, rho0=self.engine.numberDensity)
+            self.set_standard_error(self._compute_and_cache_standard_error(weighted, totalPCF))
 
-    def __get_total_gr(self, data):
+    def __get_total_gr(self, data, weighted=None):
         """This method is created just to speed up the computation of
-        the total gr upon fitting.
+        the total gr upon fitting. weighted total histogram can be
+        given when already computed.
         """
-        gr = np.zeros(self.histogramSize, dtype=FLOAT_TYPE)
-        for pair in self.elementsPairs:
-            # get weighting scheme
-            wij = self.weightingScheme.get(pair[0]+"-"+pair[1], None)
-            if wij is None:
-                wij = self.weightingScheme[pair[1]+"-"+pair[0]]
-            # get number of atoms per element
-            ni = self.engine.numberOfAtomsPerElement[pair[0]]
-            nj = self.engine.numberOfAtomsPerElement[pair[1]]
-            # get index of element
-            idi = self.engine.elements.index(pair[0])
-            idj = self.engine.elements.index(pair[1])
-            # get Nij
-            if idi == idj:
-                Nij = ni*(ni-1)/2.0
-                Dij = Nij/self.engine.volume
-                nij = data["intra"][idi,idj,:]+data["inter"][idi,idj,:]
-                gr += wij*nij/Dij
-            else:
-                Nij = ni*nj
-                Dij = Nij/self.engine.volume
-                nij = data["intra"][idi,idj,:]+data["intra"][idj,idi,:] + data["inter"][idi,idj,:]+data["inter"][idj,idi,:]
-                gr += wij*nij/Dij
-        # Multiply by scale factor and deviding by shells volume
-        gr /= self.shellVolumes
+        if weighted is None:
+            weighted = np.tensordot(self._get_pairs_weights(), data["intra"]+data["inter"], axes=([0,1],[0,1]))
+        return self._get_model_total( self._get_unscaled_total(weighted, rho0=None) )
+
+    def _get_unscaled_total(self, weighted, rho0):
+        """ Get unscaled and not convolved total g(r) given weighted
+        total histogram. rho0 is not used here."""
+        # deviding by shells volume
+        gr = (weighted/self.shellVolumes).astype(FLOAT_TYPE)
         # remove shape function
         if self._shapeArray is not None:
             gr -= self._shapeArray
-        # Multiply by scale factor
-        self._fittedScaleFactor = self.get_adjusted_scale_factor(self.experimentalPDF, gr, self._usedDataWeights)
-        if self._fittedScaleFactor != 1:
-            gr *= self._fittedScaleFactor
-        # convolve total with window function
-        if self.windowFunction is not None:
-            gr = np.convolve(gr, self.windowFunction, 'same')
         return gr
 
+    def _get_total_delta(self, deltaWeighted, start, end):
+        """ Get unscaled total g(r) change between start and end points
+        given weighted total histogram change over the same points."""
+        return deltaWeighted/self.shellVolumes[start:end]
+
     def _on_collector_reset(self):
         pass
 
@@ -191,7 +175,7 @@ class PairCorrelationConstraint(PairDistributionConstraint):
         output["pcf_total"] *= self.scaleFactor
         # convolve total with window function
         if self.windowFunction is not None:
-            output["pcf"] = np.convolve(output["pcf_total"], self.windowFunction, 'same')
+            output["pcf"] = self._get_window_convolution().convolve(output["pcf_total"])
         else:
             output["pcf"] = output["pcf_total"]
         return output
@@ -221,14 +205,16 @@ class PairCorrelationConstraint(PairDistributionConstraint):
                                                     maxDistance      = self.maximumDistance,
                                                     histSize         = self.histogramSize,
                                                     bin              = self.bin,
-                                                    ncores           = self.engine._runtime_ncores)
+                                                    ncores           = self.engine._runtime_ncores,
+                                                    useCells         = True)
         # update data
         self.set_data({"intra":intra, "inter":inter})
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
         # set standardError
-        totalPCF = self.__get_total_gr(self.data)
-        self.set_standard_error(self.compute_standard_error(modelData = totalPCF))
+        weighted = self._get_data_weighted_histogram(self._get_pairs_weights())
+        totalPCF = self._get_unscaled_total(weighted, rho0=self.engine.numberDensity)
+        self.set_standard_error(self._compute_and_cache_standard_error(weighted, totalPCF))
         # set original data
         if self.originalData is None:
             self._set_original_data(self.data)
@@ -242,32 +228,40 @@ class PairCorrelationConstraint(PairDistributionConstraint):
             #. relativeIndexes (numpy.ndarray): Group atoms relative index
                the move will be applied to.
         """
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.minimumDistance,
-                                                          maxDistance      = self.maximumDistance,
-                                                          histSize         = self.histogramSize,
-                                                          bin              = self.bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores)
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.minimumDistance,
-                                                      maxDistance      = self.maximumDistance,
-                                                      histSize         = self.histogramSize,
-                                                      bin              = self.bin,
-                                                      ncores           = self.engine._runtime_ncores )
+        intraM,interM = self._get_histograms_buffers('beforeMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.minimumDistance,
+                                          maxDistance      = self.maximumDistance,
+                                          histSize         = self.histogramSize,
+                                          bin              = self.bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.minimumDistance,
+                                      maxDistance      = self.maximumDistance,
+                                      histSize         = self.histogramSize,
+                                      bin              = self.bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
         # set active atoms data
-        self.set_active_atoms_data_before_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        self.set_active_atoms_data_before_move( {"intra":intraM, "inter":interM} )
         self.set_active_atoms_data_after_move(None)
 
     def compute_after_move(self, realIndexes, relativeIndexes, movedBoxCoordinates):
@@ -285,40 +279,46 @@ class PairCorrelationConstraint(PairDistributionConstraint):
         boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
         self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
         # calculate pair distribution function
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.minimumDistance,
-                                                          maxDistance      = self.maximumDistance,
-                                                          histSize         = self.histogramSize,
-                                                          bin              = self.bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores )
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.minimumDistance,
-                                                      maxDistance      = self.maximumDistance,
-                                                      histSize         = self.histogramSize,
-                                                      bin              = self.bin,
-                                                      ncores           = self.engine._runtime_ncores  )
+        intraM,interM = self._get_histograms_buffers('afterMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.minimumDistance,
+                                          maxDistance      = self.maximumDistance,
+                                          histSize         = self.histogramSize,
+                                          bin              = self.bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.minimumDistance,
+                                      maxDistance      = self.maximumDistance,
+                                      histSize         = self.histogramSize,
+                                      bin              = self.bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
         # set active atoms data
-        self.set_active_atoms_data_after_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        self.set_active_atoms_data_after_move( {"intra":intraM, "inter":interM} )
         # reset coordinates
         self.engine.boxCoordinates[relativeIndexes] = boxData
-        # compute standardError after move
-        dataIntra = self.data["intra"]-self.activeAtomsDataBeforeMove["intra"]+self.activeAtomsDataAfterMove["intra"]
-        dataInter = self.data["inter"]-self.activeAtomsDataBeforeMove["inter"]+self.activeAtomsDataAfterMove["inter"]
-        totalPCF = self.__get_total_gr({"intra":dataIntra, "inter":dataInter})
+        # compute standardError after move updating changed bins only
+        weighted = self._get_after_move_weighted_histogram()
         # set after move standard error
-        self.set_after_move_standard_error( self.compute_standard_error(modelData = totalPCF) )
+        self.set_after_move_standard_error( self._compute_after_move_standard_error(weighted) )
 
     def compute_as_if_amputated(self, realIndex, relativeIndex):
         """
@@ -20,10 +20,10 @@ from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, PRECISION, LOGGER
 from fullrmc.Core.Collection import is_number, is_integer, get_path, reset_if_collected_out_of_date, get_real_elements_weight
 from fullrmc.Core.Constraint import Constraint, ExperimentalConstraint
 from fullrmc.Core.pairs_histograms import multiple_pairs_histograms_coords, full_pairs_histograms_coords
-from fullrmc.Constraints.Collection import ShapeFunction
+from fullrmc.Constraints.Collection import ShapeFunction, _PairsHistogramsConstraint
 
 
-class PairDistributionConstraint(ExperimentalConstraint):
+class PairDistributionConstraint(ExperimentalConstraint, _PairsHistogramsConstraint):
     """
     Controls the total reduced pair distribution function (pdf) of atomic
     configuration noted as G(r). The pair distribution function is directly
@@ -172,6 +172,11 @@ class PairDistributionConstraint(ExperimentalConstraint):
            Otherwise, a tuple of exactly two items where the first is the
            minimum distance or None and the second is the maximum distance
            or None.
+        #. incrementalStandardError (boolean): Whether to update the standard
+           error upon moves from running squared deviations computed only at
+           the points affected by the move histograms change, window function
+           footprint included. Model moments sums are maintained the same way
+           so scale factor adjustment doesn't require full computation.
 
     **NB**: If adjustScaleFactor first item (frequency) is 0, the scale factor
     will remain untouched and the limits minimum and maximum won't be checked.
@@ -195,8 +200,14 @@ class PairDistributionConstraint(ExperimentalConstraint):
     """
     def __init__(self, experimentalData, dataWeights=None, weighting="atomicNumber",
                        atomsWeight=None, scaleFactor=1.0, adjustScaleFactor=(0, 0.8, 1.2),
-                       shapeFuncParams=None, windowFunction=None, limits=None):
+                       shapeFuncParams=None, windowFunction=None, limits=None,
+                       incrementalStandardError=False):
         self.__limits = limits
+        # initialize runtime histograms buffers and caches
+        self._reset_histograms_runtime_caches()
+        # initialize runtime squared deviations cache
+        self._RT_squaredDeviations          = None
+        self._RT_squaredDeviationsAfterMove = None
         # initialize constraint
         super(PairDistributionConstraint, self).__init__(experimentalData=experimentalData, dataWeights=dataWeights, scaleFactor=scaleFactor, adjustScaleFactor=adjustScaleFactor)
         # set elements weighting
@@ -207,6 +218,8 @@ class PairDistributionConstraint(ExperimentalConstraint):
         self.set_window_function(windowFunction)
         # set shape function parameters
         self.set_shape_function_parameters(shapeFuncParams)
+        # set incremental standard error
+        self.set_incremental_standard_error(incrementalStandardError)
 
         # set frame data
         FRAME_DATA = [d for d in self.FRAME_DATA]
@@ -227,6 +240,7 @@ class PairDistributionConstraint(ExperimentalConstraint):
                            '_PairDistributionConstraint__weightingScheme',
                            '_PairDistributionConstraint__windowFunction',
                            '_PairDistributionConstraint__limits',
+                           '_PairDistributionConstraint__incrementalStandardError',
                            '_elementsWeight',
                            '_usedDataWeights',
                            '_shapeFuncParams',
@@ -238,6 +252,16 @@ class PairDistributionConstraint(ExperimentalConstraint):
         object.__setattr__(self, 'FRAME_DATA',   tuple(FRAME_DATA)  )
         object.__setattr__(self, 'RUNTIME_DATA', tuple(RUNTIME_DATA) )
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # constraints saved before runtime caches were introduced must
+        # have them initialized
+        self._set_default_runtime_caches(('_RT_squaredDeviations', '_RT_squaredDeviationsAfterMove'))
+        # constraints saved before incremental standard error was introduced
+        # don't have it in their frame data and compute it from scratch
+        if '_PairDistributionConstraint__incrementalStandardError' not in self.FRAME_DATA:
+            self.__dict__.setdefault('_PairDistributionConstraint__incrementalStandardError', False)
+
     def __set_used_data_weights(self, minDistIdx=None, maxDistIdx=None):
         # set used dataWeights
         if self.dataWeights is None:
@@ -289,8 +313,9 @@ class PairDistributionConstraint(ExperimentalConstraint):
     def _reset_standard_error(self):
         # recompute squared deviation
         if self.data is not None:
-            totalPDF = self.__get_total_Gr(self.data, rho0=self.engine.numberDensity)
-            self.set_standard_error(self.compute_standard_error(modelData = totalPDF))
+            weighted = self._get_data_weighted_histogram(self._get_pairs_weights())
+            totalPDF = self._get_unscaled_total(weighted, rho0=self.engine.numberDensity)
+            self.set_standard_error(self._compute_and_cache_standard_error(weighted, totalPDF))
 
     def _runtime_initialize(self):
         if self._shapeFuncParams is None:
@@ -393,6 +418,11 @@ class PairDistributionConstraint(ExperimentalConstraint):
         """ Shape function data array."""
         return self._shapeArray
 
+    @property
+    def incrementalStandardError(self):
+        """ Whether standard error is incrementally updated upon moves."""
+        return self.__incrementalStandardError
+
     @property
     def shapeUpdateFreq(self):
         """Shape function update frequency."""
@@ -596,6 +626,25 @@ class PairDistributionConstraint(ExperimentalConstraint):
         # dump to repository
         self._dump_to_repository({'_PairDistributionConstraint__windowFunction': self.__windowFunction})
 
+    def set_incremental_standard_error(self, incrementalStandardError):
+        """
+        Set whether standard error is incrementally updated upon moves.
+
+        :Parameters:
+            #. incrementalStandardError (boolean): If True, the model total
+               and its squared deviations from the experimental data are kept
+               at runtime and only the points affected by a move histograms
+               change, window function footprint included, are recomputed.
+               Model moments sums are maintained the same way so scale
+               factor adjustment doesn't require full computation.
+        """
+        assert isinstance(incrementalStandardError, bool), LOGGER.error("incrementalStandardError must be boolean")
+        self.__incrementalStandardError = incrementalStandardError
+        self._RT_squaredDeviations          = None
+        self._RT_squaredDeviationsAfterMove = None
+        # dump to repository
+        self._dump_to_repository({'_PairDistributionConstraint__incrementalStandardError': self.__incrementalStandardError})
+
     def set_experimental_data(self, experimentalData):
         """
         Set constraint's experimental data.
@@ -770,62 +819,211 @@ class PairDistributionConstraint(ExperimentalConstraint):
             #. standardError (number): The calculated constraint's
                standardError.
         """
+        return np.add.reduce( self._get_squared_deviations(modelData) )
+
+    def _get_squared_deviations(self, modelData, points=slice(None)):
+        """ Get weighted squared deviations between model data and the
+        experimental one at the given points."""
         # compute difference
-        diff = self.__experimentalPDF-modelData
-        # return squared deviation
+        diff = self.__experimentalPDF[points]-modelData
+        # return squared deviations
         if self._usedDataWeights is None:
-            return np.add.reduce((diff)**2)
+            return diff**2
         else:
-            return np.add.reduce(self._usedDataWeights*((diff)**2))
+            return self._usedDataWeights[points]*(diff**2)
 
-    def __get_total_Gr(self, data, rho0):
-        """ This method is created just to speed up the computation
-        of the total gr upon fitting.
-        """
-        # update shape function if needed
-        #import time
-        #startTime = time.clock()
-        Gr = np.zeros(self.__histogramSize, dtype=FLOAT_TYPE)
-        for pair in self.__elementsPairs:
-            # get weighting scheme
-            wij = self.__weightingScheme.get(pair[0]+"-"+pair[1], None)
-            if wij is None:
-                wij = self.__weightingScheme[pair[1]+"-"+pair[0]]
-            # get number of atoms per element
-            ni = self.engine.numberOfAtomsPerElement[pair[0]]
-            nj = self.engine.numberOfAtomsPerElement[pair[1]]
-            # get index of element
-            idi = self.engine.elements.index(pair[0])
-            idj = self.engine.elements.index(pair[1])
-            # get Nij
-            if idi == idj:
-                Nij = ni*(ni-1)/2.0
-                Dij = FLOAT_TYPE( Nij/self.engine.volume )
-                nij = data["intra"][idi,idj,:]+data["inter"][idi,idj,:]
-                Gr += wij*nij/Dij
-            else:
-                Nij = ni*nj
-                Dij = FLOAT_TYPE( Nij/self.engine.volume )
-                nij = data["intra"][idi,idj,:]+data["intra"][idj,idi,:] + data["inter"][idi,idj,:]+data["inter"][idj,idi,:]
-                Gr += wij*nij/Dij
+    def _get_total_delta(self, deltaWeighted, start, end):
+        """ Get unscaled total G(r) change between start and end points
+        given weighted total histogram change over the same points."""
+        rho0 = self.engine.numberDensity
+        return (4.*PI*self.__shellCenters[start:end]*rho0)*(deltaWeighted/self.__shellVolumes[start:end])
+
+    def _get_unscaled_total(self, weighted, rho0):
+        """ Get unscaled and not convolved total G(r) given weighted
+        total histogram."""
         # Divide by shells volume
-        Gr /= self.shellVolumes
+        Gr = (weighted/self.shellVolumes).astype(FLOAT_TYPE)
         # compute total G(r)
-        #rho0 = self.engine.numberDensity #(self.engine.numberOfAtoms/self.engine.volume).astype(FLOAT_TYPE)
-        Gr   = (4.*PI*self.__shellCenters*rho0)*( Gr-1)
+        Gr = (4.*PI*self.__shellCenters*rho0)*( Gr-1)
         # remove shape function
         if self._shapeArray is not None:
             Gr -= self._shapeArray
+        return Gr
+
+    def _get_model_total(self, total):
+        """ Get model total by multiplying unscaled total by the adjusted
+        scale factor and convolving it with the window function."""
         # Multiply by scale factor
-        self._fittedScaleFactor = self.get_adjusted_scale_factor(self.experimentalPDF, Gr, self._usedDataWeights)
+        self._fittedScaleFactor = self.get_adjusted_scale_factor(self.experimentalPDF, total, self._usedDataWeights)
         if self._fittedScaleFactor != 1:
-            Gr *= FLOAT_TYPE(self._fittedScaleFactor)
+            total = total*FLOAT_TYPE(self._fittedScaleFactor)
         # convolve total with window function
         if self.__windowFunction is not None:
-            Gr = np.convolve(Gr, self.__windowFunction, 'same')
-        #t = time.clock()-startTime
-        #print "%.7f(s) -->  %.7f(Ms)"%(t, 1000000*t)
-        return Gr
+            total = self._get_window_convolution().convolve(total)
+        return total
+
+    def _get_weighted_sum(self, values, points=slice(None)):
+        """ Get sum of values weighted by used data weights at the
+        given points."""
+        if self._usedDataWeights is None:
+            return np.add.reduce(values)
+        return np.add.reduce(self._usedDataWeights[points]*values)
+
+    def _compute_and_cache_standard_error(self, weighted, total, afterMove=False):
+        """ Compute standard error of the given unscaled total and keep its
+        model, squared deviations and moments sums when incremental standard
+        error is set. weighted is the weighted total histogram total is
+        computed from."""
+        deviations    = np.array(self._get_squared_deviations(self._get_model_total(total)), dtype=np.float64)
+        standardError = np.add.reduce(deviations)
+        if not self.__incrementalStandardError:
+            return standardError
+        experimental = self.__experimentalPDF
+        total = np.array(total, dtype=np.float64)
+        model = total
+        if self.__windowFunction is not None:
+            model = self._get_window_convolution().convolve(total)
+        cache = {'weighted'           :weighted,
+                 'scaleFactor'        :self._fittedScaleFactor,
+                 'rho0'               :self.engine.numberDensity,
+                 'shapeArray'         :self._shapeArray,
+                 'windowFunction'     :self.__windowFunction,
+                 'dataWeights'        :self._usedDataWeights,
+                 'experimental'       :experimental,
+                 'total'              :total,
+                 'model'              :model,
+                 'deviations'         :deviations,
+                 'standardError'      :standardError,
+                 'totalExperimental'  :self._get_weighted_sum(total*experimental),
+                 'totalSquared'       :np.add.reduce(total**2),
+                 'modelExperimental'  :self._get_weighted_sum(model*experimental),
+                 'modelSquared'       :self._get_weighted_sum(model**2),
+                 'experimentalSquared':self._get_weighted_sum(np.array(experimental, dtype=np.float64)**2)}
+        if afterMove:
+            self._RT_squaredDeviationsAfterMove = cache
+        else:
+            self._RT_squaredDeviations          = cache
+            self._RT_squaredDeviationsAfterMove = None
+        return standardError
+
+    def _get_squared_deviations_cache(self):
+        """ Get squared deviations cache if it's up to date with
+        constraint's data and parameters, None otherwise."""
+        cache = self._RT_squaredDeviations
+        if cache is None or self._RT_weightedHistogram is None:
+            return None
+        if cache['weighted'] is not self._RT_weightedHistogram[3]:
+            return None
+        if cache['scaleFactor'] != self.scaleFactor or cache['rho0'] != self.engine.numberDensity:
+            return None
+        if cache['shapeArray'] is not self._shapeArray or cache['windowFunction'] is not self.__windowFunction:
+            return None
+        if cache['dataWeights'] is not self._usedDataWeights or cache['experimental'] is not self.__experimentalPDF:
+            return None
+        return cache
+
+    def _compute_after_move_standard_error(self, weighted):
+        """ Compute after move standard error given after move weighted
+        total histogram. When incremental standard error is set and
+        constraint's cache is up to date, total, model and moments sums
+        are updated at the points affected by the move only. Scale factor
+        is then fitted from the moments sums and standard error is computed
+        from the running squared deviations, or from the moments sums when
+        scale factor changes."""
+        cache = None
+        if self.__incrementalStandardError:
+            cache = self._get_squared_deviations_cache()
+        if cache is None:
+            total = self._get_unscaled_total(weighted, self.engine.numberDensity)
+            return self._compute_and_cache_standard_error(weighted, total, afterMove=True)
+        experimental = self.__experimentalPDF
+        bins = self._RT_weightedHistogramAfterMove[2]
+        if len(bins):
+            start, end = bins[0], bins[-1]+1
+        else:
+            start, end = 0, 0
+        # update total and its moments at changed bins
+        deltaTotal = self._get_total_delta(weighted[start:end]-cache['weighted'][start:end], start, end)
+        total      = cache['total'][start:end] + deltaTotal
+        totalExperimental = cache['totalExperimental'] + self._get_weighted_sum(deltaTotal*experimental[start:end], slice(start,end))
+        totalSquared      = cache['totalSquared'] + np.add.reduce(total**2-cache['total'][start:end]**2)
+        # spread total change over window function footprint
+        deltaModel = deltaTotal
+        if self.__windowFunction is not None and end>start:
+            size  = len(self.__windowFunction)
+            first = max(start-size, 0)
+            last  = min(end+size, len(weighted))
+            if last-first < size:
+                total = self._get_unscaled_total(weighted, self.engine.numberDensity)
+                return self._compute_and_cache_standard_error(weighted, total, afterMove=True)
+            padded = np.zeros(last-first, dtype=np.float64)
+            padded[start-first:end-first] = deltaTotal
+            deltaModel = self._get_window_convolution().convolve(padded)
+            start, end = first, last
+        # update model and its moments at affected points
+        points = slice(start,end)
+        model  = cache['model'][points] + deltaModel
+        modelExperimental = cache['modelExperimental'] + self._get_weighted_sum(deltaModel*experimental[points], points)
+        modelSquared      = cache['modelSquared'] + self._get_weighted_sum(model**2-cache['model'][points]**2, points)
+        # fit scale factor from moments sums
+        SF = cache['scaleFactor']
+        if self._is_scale_factor_adjustment_due():
+            SF = self._fit_scale_factor_from_moments(totalExperimental, totalSquared)
+        self._fittedScaleFactor = SF
+        # compute standard error
+        if SF == cache['scaleFactor'] and cache['deviations'] is not None:
+            deviations    = self._get_squared_deviations(SF*model, points)
+            standardError = cache['standardError'] - np.add.reduce(cache['deviations'][points]) + np.add.reduce(deviations)
+        else:
+            deviations    = None
+            standardError = cache['experimentalSquared'] - 2.*SF*modelExperimental + SF*SF*modelSquared
+        self._RT_squaredDeviationsAfterMove = (weighted, bins, total, points, model, deviations, SF, standardError,
+                                               totalExperimental, totalSquared, modelExperimental, modelSquared)
+        return standardError
+
+    def _accept_after_move_squared_deviations(self):
+        """ Set squared deviations cache to the after move one.
+        Must be called upon accepting a move once weighted total
+        histogram cache is updated."""
+        afterMove = self._RT_squaredDeviationsAfterMove
+        self._RT_squaredDeviationsAfterMove = None
+        if afterMove is None:
+            return
+        if isinstance(afterMove, dict):
+            self._RT_squaredDeviations = afterMove
+            return
+        weighted, bins, total, points, model, deviations, SF, standardError, \
+        totalExperimental, totalSquared, modelExperimental, modelSquared = afterMove
+        cache = self._RT_squaredDeviations
+        if len(bins):
+            cache['total'][bins[0]:bins[-1]+1] = total
+            cache['model'][points]             = model
+        if deviations is not None:
+            cache['deviations'][points] = deviations
+        else:
+            # scale factor changed and standard error was computed from
+            # moments sums. Squared deviations are rebuilt at all points
+            # with the new scale factor and standard error is re-anchored
+            # to their sum so that moments sums error doesn't accumulate
+            deviations    = np.array(self._get_squared_deviations(SF*cache['model']), dtype=np.float64)
+            standardError = np.add.reduce(deviations)
+            cache['deviations'] = deviations
+        cache['weighted']          = weighted
+        cache['scaleFactor']       = SF
+        cache['standardError']     = standardError
+        cache['totalExperimental'] = totalExperimental
+        cache['totalSquared']      = totalSquared
+        cache['modelExperimental'] = modelExperimental
+        cache['modelSquared']      = modelSquared
+
+    def __get_total_Gr(self, data, rho0, weighted=None):
+        """ This method is created just to speed up the computation
+        of the total gr upon fitting. weighted total histogram can be
+        given when already computed.
+        """
+        if weighted is None:
+            weighted = np.tensordot(self._get_pairs_weights(), data["intra"]+data["inter"], axes=([0,1],[0,1]))
+        return self._get_model_total( self._get_unscaled_total(weighted, rho0) )
 
     def _get_constraint_value(self, data):
         # http://erice2011.docking.org/upload/Other/Billinge_PDF/03-ReadingMaterial/BillingePDF2011.pdf    page 6
@@ -883,7 +1081,7 @@ class PairDistributionConstraint(ExperimentalConstraint):
             output["pdf_total"] *= self.scaleFactor
         # convolve total with window function
         if self.__windowFunction is not None:
-            output["pdf"] = np.convolve(output["pdf_total"], self.__windowFunction, 'same')
+            output["pdf"] = self._get_window_convolution().convolve(output["pdf_total"])
         else:
             output["pdf"] = output["pdf_total"]
         #t = time.clock()-startTime
@@ -931,14 +1129,16 @@ class PairDistributionConstraint(ExperimentalConstraint):
                                                     maxDistance      = self.__maximumDistance,
                                                     histSize         = self.__histogramSize,
                                                     bin              = self.__bin,
-                                                    ncores           = self.engine._runtime_ncores )
+                                                    ncores           = self.engine._runtime_ncores,
+                                                    useCells         = True )
         # update data
         self.set_data({"intra":intra, "inter":inter})
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
         # set standardError
-        totalPDF = self.__get_total_Gr(self.data, rho0=self.engine.numberDensity)
-        self.set_standard_error(self.compute_standard_error(modelData = totalPDF))
+        weighted = self._get_data_weighted_histogram(self._get_pairs_weights())
+        totalPDF = self._get_unscaled_total(weighted, rho0=self.engine.numberDensity)
+        self.set_standard_error(self._compute_and_cache_standard_error(weighted, totalPDF))
         # set original data
         if self.originalData is None:
             self._set_original_data(self.data)
@@ -952,32 +1152,40 @@ class PairDistributionConstraint(ExperimentalConstraint):
             #. relativeIndexes (numpy.ndarray): Group atoms relative index
                the move will be applied to.
         """
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.__minimumDistance,
-                                                          maxDistance      = self.__maximumDistance,
-                                                          histSize         = self.__histogramSize,
-                                                          bin              = self.__bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores)
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.__minimumDistance,
-                                                      maxDistance      = self.__maximumDistance,
-                                                      histSize         = self.__histogramSize,
-                                                      bin              = self.__bin,
-                                                      ncores           = self.engine._runtime_ncores )
+        intraM,interM = self._get_histograms_buffers('beforeMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.__minimumDistance,
+                                          maxDistance      = self.__maximumDistance,
+                                          histSize         = self.__histogramSize,
+                                          bin              = self.__bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.__minimumDistance,
+                                      maxDistance      = self.__maximumDistance,
+                                      histSize         = self.__histogramSize,
+                                      bin              = self.__bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
         # set active atoms data
-        self.set_active_atoms_data_before_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        self.set_active_atoms_data_before_move( {"intra":intraM, "inter":interM} )
         self.set_active_atoms_data_after_move(None)
 
     def compute_after_move(self, realIndexes, relativeIndexes, movedBoxCoordinates):
@@ -994,39 +1202,45 @@ class PairDistributionConstraint(ExperimentalConstraint):
         boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
         self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
         # calculate pair distribution function
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.__minimumDistance,
-                                                          maxDistance      = self.__maximumDistance,
-                                                          histSize         = self.__histogramSize,
-                                                          bin              = self.__bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores )
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.__minimumDistance,
-                                                      maxDistance      = self.__maximumDistance,
-                                                      histSize         = self.__histogramSize,
-                                                      bin              = self.__bin,
-                                                      ncores           = self.engine._runtime_ncores )
+        intraM,interM = self._get_histograms_buffers('afterMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.__minimumDistance,
+                                          maxDistance      = self.__maximumDistance,
+                                          histSize         = self.__histogramSize,
+                                          bin              = self.__bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.__minimumDistance,
+                                      maxDistance      = self.__maximumDistance,
+                                      histSize         = self.__histogramSize,
+                                      bin              = self.__bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
         # set ative atoms data
-        self.set_active_atoms_data_after_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        self.set_active_atoms_data_after_move( {"intra":intraM, "inter":interM} )
         # reset coordinates
         self.engine.boxCoordinates[relativeIndexes] = boxData
-        # compute and set standardError after move
-        dataIntra = self.data["intra"]-self.activeAtomsDataBeforeMove["intra"]+self.activeAtomsDataAfterMove["intra"]
-        dataInter = self.data["inter"]-self.activeAtomsDataBeforeMove["inter"]+self.activeAtomsDataAfterMove["inter"]
-        totalPDF  = self.__get_total_Gr({"intra":dataIntra, "inter":dataInter}, rho0=self.engine.numberDensity)
-        self.set_after_move_standard_error( self.compute_standard_error(modelData = totalPDF) )
+        # compute and set standardError after move updating changed bins only
+        weighted = self._get_after_move_weighted_histogram()
+        self.set_after_move_standard_error( self._compute_after_move_standard_error(weighted) )
 
     def accept_move(self, realIndexes, relativeIndexes):
         """
@@ -1036,10 +1250,9 @@ class PairDistributionConstraint(ExperimentalConstraint):
             #. realIndexes (numpy.ndarray): Not used here.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        dataIntra = self.data["intra"]-self.activeAtomsDataBeforeMove["intra"]+self.activeAtomsDataAfterMove["intra"]
-        dataInter = self.data["inter"]-self.activeAtomsDataBeforeMove["inter"]+self.activeAtomsDataAfterMove["inter"]
-        # change permanently _data
-        self.set_data( {"intra":dataIntra, "inter":dataInter} )
+        # change permanently _data at the bins changed by the move
+        self._accept_after_move_histograms()
+        self._accept_after_move_squared_deviations()
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
@@ -1060,6 +1273,8 @@ class PairDistributionConstraint(ExperimentalConstraint):
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
+        self._RT_weightedHistogramAfterMove = None
+        self._RT_squaredDeviationsAfterMove = None
         # update standardError
         self.set_after_move_standard_error( None )
 
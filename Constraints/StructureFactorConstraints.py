@@ -18,8 +18,9 @@ from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, PRECISION, LOGGER
 from fullrmc.Core.Collection import is_number, is_integer, get_path, reset_if_collected_out_of_date, get_real_elements_weight
 from fullrmc.Core.Constraint import Constraint, ExperimentalConstraint
 from fullrmc.Core.pairs_histograms import multiple_pairs_histograms_coords, full_pairs_histograms_coords
+from fullrmc.Constraints.Collection import _PairsHistogramsConstraint
 
-class StructureFactorConstraint(ExperimentalConstraint):
+class StructureFactorConstraint(ExperimentalConstraint, _PairsHistogramsConstraint):
     """
     Controls the Structure Factor noted as S(Q) and also called
     total-scattering structure function or Static Structure Factor.
@@ -130,6 +131,9 @@ class StructureFactorConstraint(ExperimentalConstraint):
            Otherwise, a tuple of exactly two items where the first is the
            minimum distance or None and the second is the maximum distance
            or None.
+        #. incrementalStandardError (boolean): Whether to update the unscaled
+           total S(q) upon moves from the G(r) to S(q) transformation of the
+           changed histogram bins only instead of transforming the whole G(r).
 
     **NB**: If adjustScaleFactor first item (frequency) is 0, the scale factor
     will remain untouched and the limits minimum and maximum won't be checked.
@@ -155,9 +159,14 @@ class StructureFactorConstraint(ExperimentalConstraint):
                        weighting="atomicNumber", atomsWeight=None,
                        rmin=None, rmax=None, dr=None,
                        scaleFactor=1.0, adjustScaleFactor=(0, 0.8, 1.2),
-                       windowFunction=None, limits=None):
+                       windowFunction=None, limits=None, incrementalStandardError=False):
         # initialize variables
         self.__limits              = limits
+        # initialize runtime histograms buffers and caches
+        self._reset_histograms_runtime_caches()
+        # initialize runtime unscaled total S(q) cache
+        self._RT_unscaledTotal              = None
+        self._RT_unscaledTotalAfterMove     = None
         self.__experimentalQValues = None
         self.__experimentalSF      = None
         self.__rmin                = None
@@ -183,6 +192,8 @@ class StructureFactorConstraint(ExperimentalConstraint):
         self.set_rmin(rmin)
         self.set_rmax(rmax)
         self.set_dr(dr)
+        # set incremental standard error
+        self.set_incremental_standard_error(incrementalStandardError)
 
         # set frame data
         FRAME_DATA = [d for d in self.FRAME_DATA]
@@ -205,12 +216,23 @@ class StructureFactorConstraint(ExperimentalConstraint):
                            '_StructureFactorConstraint__shellVolumes',
                            '_StructureFactorConstraint__Gr2SqMatrix',
                            '_StructureFactorConstraint__windowFunction',
+                           '_StructureFactorConstraint__incrementalStandardError',
                            '_elementsWeight',] )
         RUNTIME_DATA = [d for d in self.RUNTIME_DATA]
         RUNTIME_DATA.extend( [] )
         object.__setattr__(self, 'FRAME_DATA',   tuple(FRAME_DATA)   )
         object.__setattr__(self, 'RUNTIME_DATA', tuple(RUNTIME_DATA) )
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # constraints saved before runtime caches were introduced must
+        # have them initialized
+        self._set_default_runtime_caches(('_RT_unscaledTotal', '_RT_unscaledTotalAfterMove'))
+        # constraints saved before incremental standard error was introduced
+        # don't have it in their frame data and compute it from scratch
+        if '_StructureFactorConstraint__incrementalStandardError' not in self.FRAME_DATA:
+            self.__dict__.setdefault('_StructureFactorConstraint__incrementalStandardError', False)
+
     #def __getstate__(self):
     #    # make sure that __Gr2SqMatrix is not pickled but saved to the disk as None
     #    state = super(StructureFactorConstraint, self).__getstate__()
@@ -407,6 +429,11 @@ class StructureFactorConstraint(ExperimentalConstraint):
         """ G(r) to S(q) transformation matrix."""
         return self.__Gr2SqMatrix
 
+    @property
+    def incrementalStandardError(self):
+        """ Whether unscaled total S(q) is incrementally updated upon moves."""
+        return self.__incrementalStandardError
+
     def listen(self, message, argument=None):
         """
         Listens to any message sent from the Broadcaster.
@@ -585,6 +612,24 @@ class StructureFactorConstraint(ExperimentalConstraint):
         # dump to repository
         self._dump_to_repository({'_StructureFactorConstraint__windowFunction': self.__windowFunction})
 
+    def set_incremental_standard_error(self, incrementalStandardError):
+        """
+        Set whether unscaled total S(q) is incrementally updated upon moves.
+
+        :Parameters:
+            #. incrementalStandardError (boolean): If True, the unscaled
+               total S(q) is kept at runtime and updated upon moves from the
+               G(r) to S(q) transformation of the changed histogram bins only.
+               Scale factor fitting, window function convolution and standard
+               error are computed from the updated S(q) as usual.
+        """
+        assert isinstance(incrementalStandardError, bool), LOGGER.error("incrementalStandardError must be boolean")
+        self.__incrementalStandardError = incrementalStandardError
+        self._RT_unscaledTotal          = None
+        self._RT_unscaledTotalAfterMove = None
+        # dump to repository
+        self._dump_to_repository({'_StructureFactorConstraint__incrementalStandardError': self.__incrementalStandardError})
+
     def set_experimental_data(self, experimentalData):
         """
         Set constraint's experimental data.
@@ -749,47 +794,57 @@ class StructureFactorConstraint(ExperimentalConstraint):
     def _get_Sq_from_Gr(self, Gr):
         return np.sum(Gr.reshape((-1,1))*self.__Gr2SqMatrix, axis=0)+1
 
-    def __get_total_Sq(self, data, rho0):
-        """This method is created just to speed up the computation of
-        the total Sq upon fitting."""
-        Gr = np.zeros(self.__histogramSize, dtype=FLOAT_TYPE)
-        for pair in self.__elementsPairs:
-            # get weighting scheme
-            wij = self.__weightingScheme.get(pair[0]+"-"+pair[1], None)
-            if wij is None:
-                wij = self.__weightingScheme[pair[1]+"-"+pair[0]]
-            # get number of atoms per element
-            ni = self.engine.numberOfAtomsPerElement[pair[0]]
-            nj = self.engine.numberOfAtomsPerElement[pair[1]]
-            # get index of element
-            idi = self.engine.elements.index(pair[0])
-            idj = self.engine.elements.index(pair[1])
-            # get Nij
-            if idi == idj:
-                Nij = ni*(ni-1)/2.0
-                Dij = Nij/self.engine.volume
-                nij = data["intra"][idi,idj,:]+data["inter"][idi,idj,:]
-                Gr += wij*nij/Dij
-            else:
-                Nij = ni*nj
-                Dij = Nij/self.engine.volume
-                nij = data["intra"][idi,idj,:]+data["intra"][idj,idi,:] + data["inter"][idi,idj,:]+data["inter"][idj,idi,:]
-                Gr += wij*nij/Dij
+    def __get_unscaled_Sq(self, weighted, rho0):
+        """ Get unscaled and not convolved total S(q) given weighted
+        total histogram."""
         # Devide by shells volume
-        Gr /= self.shellVolumes
+        Gr = (weighted/self.shellVolumes).astype(FLOAT_TYPE)
         # compute total G(r)
-        #rho0 = (self.engine.numberOfAtoms/self.engine.volume).astype(FLOAT_TYPE)
-        Gr   = (FLOAT_TYPE(4.)*PI*self.__shellCenters*rho0)*(Gr-1)
+        Gr = (FLOAT_TYPE(4.)*PI*self.__shellCenters*rho0)*(Gr-1)
         # Compute S(q) from G(r)
-        Sq = self._get_Sq_from_Gr(Gr)
+        return self._get_Sq_from_Gr(Gr)
+
+    def __get_model_Sq(self, Sq):
+        """ Get model total S(q) by multiplying unscaled total S(q) by the
+        adjusted scale factor and convolving it with the window function."""
         # Multiply by scale factor
         self._fittedScaleFactor = self.get_adjusted_scale_factor(self.__experimentalSF, Sq, self._usedDataWeights)
-        Sq *= self._fittedScaleFactor
+        Sq = Sq*self._fittedScaleFactor
         # convolve total with window function
         if self.__windowFunction is not None:
-            Sq = np.convolve(Sq, self.__windowFunction, 'same')
+            Sq = self._get_window_convolution().convolve(Sq)
+        return Sq
+
+    def __get_cached_unscaled_Sq(self, weighted, afterMove=False):
+        """ Get unscaled total S(q) keeping it when incremental standard
+        error is set. After move, it's updated from constraint's cached one
+        by transforming the changed histogram bins only."""
+        rho0 = self.engine.numberDensity
+        if not self.__incrementalStandardError:
+            return self.__get_unscaled_Sq(weighted, rho0)
+        cache = self._RT_unscaledTotal
+        if afterMove and cache is not None and self._RT_weightedHistogram is not None and \
+           cache[0] is self._RT_weightedHistogram[3] and cache[1] == rho0 and cache[2] is self.__Gr2SqMatrix:
+            bins    = self._RT_weightedHistogramAfterMove[2]
+            deltaGr = (FLOAT_TYPE(4.)*PI*self.__shellCenters[bins]*rho0)*((weighted[bins]-cache[0][bins])/self.shellVolumes[bins])
+            Sq      = cache[3] + np.dot(deltaGr, self.__Gr2SqMatrix[bins])
+        else:
+            Sq = np.array(self.__get_unscaled_Sq(weighted, rho0), dtype=np.float64)
+        if afterMove:
+            self._RT_unscaledTotalAfterMove = (weighted, rho0, self.__Gr2SqMatrix, Sq)
+        else:
+            self._RT_unscaledTotal          = (weighted, rho0, self.__Gr2SqMatrix, Sq)
+            self._RT_unscaledTotalAfterMove = None
         return Sq
 
+    def __get_total_Sq(self, data, rho0, weighted=None):
+        """This method is created just to speed up the computation of
+        the total Sq upon fitting. weighted total histogram can be
+        given when already computed."""
+        if weighted is None:
+            weighted = np.tensordot(self._get_pairs_weights(), data["intra"]+data["inter"], axes=([0,1],[0,1]))
+        return self.__get_model_Sq( self.__get_unscaled_Sq(weighted, rho0) )
+
     def _get_constraint_value(self, data):
         # http://erice2011.docking.org/upload/Other/Billinge_PDF/03-ReadingMaterial/BillingePDF2011.pdf    page 6
         #import time
@@ -843,7 +898,7 @@ class StructureFactorConstraint(ExperimentalConstraint):
         output["sf_total"] = self.scaleFactor * Sq
         # convolve total with window function
         if self.__windowFunction is not None:
-            output["sf"] = np.convolve(output["sf_total"], self.__windowFunction, 'same').astype(FLOAT_TYPE)
+            output["sf"] = self._get_window_convolution().convolve(output["sf_total"]).astype(FLOAT_TYPE)
         else:
             output["sf"] = output["sf_total"]
         return output
@@ -889,14 +944,16 @@ class StructureFactorConstraint(ExperimentalConstraint):
                                                     maxDistance      = self.__maximumDistance,
                                                     histSize         = self.__histogramSize,
                                                     bin              = self.__bin,
-                                                    ncores           = self.engine._runtime_ncores  )
+                                                    ncores           = self.engine._runtime_ncores,
+                                                    useCells         = True)
         # update data
         self.set_data({"intra":intra, "inter":inter})
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
         # set standardError
-        totalPDF = self.__get_total_Sq(self.data, rho0=self.engine.numberDensity)
-        self.set_standard_error(self.compute_standard_error(modelData = totalPDF))
+        weighted = self._get_data_weighted_histogram(self._get_pairs_weights())
+        totalSQ  = self.__get_model_Sq( self.__get_cached_unscaled_Sq(weighted) )
+        self.set_standard_error(self.compute_standard_error(modelData = totalSQ))
         # set original data
         if self.originalData is None:
             self._set_original_data(self.data)
@@ -910,31 +967,39 @@ class StructureFactorConstraint(ExperimentalConstraint):
             #. relativeIndexes (numpy.ndarray): Group atoms relative index
                the move will be applied to.
         """
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.__minimumDistance,
-                                                          maxDistance      = self.__maximumDistance,
-                                                          histSize         = self.__histogramSize,
-                                                          bin              = self.__bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores )
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.__minimumDistance,
-                                                      maxDistance      = self.__maximumDistance,
-                                                      histSize         = self.__histogramSize,
-                                                      bin              = self.__bin,
-                                                      ncores           = self.engine._runtime_ncores )
-        self.set_active_atoms_data_before_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        intraM,interM = self._get_histograms_buffers('beforeMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.__minimumDistance,
+                                          maxDistance      = self.__maximumDistance,
+                                          histSize         = self.__histogramSize,
+                                          bin              = self.__bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.__minimumDistance,
+                                      maxDistance      = self.__maximumDistance,
+                                      histSize         = self.__histogramSize,
+                                      bin              = self.__bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
+        self.set_active_atoms_data_before_move( {"intra":intraM, "inter":interM} )
         self.set_active_atoms_data_after_move(None)
 
     def compute_after_move(self, realIndexes, relativeIndexes, movedBoxCoordinates):
@@ -951,38 +1016,45 @@ class StructureFactorConstraint(ExperimentalConstraint):
         boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
         self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
         # calculate pair distribution function
-        intraM,interM = multiple_pairs_histograms_coords( indexes          = relativeIndexes,
-                                                          boxCoords        = self.engine.boxCoordinates,
-                                                          basis            = self.engine.basisVectors,
-                                                          isPBC            = self.engine.isPBC,
-                                                          moleculeIndex    = self.engine.moleculesIndex,
-                                                          elementIndex     = self.engine.elementsIndex,
-                                                          numberOfElements = self.engine.numberOfElements,
-                                                          minDistance      = self.__minimumDistance,
-                                                          maxDistance      = self.__maximumDistance,
-                                                          histSize         = self.__histogramSize,
-                                                          bin              = self.__bin,
-                                                          allAtoms         = True,
-                                                          ncores           = self.engine._runtime_ncores )
-        intraF,interF = full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
-                                                      basis            = self.engine.basisVectors,
-                                                      isPBC            = self.engine.isPBC,
-                                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
-                                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
-                                                      numberOfElements = self.engine.numberOfElements,
-                                                      minDistance      = self.__minimumDistance,
-                                                      maxDistance      = self.__maximumDistance,
-                                                      histSize         = self.__histogramSize,
-                                                      bin              = self.__bin,
-                                                      ncores           = self.engine._runtime_ncores  )
+        intraM,interM = self._get_histograms_buffers('afterMove')
+        intraF,interF = self._get_histograms_buffers('group')
+        multiple_pairs_histograms_coords( indexes          = relativeIndexes,
+                                          boxCoords        = self.engine.boxCoordinates,
+                                          basis            = self.engine.basisVectors,
+                                          isPBC            = self.engine.isPBC,
+                                          moleculeIndex    = self.engine.moleculesIndex,
+                                          elementIndex     = self.engine.elementsIndex,
+                                          numberOfElements = self.engine.numberOfElements,
+                                          minDistance      = self.__minimumDistance,
+                                          maxDistance      = self.__maximumDistance,
+                                          histSize         = self.__histogramSize,
+                                          bin              = self.__bin,
+                                          allAtoms         = True,
+                                          ncores           = self.engine._runtime_ncores,
+                                          hintra           = intraM,
+                                          hinter           = interM )
+        full_pairs_histograms_coords( boxCoords        = self.engine.boxCoordinates[relativeIndexes],
+                                      basis            = self.engine.basisVectors,
+                                      isPBC            = self.engine.isPBC,
+                                      moleculeIndex    = self.engine.moleculesIndex[relativeIndexes],
+                                      elementIndex     = self.engine.elementsIndex[relativeIndexes],
+                                      numberOfElements = self.engine.numberOfElements,
+                                      minDistance      = self.__minimumDistance,
+                                      maxDistance      = self.__maximumDistance,
+                                      histSize         = self.__histogramSize,
+                                      bin              = self.__bin,
+                                      ncores           = self.engine._runtime_ncores,
+                                      hintra           = intraF,
+                                      hinter           = interF )
+        intraM -= intraF
+        interM -= interF
         # set active atoms data
-        self.set_active_atoms_data_after_move( {"intra":intraM-intraF, "inter":interM-interF} )
+        self.set_active_atoms_data_after_move( {"intra":intraM, "inter":interM} )
         # reset coordinates
         self.engine.boxCoordinates[relativeIndexes] = boxData
-        # compute standardError after move
-        dataIntra = self.data["intra"]-self.activeAtomsDataBeforeMove["intra"]+self.activeAtomsDataAfterMove["intra"]
-        dataInter = self.data["inter"]-self.activeAtomsDataBeforeMove["inter"]+self.activeAtomsDataAfterMove["inter"]
-        totalSQ = self.__get_total_Sq({"intra":dataIntra, "inter":dataInter}, rho0=self.engine.numberDensity)
+        # compute standardError after move updating changed bins only
+        weighted = self._get_after_move_weighted_histogram()
+        totalSQ  = self.__get_model_Sq( self.__get_cached_unscaled_Sq(weighted, afterMove=True) )
         self.set_after_move_standard_error( self.compute_standard_error(modelData = totalSQ) )
 
     def accept_move(self, realIndexes, relativeIndexes):
@@ -993,10 +1065,11 @@ class StructureFactorConstraint(ExperimentalConstraint):
             #. realIndexes (numpy.ndarray): Not used here.
             #. relativeIndexes (numpy.ndarray): Not used here.
         """
-        dataIntra = self.data["intra"]-self.activeAtomsDataBeforeMove["intra"]+self.activeAtomsDataAfterMove["intra"]
-        dataInter = self.data["inter"]-self.activeAtomsDataBeforeMove["inter"]+self.activeAtomsDataAfterMove["inter"]
-        # change permanently _data
-        self.set_data( {"intra":dataIntra, "inter":dataInter} )
+        # change permanently _data at the bins changed by the move
+        self._accept_after_move_histograms()
+        if self._RT_unscaledTotalAfterMove is not None:
+            self._RT_unscaledTotal          = self._RT_unscaledTotalAfterMove
+            self._RT_unscaledTotalAfterMove = None
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
@@ -1017,6 +1090,8 @@ class StructureFactorConstraint(ExperimentalConstraint):
         # reset activeAtoms data
         self.set_active_atoms_data_before_move(None)
         self.set_active_atoms_data_after_move(None)
+        self._RT_weightedHistogramAfterMove = None
+        self._RT_unscaledTotalAfterMove     = None
         # update standardError
         self.set_after_move_standard_error( None )
 
@@ -6,12 +6,13 @@ import os
 import sys
 import time
 import uuid
+import zlib
+import bz2
 from random import random  as generate_random_float   # generates a random float number between 0 and 1
 from random import randint as generate_random_integer # generates a random integer number between given lower and upper limits
 
 # external libraries imports
 import numpy as np
-from pdbParser.Utilities.Database import is_element_property, get_element_property
 
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, PI, PRECISION, LOGGER
@@ -32,6 +33,7 @@ def get_real_elements_weight(elements, weightsDict, weighting):
         #. elementsWeight (dict): Elements weights got from weightsDict
            and completed using weighting scheme,
     """
+    from pdbParser.Utilities.Database import get_element_property
     elementsWeight = {}
     for el in elements:
         w = weightsDict.get(el, get_element_property(el,weighting))
@@ -959,6 +961,308 @@ def step_function(x, center=0, FWHM=0.1, height=1, check=True):
     return (sf*height).astype(FLOAT_TYPE)
 
 
+def get_atoms_terms_csr(termsAtoms, numberOfAtoms):
+    """
+    Build atoms to terms compressed sparse row (CSR) index. Terms are any
+    bonded definitions (bonds, angles, dihedrals, ...) given as columns of
+    atoms index. Atom i terms are indices[indptr[i]:indptr[i+1]].
+
+    :Parameters:
+        #. termsAtoms (list): List of atoms index columns. Every column
+           is a numpy.ndarray of the same length which is the number of
+           terms.
+        #. numberOfAtoms (int): The total number of atoms.
+
+    :Returns:
+        #. indptr (numpy.ndarray): Atoms pointers array of length
+           numberOfAtoms+1.
+        #. indices (numpy.ndarray): Terms index array sorted by atoms.
+    """
+    numberOfTerms = len(termsAtoms[0]) if len(termsAtoms) else 0
+    indptr = np.zeros(numberOfAtoms+1, dtype=INT_TYPE)
+    if not numberOfTerms:
+        return indptr, np.array([], dtype=INT_TYPE)
+    atoms   = np.concatenate([np.asarray(c, dtype=INT_TYPE) for c in termsAtoms])
+    terms   = np.tile(np.arange(numberOfTerms, dtype=INT_TYPE), len(termsAtoms))
+    order   = np.argsort(atoms, kind='mergesort')
+    indices = terms[order]
+    indptr[1:] = np.cumsum(np.bincount(atoms, minlength=numberOfAtoms))
+    return indptr, indices
+
+
+def get_atoms_terms(indptr, indices, atoms, excludeMask=None):
+    """
+    Gather the unique terms index of a set of atoms from an atoms to terms
+    CSR index as built by get_atoms_terms_csr.
+
+    :Parameters:
+        #. indptr (numpy.ndarray): Atoms pointers array.
+        #. indices (numpy.ndarray): Terms index array.
+        #. atoms (numpy.ndarray): Atoms index.
+        #. excludeMask (None, numpy.ndarray): Terms boolean mask. Terms set
+           to True are excluded.
+
+    :Returns:
+        #. terms (numpy.ndarray): Sorted unique terms index.
+    """
+    atoms   = np.asarray(atoms, dtype=INT_TYPE)
+    starts  = indptr[atoms]
+    lengths = indptr[atoms+1]-starts
+    total   = lengths.sum()
+    if not total:
+        return np.array([], dtype=INT_TYPE)
+    offsets = np.repeat(starts-np.cumsum(lengths)+lengths, lengths)
+    terms   = np.unique(indices[offsets+np.arange(total, dtype=INT_TYPE)])
+    if excludeMask is not None:
+        terms = terms[~excludeMask[terms]]
+    return terms
+
+
+def get_cells_list(boxCoords, basis, isPBC, cutoff, maximumCells=None):
+    """
+    Build a cells list to find all atoms pairs closer than a cutoff
+    distance in linear time. System is divided into cells of width bigger
+    or equal to cutoff, therefore all pairs within cutoff are found between
+    atoms of the same or neighbouring cells. Cell c atoms are
+    atomsIndex[cellsOffsets[c]:cellsOffsets[c+1]].
+
+    :Parameters:
+        #. boxCoords (numpy.ndarray): The (N,3) atoms box coordinates in
+           case of periodic boundary conditions or real coordinates
+           otherwise.
+        #. basis (numpy.ndarray): The (3,3) boundary conditions box vectors.
+        #. isPBC (bool): Whether it is a periodic boundary conditions or
+           infinite.
+        #. cutoff (number): The cutoff distance.
+        #. maximumCells (None, integer): Maximum number of cells. If None,
+           it's set to the number of atoms.
+
+    :Returns:
+        #. atomsIndex (None, numpy.ndarray): Atoms index sorted by cell.
+        #. cellsOffsets (None, numpy.ndarray): Cells offsets array of length
+           number of cells+1.
+        #. neighbours (None, numpy.ndarray): The (number of cells, 27) array
+           of every cell unique neighbouring cells, including the cell
+           itself. Non existing or redundant neighbours are set to -1.
+
+       None is returned for all when the system is too small to be divided
+       into more than 27 cells, in which case a cells list won't reduce
+       the number of computed pairs.
+    """
+    numberOfAtoms = boxCoords.shape[0]
+    if maximumCells is None:
+        maximumCells = numberOfAtoms
+    # no more than 27 cells can be built, bail out before any numpy work
+    if maximumCells <= 27:
+        return None, None, None
+    cutoff = float(cutoff)
+    if cutoff <= 0 or not np.isfinite(cutoff):
+        return None, None, None
+    # compute cells coordinates and number of cells per axis
+    if isPBC:
+        inverse = np.linalg.inv(np.array(basis, dtype=np.float64))
+        widths  = 1./np.sqrt(np.add.reduce(inverse**2, axis=0))
+        coords  = np.array(boxCoords, dtype=np.float64)
+        coords -= np.floor(coords)
+    else:
+        coords  = np.array(boxCoords, dtype=np.float64)
+        lower   = np.min(coords, axis=0) if numberOfAtoms else np.zeros(3)
+        widths  = (np.max(coords, axis=0) if numberOfAtoms else np.zeros(3)) - lower
+        coords  = (coords-lower)/np.where(widths>0, widths, 1.)
+    nCells = np.maximum(1, np.floor(widths/cutoff)).astype(np.int64)
+    if np.prod(nCells) > maximumCells:
+        factor = (float(np.prod(nCells))/max(maximumCells,1))**(1./3.)
+        nCells = np.maximum(1, np.floor(nCells/factor)).astype(np.int64)
+    if np.prod(nCells) <= 27:
+        return None, None, None
+    numberOfCells = int(np.prod(nCells))
+    # assign atoms to cells
+    cells   = np.minimum(np.floor(coords*nCells).astype(np.int64), nCells-1)
+    cells   = np.maximum(cells, 0)
+    cellId  = (cells[:,0]*nCells[1] + cells[:,1])*nCells[2] + cells[:,2]
+    atomsIndex   = np.argsort(cellId, kind='mergesort').astype(INT_TYPE)
+    cellsOffsets = np.zeros(numberOfCells+1, dtype=INT_TYPE)
+    cellsOffsets[1:] = np.cumsum(np.bincount(cellId, minlength=numberOfCells))
+    # build neighbouring cells
+    grid    = np.indices(tuple(nCells)).reshape((3,-1)).T
+    shifts  = np.indices((3,3,3)).reshape((3,-1)).T-1
+    neighs  = grid[:,None,:] + shifts[None,:,:]
+    if isPBC:
+        neighs %= nCells
+        valid   = np.ones(neighs.shape[:2], dtype=bool)
+    else:
+        valid   = np.all((neighs>=0) & (neighs<nCells), axis=2)
+    neighbours = (neighs[:,:,0]*nCells[1] + neighs[:,:,1])*nCells[2] + neighs[:,:,2]
+    neighbours[~valid] = -1
+    # remove redundant neighbours that appear with less than 3 cells per axis
+    neighbours.sort(axis=1)
+    redundant = np.zeros(neighbours.shape, dtype=bool)
+    redundant[:,1:] = neighbours[:,1:] == neighbours[:,:-1]
+    neighbours[redundant] = -1
+    return atomsIndex, cellsOffsets, neighbours.astype(INT_TYPE)
+
+
+REPOSITORY_CODECS = ('zlib', 'bz2')
+
+def _decompress_array(codec, dtype, shape, shuffle, payload, chunkSize=1048576):
+    """ Unpickling function of compressed arrays. It streams payload
+    decompression into a preallocated buffer and returns a numpy.ndarray."""
+    dtype  = np.dtype(dtype)
+    nbytes = int(np.prod(shape))*dtype.itemsize
+    buffer = np.empty(nbytes, dtype=np.uint8)
+    if codec == 'zlib':
+        decompressor = zlib.decompressobj()
+    else:
+        decompressor = bz2.BZ2Decompressor()
+    offset = 0
+    for start in range(0, len(payload), chunkSize):
+        chunk = decompressor.decompress(payload[start:start+chunkSize])
+        buffer[offset:offset+len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+        offset += len(chunk)
+    if codec == 'zlib':
+        chunk = decompressor.flush()
+        buffer[offset:offset+len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+    # revert byte shuffle
+    if shuffle and dtype.itemsize > 1:
+        buffer = np.ascontiguousarray(buffer.reshape((dtype.itemsize, -1)).T)
+    return buffer.view(dtype).reshape(shape)
+
+
+class _CompressedArray(object):
+    """
+    Numpy array wrapper that is pickled compressed and unpickled as a
+    plain numpy.ndarray. Byte shuffling groups together bytes of the same
+    significance of all items which greatly improves floating numbers
+    compression.
+
+    :Parameters:
+        #. array (numpy.ndarray): The array to compress.
+        #. codec (string): Compression codec. 'zlib' is fast while 'bz2'
+           compresses better at a higher CPU cost.
+        #. level (integer): Compression level between 1 and 9.
+        #. shuffle (boolean): Whether to byte shuffle array before compressing.
+    """
+    def __init__(self, array, codec='zlib', level=6, shuffle=True):
+        self.__array   = np.ascontiguousarray(array)
+        self.__codec   = codec
+        self.__level   = level
+        self.__shuffle = shuffle
+
+    def __reduce__(self):
+        array = self.__array
+        data  = array.view(np.uint8).reshape(-1)
+        if self.__shuffle and array.dtype.itemsize > 1:
+            data = np.ascontiguousarray(data.reshape((-1, array.dtype.itemsize)).T)
+        if self.__codec == 'zlib':
+            payload = zlib.compress(data.tostring(), self.__level)
+        else:
+            payload = bz2.compress(data.tostring(), self.__level)
+        return (_decompress_array, (self.__codec, array.dtype.str, array.shape, self.__shuffle, payload))
+
+
+class _CompressedRepository(object):
+    """
+    Repository proxy that compresses numpy arrays upon dumping. All numerical
+    numpy arrays, including the ones found in dictionaries, lists and tuples,
+    of at least minimumSize bytes are compressed. Compressed arrays are pulled
+    as plain numpy arrays by any repository. All other repository methods and
+    attributes are delegated to the given repository.
+
+    :Parameters:
+        #. repository (pyrep.Repository): The repository instance.
+        #. codec (None, string, dict): Compression codec. If None is given,
+           values are dumped untouched. If string is given it must be one of
+           REPOSITORY_CODECS. If dict is given, keys are dumped data names
+           and values are codecs or None so the choice of trading CPU for I/O
+           can be made per data. None key sets the codec of all other names.
+        #. level (integer): Compression level between 1 and 9.
+        #. shuffle (boolean): Whether to byte shuffle arrays before compressing.
+        #. minimumSize (integer): Minimum array size in bytes to compress.
+    """
+    def __init__(self, repository, codec=None, level=6, shuffle=True, minimumSize=65536):
+        self.__repository = repository
+        self.set_codec(codec=codec, level=level, shuffle=shuffle, minimumSize=minimumSize)
+
+    def __getattr__(self, name):
+        # only called when attribute is not found
+        if name.startswith('_CompressedRepository__'):
+            raise AttributeError(name)
+        return getattr(self.__repository, name)
+
+    @property
+    def repository(self):
+        """ The proxied repository."""
+        return self.__repository
+
+    @property
+    def codec(self):
+        """ Compression codec."""
+        return self.__codec
+
+    def set_codec(self, codec=None, level=6, shuffle=True, minimumSize=65536):
+        """
+        Set compression codec.
+
+        :Parameters:
+            #. codec (None, string, dict): Compression codec.
+            #. level (integer): Compression level between 1 and 9.
+            #. shuffle (boolean): Whether to byte shuffle arrays before
+               compressing.
+            #. minimumSize (integer): Minimum array size in bytes to compress.
+        """
+        if isinstance(codec, dict):
+            for k, v in codec.items():
+                assert k is None or isinstance(k, basestring), LOGGER.error("codec dict keys must be None or data names")
+                assert v is None or v in REPOSITORY_CODECS, LOGGER.error("codec dict values must be None or one of %s"%(REPOSITORY_CODECS,))
+        else:
+            assert codec is None or codec in REPOSITORY_CODECS, LOGGER.error("codec must be None, a dict or one of %s"%(REPOSITORY_CODECS,))
+        assert is_integer(level), LOGGER.error("level must be an integer")
+        level = int(level)
+        assert 1<=level<=9, LOGGER.error("level must be between 1 and 9")
+        assert isinstance(shuffle, bool), LOGGER.error("shuffle must be boolean")
+        assert is_integer(minimumSize), LOGGER.error("minimumSize must be an integer")
+        minimumSize = int(minimumSize)
+        assert minimumSize>=0, LOGGER.error("minimumSize must be positive")
+        self.__codec       = codec
+        self.__level       = level
+        self.__shuffle     = shuffle
+        self.__minimumSize = minimumSize
+
+    def get_name_codec(self, name):
+        """
+        Get the codec used to dump data of the given name.
+
+        :Parameters:
+            #. name (string): Dumped data name.
+
+        :Returns:
+            #. codec (None, string): The codec.
+        """
+        if isinstance(self.__codec, dict):
+            return self.__codec.get(name, self.__codec.get(None, None))
+        return self.__codec
+
+    def __compress(self, value, codec):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind in 'biufc' and value.nbytes >= self.__minimumSize:
+                return _CompressedArray(value, codec=codec, level=self.__level, shuffle=self.__shuffle)
+            return value
+        if type(value) is dict:
+            return dict([(k, self.__compress(v, codec)) for k, v in value.items()])
+        if type(value) in (list, tuple):
+            return type(value)([self.__compress(v, codec) for v in value])
+        return value
+
+    def dump(self, value, *args, **kwargs):
+        """ Dump value to repository compressing numpy arrays. All
+        arguments are passed to the proxied repository dump method."""
+        name = kwargs.get('name', args[1] if len(args)>1 else None)
+        codec = self.get_name_codec(name)
+        if codec is not None:
+            value = self.__compress(value, codec)
+        return self.__repository.dump(value, *args, **kwargs)
+
+
 class ListenerBase(object):
     """All listeners base class."""
     def __init__(self):
@@ -1221,7 +1525,7 @@ class _AtomsCollector(object):
         method is not called.
         """
         # init indexes sorted array
-        self.__indexesSortedArray = np.array([])
+        self.__indexesSortedArray = np.array([], dtype=INT_TYPE)
         # initialize collected data dictionary
         self.__collectedData = {}
         # set random data that can be used to collect random data at any time.
@@ -1482,14 +1786,14 @@ class _AtomsCollector(object):
         if not self.is_collected(index):
             LOGGER.warn("Attempting to release atom %i that is not collected."%index)
             return
-        index = self.__collectedData.pop(index)
+        dataDict = self.__collectedData.pop(index)
         # set indexes sorted array
         idx = np.searchsorted(a=self.__indexesSortedArray, v=index, side='left')
-        self.__indexesSortedArray = np.insert(self.__indexesSortedArray, idx, index)
+        self.__indexesSortedArray = np.delete(self.__indexesSortedArray, idx)
         # set state
         self.__state = str(uuid.uuid1())
         # return
-        return index
+        return dataDict
 
 
 class Broadcaster(object):
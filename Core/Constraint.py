@@ -20,6 +20,11 @@ import numpy as np
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, LOGGER
 from fullrmc.Core.Collection import ListenerBase, is_number, is_integer, get_path
 from fullrmc.Core.Collection import _AtomsCollector, reset_if_collected_out_of_date
+from fullrmc.Core.Collection import get_atoms_terms_csr, get_atoms_terms
+from fullrmc.Core.bonded_terms import full_bonded_terms_coords
+
+# bonded_terms.full_bonded_terms_coords terms keywords in returned order
+BONDED_TERMS_KEYWORDS = ('bonds', 'angles', 'dihedrals', 'impropers')
 
 
 class Constraint(ListenerBase):
@@ -42,6 +47,8 @@ class Constraint(ListenerBase):
         # computation cost
         #self.__computationCost = 0
         self.set_computation_cost(0)
+        # runtime evaluation statistics
+        self._reset_runtime_statistics()
         # set frame data
         FRAME_DATA  = ('_Constraint__state', '_Constraint__used',
                        '_Constraint__tried', '_Constraint__accepted',
@@ -69,10 +76,52 @@ class Constraint(ListenerBase):
         for k, v in self.__dict__.items():
             if k in self.FRAME_DATA:
                 continue
+            elif k.startswith('_RT_'):
+                # runtime buffers and caches are not saved
+                state[k] = None
             else:
                 state[k] = v
         return state
 
+    def __getattr__(self, name):
+        # only called when attribute is not found. Lazily loaded frame
+        # data are pulled from the repository upon first access
+        lazyData = self.__dict__.get('_RT_lazyData', None)
+        if not lazyData or name not in lazyData:
+            raise AttributeError("'%s' object has no attribute '%s'"%(self.__class__.__name__, name))
+        repository, relativePath = lazyData.pop(name)
+        value = repository.pull(relativePath=relativePath, name=name)
+        object.__setattr__(self, name, value)
+        return value
+
+    def _set_lazy_data(self, repository, relativePath=None):
+        """
+        Set constraint's FRAME_DATA to be lazily pulled from the repository
+        upon first access. Used by engine lazy loading.
+
+        :Parameters:
+            #. repository (None, pyrep.Repository): The repository to pull
+               data from. If None is given, no data will be lazily pulled.
+            #. relativePath (None, string): Constraint's used frame data
+               relative path in the repository.
+        """
+        if repository is None:
+            self._RT_lazyData = None
+        else:
+            self._RT_lazyData = dict([(name, (repository, relativePath)) for name in self.FRAME_DATA])
+
+    def _has_lazy_data(self):
+        """ Whether some of constraint's FRAME_DATA are not pulled yet."""
+        return bool(self.__dict__.get('_RT_lazyData', None))
+
+    def _materialize(self):
+        """ Pull all lazily loaded constraint's FRAME_DATA."""
+        lazyData = self.__dict__.get('_RT_lazyData', None)
+        if lazyData is not None:
+            for name in list(lazyData):
+                getattr(self, name)
+        self._RT_lazyData = None
+
     def _set_engine(self, engine):
         assert self.__engine is None, LOGGER.error("Re-setting constraint engine is not allowed.")
         from fullrmc.Engine import Engine
@@ -247,6 +296,48 @@ class Constraint(ListenerBase):
         """
         pass
 
+    def _reset_runtime_statistics(self):
+        """
+        Reset constraint's runtime evaluation statistics used by the
+        stochastic engine to adaptively order constraints evaluation.
+        """
+        self._RT_evaluations    = 0
+        self._RT_evaluationTime = 0.
+        self._RT_rejections     = 0
+
+    def _record_runtime_evaluation(self, evaluationTime, rejected):
+        """
+        Record a runtime evaluation of the constraint.
+
+        :Parameters:
+            #. evaluationTime (number): Time spent computing the constraint
+               before and after move.
+            #. rejected (boolean): Whether the constraint rejected the move.
+               For non rigid constraints, it's whether the constraint's
+               standard error increased.
+        """
+        self._RT_evaluations    += 1
+        self._RT_evaluationTime += evaluationTime
+        self._RT_rejections     += rejected
+
+    def get_runtime_expected_cost(self):
+        """
+        Get constraint's expected evaluation cost measured at stochastic
+        engine runtime. It's computed as the average evaluation time divided
+        by the rejection probability. The latter is estimated with a Laplace
+        rule of succession to remain strictly positive. Constraints with
+        lower expected cost are better evaluated first.
+
+        :Returns:
+            #. cost (None, number): The expected cost or None if constraint
+               has not been evaluated at runtime yet.
+        """
+        if not self._RT_evaluations:
+            return None
+        averageTime = self._RT_evaluationTime/self._RT_evaluations
+        probability = (self._RT_rejections+1.)/(self._RT_evaluations+2.)
+        return averageTime/probability
+
     def set_variance_squared(self, value):
         """
         Set constraint's variance squared that is used in the c
@@ -351,13 +442,25 @@ class Constraint(ListenerBase):
         """
         self.__standardError = value
 
+    def __cast_to_engine_precision(self, value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == 'f' and value.dtype != self.__engine.precision:
+                value = value.astype(self.__engine.precision)
+        elif isinstance(value, dict):
+            value = dict([(k, self.__cast_to_engine_precision(v)) for k, v in value.items()])
+        return value
+
     def set_data(self, value):
         """
-        Set constraint's data value.
+        Set constraint's data value. If engine's precision is not
+        FLOAT_TYPE, floating numpy arrays are cast to engine's precision
+        so that data accumulates in the chosen precision upon accepted moves.
 
         :Parameters:
             #. value (number): constraint's data.
         """
+        if self.__engine is not None and self.__engine.precision is not FLOAT_TYPE:
+            value = self.__cast_to_engine_precision(value)
         self.__data = value
 
     def set_active_atoms_data_before_move(self, value):
@@ -792,9 +895,17 @@ class ExperimentalConstraint(Constraint):
         some experimental and model data.
         """
         if dataWeights is None:
-            SF = FLOAT_TYPE( np.sum(modelData*experimentalData)/np.sum(modelData**2) )
+            modelExperimental = np.sum(modelData*experimentalData)
         else:
-            SF = FLOAT_TYPE( np.sum(dataWeights*modelData*experimentalData)/np.sum(modelData**2) )
+            modelExperimental = np.sum(dataWeights*modelData*experimentalData)
+        return self._fit_scale_factor_from_moments(modelExperimental, np.sum(modelData**2))
+
+    def _fit_scale_factor_from_moments(self, modelExperimental, modelSquared):
+        """ Get the best scale factor given the sum of weighted model times
+        experimental data and the sum of squared model data, bounded to the
+        adjust scale factor minimum and maximum. This allows constraints that
+        maintain those sums to fit the scale factor without full arrays."""
+        SF = FLOAT_TYPE( modelExperimental/modelSquared )
         SF = max(SF, self.__adjustScaleFactorMinimum)
         SF = min(SF, self.__adjustScaleFactorMaximum)
         return SF
@@ -822,11 +933,17 @@ class ExperimentalConstraint(Constraint):
         """
         SF = self.__scaleFactor
         # check to update scaleFactor
-        if self.__adjustScaleFactorFrequency:
-            if not self.engine.accepted%self.adjustScaleFactorFrequency:
-                SF = self.fit_scale_factor(experimentalData, modelData, dataWeights)
+        if self._is_scale_factor_adjustment_due():
+            SF = self.fit_scale_factor(experimentalData, modelData, dataWeights)
         return SF
 
+    def _is_scale_factor_adjustment_due(self):
+        """ Whether get_adjusted_scale_factor fits a new scale factor at
+        engine's current accepted moves number."""
+        if not self.__adjustScaleFactorFrequency:
+            return False
+        return not self.engine.accepted%self.__adjustScaleFactorFrequency
+
     def compute_standard_error(self, experimentalData, modelData):
         """
         Compute the squared deviation between modal computed data
@@ -886,6 +1003,247 @@ class SingularConstraint(Constraint):
         assert self.is_singular(engine), LOGGER.error("Only one instance of constraint '%s' is allowed in the same engine"%self.__class__.__name__)
 
 
+class BondedConstraint(Constraint):
+    """
+    A bonded constraint is a constraint computed over terms defined between
+    bonded atoms such as bonds, angles, dihedral angles and improper angles.
+    Terms list starts with the atoms index columns followed by the limits
+    columns. Atoms to terms map is a compressed sparse row index and
+    collected terms are flagged in a boolean mask stored in atoms
+    collector's random data.
+    """
+    # number of atoms index columns in terms list
+    _TERMS_ATOMS = None
+    # terms keyword in BONDED_TERMS_KEYWORDS
+    _TERMS_KEYWORD = None
+
+    def _get_terms_list(self):
+        """ Get constraint's terms list. Must be overloaded."""
+        raise Exception(LOGGER.error("%s must overload _get_terms_list"%self.__class__.__name__))
+
+    def _on_collector_reset(self):
+        self._atomsCollector._randomData = None
+
+    def _get_terms_csr(self):
+        """ Get atoms to terms CSR index (indptr, indices) built upon need."""
+        termsList = self._get_terms_list()
+        CSR = self.__dict__.get('_RT_termsCSR', None)
+        if CSR is None or CSR[0] is not termsList[0]:
+            indptr, indices = get_atoms_terms_csr(termsAtoms    = termsList[:self._TERMS_ATOMS],
+                                                  numberOfAtoms = self.engine.get_original_data("numberOfAtoms"))
+            CSR = self._RT_termsCSR = (termsList[0], indptr, indices)
+        return CSR[1], CSR[2]
+
+    def _get_collected_terms_mask(self):
+        """ Get collected terms boolean mask."""
+        mask = self._atomsCollector._randomData
+        if not isinstance(mask, np.ndarray):
+            collected = mask
+            mask = np.zeros(len(self._get_terms_list()[0]), dtype=bool)
+            if collected:
+                mask[list(collected)] = True
+            self._atomsCollector._randomData = mask
+        return mask
+
+    def _get_terms_indexes(self, realIndexes, collected=True):
+        """
+        Get sorted unique index of terms involving given atoms.
+
+        :Parameters:
+            #. realIndexes (numpy.ndarray): Atoms index.
+            #. collected (boolean): Whether to include collected terms.
+        """
+        indptr, indices = self._get_terms_csr()
+        if collected:
+            excludeMask = None
+        else:
+            excludeMask = self._get_collected_terms_mask()
+        return get_atoms_terms(indptr, indices, realIndexes, excludeMask=excludeMask)
+
+    def _get_terms_arguments(self, termsIndexes):
+        """ Get terms definition as expected by bonded_terms functions where
+        atoms index columns are converted to relative index."""
+        termsList  = self._get_terms_list()
+        getIndexes = self._atomsCollector.get_relative_indexes
+        return tuple( [getIndexes(c[termsIndexes]) for c in termsList[:self._TERMS_ATOMS]] + \
+                      [c[termsIndexes] for c in termsList[self._TERMS_ATOMS:]] )
+
+    def __compute_terms(self, termsIndexes):
+        kwargs  = {self._TERMS_KEYWORD:self._get_terms_arguments(termsIndexes)}
+        results = full_bonded_terms_coords(boxCoords = self.engine.boxCoordinates,
+                                           basis     = self.engine.basisVectors,
+                                           isPBC     = self.engine.isPBC,
+                                           ncores    = INT_TYPE(1),
+                                           **kwargs)
+        return results[BONDED_TERMS_KEYWORDS.index(self._TERMS_KEYWORD)]
+
+    def _compute_terms_before_move(self, realIndexes):
+        """
+        Compute not collected terms of atoms before move. When the engine's
+        bonded terms evaluator is set for this move, all bonded constraints
+        terms are taken from it.
+
+        :Parameters:
+            #. realIndexes (numpy.ndarray): Group atoms index the move will
+               be applied to.
+
+        :Returns:
+            #. termsIndexes (numpy.ndarray): Terms index.
+            #. values (None, numpy.ndarray): Terms values.
+            #. reduced (None, numpy.ndarray): Terms reduced values.
+        """
+        evaluator = self.__dict__.get('_RT_bondedTermsEvaluator', None)
+        if evaluator is not None:
+            result = evaluator.get_before_move(self, realIndexes)
+            if result is not None:
+                return result
+        termsIndexes = self._get_terms_indexes(realIndexes, collected=False)
+        if not len(termsIndexes):
+            return termsIndexes, None, None
+        values, reduced = self.__compute_terms(termsIndexes)
+        return termsIndexes, values, reduced
+
+    def _compute_terms_after_move(self, termsIndexes, relativeIndexes, movedBoxCoordinates):
+        """
+        Compute terms after move.
+
+        :Parameters:
+            #. termsIndexes (numpy.ndarray): Terms index as returned by
+               _compute_terms_before_move.
+            #. relativeIndexes (numpy.ndarray): Group atoms relative index
+               the move will be applied to.
+            #. movedBoxCoordinates (numpy.ndarray): The moved atoms new
+               coordinates.
+
+        :Returns:
+            #. values (None, numpy.ndarray): Terms values.
+            #. reduced (None, numpy.ndarray): Terms reduced values.
+        """
+        if not len(termsIndexes):
+            return None, None
+        evaluator = self.__dict__.get('_RT_bondedTermsEvaluator', None)
+        if evaluator is not None:
+            result = evaluator.get_after_move(self, termsIndexes, movedBoxCoordinates)
+            if result is not None:
+                return result
+        # change coordinates temporarily
+        boxData = np.array(self.engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
+        self.engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
+        values, reduced = self.__compute_terms(termsIndexes)
+        # reset coordinates
+        self.engine.boxCoordinates[relativeIndexes] = boxData
+        return values, reduced
+
+
+class _BondedTermsEvaluator(object):
+    """
+    Compute moved atoms terms of many bonded constraints at once. Bonded
+    atoms vectors shared between terms of different constraints are computed
+    once before and once after move. Engine sets the move before computing
+    constraints and unsets it right after.
+
+    :Parameters:
+        #. constraints (list): Constraints list. Only bonded constraints
+           are considered and only one per terms keyword.
+    """
+    def __init__(self, constraints):
+        self.__constraints = []
+        keywords = []
+        for c in constraints:
+            if isinstance(c, BondedConstraint) and c._TERMS_KEYWORD not in keywords:
+                keywords.append(c._TERMS_KEYWORD)
+                self.__constraints.append(c)
+        self.__move    = None
+        self.__results = None
+
+    def __len__(self):
+        return len(self.__constraints)
+
+    def attach(self):
+        """ Attach evaluator to its bonded constraints."""
+        for c in self.__constraints:
+            c._RT_bondedTermsEvaluator = self
+
+    def detach(self):
+        """ Detach evaluator from its bonded constraints."""
+        self.set_move(None)
+        for c in self.__constraints:
+            c._RT_bondedTermsEvaluator = None
+
+    def set_move(self, realIndexes, relativeIndexes=None, movedBoxCoordinates=None):
+        """
+        Set current move. Terms are computed upon first request.
+
+        :Parameters:
+            #. realIndexes (None, numpy.ndarray): Group atoms index the move
+               will be applied to. If None, move is unset.
+            #. relativeIndexes (numpy.ndarray): Group atoms relative index.
+            #. movedBoxCoordinates (numpy.ndarray): The moved atoms new
+               coordinates.
+        """
+        if realIndexes is None:
+            self.__move = None
+        else:
+            self.__move = (realIndexes, relativeIndexes, movedBoxCoordinates)
+        self.__results = None
+
+    def __compute(self):
+        realIndexes, relativeIndexes, movedBoxCoordinates = self.__move
+        engine  = self.__constraints[0].engine
+        indexes = {}
+        kwargs  = {}
+        for c in self.__constraints:
+            termsIndexes = c._get_terms_indexes(realIndexes, collected=False)
+            indexes[c._TERMS_KEYWORD] = termsIndexes
+            if len(termsIndexes):
+                kwargs[c._TERMS_KEYWORD] = c._get_terms_arguments(termsIndexes)
+        before = after = (None,)*len(BONDED_TERMS_KEYWORDS)
+        if len(kwargs):
+            before  = full_bonded_terms_coords(boxCoords = engine.boxCoordinates,
+                                               basis     = engine.basisVectors,
+                                               isPBC     = engine.isPBC,
+                                               ncores    = INT_TYPE(1),
+                                               **kwargs)
+            # change coordinates temporarily
+            boxData = np.array(engine.boxCoordinates[relativeIndexes], dtype=FLOAT_TYPE)
+            engine.boxCoordinates[relativeIndexes] = movedBoxCoordinates
+            after   = full_bonded_terms_coords(boxCoords = engine.boxCoordinates,
+                                               basis     = engine.basisVectors,
+                                               isPBC     = engine.isPBC,
+                                               ncores    = INT_TYPE(1),
+                                               **kwargs)
+            # reset coordinates
+            engine.boxCoordinates[relativeIndexes] = boxData
+        self.__results = {}
+        for keyword, termsIndexes in indexes.items():
+            k = BONDED_TERMS_KEYWORDS.index(keyword)
+            b = before[k] if before[k] is not None else (None, None)
+            a = after[k]  if after[k]  is not None else (None, None)
+            self.__results[keyword] = (termsIndexes, b[0], b[1], a[0], a[1])
+
+    def get_before_move(self, constraint, realIndexes):
+        """ Get constraint (termsIndexes, values, reduced) before move or
+        None if move is not set or not the given one."""
+        if self.__move is None or self.__move[0] is not realIndexes:
+            return None
+        if self.__results is None:
+            self.__compute()
+        result = self.__results.get(constraint._TERMS_KEYWORD, None)
+        if result is None or constraint not in self.__constraints:
+            return None
+        return result[:3]
+
+    def get_after_move(self, constraint, termsIndexes, movedBoxCoordinates):
+        """ Get constraint (values, reduced) after move or None if not
+        computed for the given terms and moved coordinates."""
+        if self.__results is None or self.__move[2] is not movedBoxCoordinates:
+            return None
+        result = self.__results.get(constraint._TERMS_KEYWORD, None)
+        if result is None or result[0] is not termsIndexes:
+            return None
+        return result[3:]
+
+
 class RigidConstraint(Constraint):
     """
     A rigid constraint is a constraint that doesn't count into the total
@@ -11,13 +11,15 @@ on groups rather than on single atoms.
 
 # standard libraries imports
 import inspect
+import copy
+import weakref
 
 # external libraries imports
 import numpy as np
 
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, LOGGER
-from fullrmc.Core.Collection import is_number, is_integer, get_path
+from fullrmc.Core.Collection import is_number, is_integer, get_path, get_principal_axis
 from fullrmc.Core.MoveGenerator import MoveGenerator, RemoveGenerator
 from fullrmc.Generators.Translations import TranslationGenerator
 from fullrmc.Generators.Removes import AtomsRemoveGenerator
@@ -65,6 +67,11 @@ class Group(object):
     def __len__(self):
         return len(self.__indexes)
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # groups saved without cached metadata must have it initialized
+        self._reset_cache()
+
     def _set_engine(self, engine):
         """ This is a fullrmc API method to set the group engine.
         Use with caution and better not to."""
@@ -75,6 +82,37 @@ class Group(object):
         Normally a group doesn't need to know the engine."""
         return self.__engine
 
+    def _reset_cache(self):
+        """ Reset all cached group metadata. Not collected atoms and
+        relative indexes will be recomputed upon next request."""
+        self.__collectorState      = None
+        self.__notCollectedIndexes = None
+        self.__relativeIndexes     = None
+
+    def _get_relative_indexes(self, collector):
+        """
+        This is a fullrmc API method to get group's not collected atoms index
+        and their relative index. Both are cached and recomputed only when
+        collector state changes.
+
+        :Parameters:
+            #. collector (_AtomsCollector): The engine's atoms collector.
+
+        :Returns:
+            #. indexes (numpy.ndarray): Not collected group atoms index.
+            #. relativeIndexes (numpy.ndarray): Not collected group atoms
+               relative index.
+        """
+        state = collector.state
+        if self.__collectorState != state:
+            indexes = self.__indexes
+            if len(collector):
+                indexes = indexes[ np.in1d(indexes, collector.indexesSortedArray, invert=True) ]
+            self.__notCollectedIndexes = indexes
+            self.__relativeIndexes     = collector.get_relative_indexes(indexes).astype(INT_TYPE)
+            self.__collectorState      = state
+        return self.__notCollectedIndexes, self.__relativeIndexes
+
     @property
     def indexes(self):
         """ Atoms index array."""
@@ -121,6 +159,8 @@ class Group(object):
         assert len(group) or isinstance(self, EmptyGroup), LOGGER.error("Group is found to be empty. Use EmptyGroup instead.")
         # create indexes
         self.__indexes = np.array(group, dtype=INT_TYPE)
+        # reset cached metadata
+        self._reset_cache()
 
     def set_move_generator(self, generator):
         """
@@ -214,3 +254,607 @@ class EmptyGroup(Group):
                disregarded in this particular case.
         """
         self.__indexes = None
+        # reset cached metadata
+        self._reset_cache()
+
+
+class _GroupView(Group):
+    """
+    Temporary Group instance created by a GroupTable upon indexing or
+    iterating. It uses the table's shared move generator and is only kept
+    by the table as the group's reference definition once it's modified.
+    For internal use only.
+
+    :Parameters:
+        #. table (GroupTable): The groups table.
+        #. index (integer): The group index in the table.
+        #. indexes (numpy.ndarray): The group atoms index.
+    """
+    def __init__(self, table, index, indexes):
+        self.__table = table
+        self.__index = index
+        self._Group__indexes       = indexes
+        self._Group__moveGenerator = None
+        self._Group__refine        = False
+        self._Group__engine        = table._get_engine()
+        self._reset_cache()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # a temporary view is saved as a group having its own generator
+        if self.__table is not None:
+            generator = copy.deepcopy(self.__table.get_move_generator(self.__index))
+            generator.set_group(self)
+            state['_Group__moveGenerator'] = generator
+            state['_GroupView__table']     = None
+        return state
+
+    def _get_shared_move_generator(self):
+        """ Get the table's shared move generator used by the view. None is
+        returned if the view is kept by the table."""
+        if self.__table is None:
+            return None
+        return self.__table.get_move_generator(self.__index)
+
+    def _persist(self, copyGenerator=True):
+        """ Keep view in its table as the group's reference definition.
+
+        :Parameters:
+            #. copyGenerator (boolean): Whether to set a copy of the table's
+               shared move generator as the group's move generator.
+        """
+        if self.__table is None:
+            return
+        table, self.__table = self.__table, None
+        generator = table._persist_view(self.__index, self)
+        if copyGenerator:
+            Group.set_move_generator(self, copy.deepcopy(generator))
+
+    @property
+    def moveGenerator(self):
+        """ Group's move generator instance. This is the table's shared
+        move generator unless the view is kept by the table."""
+        generator = self._get_shared_move_generator()
+        if generator is None:
+            generator = self._Group__moveGenerator
+        return generator
+
+    def set_refine(self, refine):
+        """
+        Set the selector refine flag.
+
+        :Parameters:
+            #. refine (bool): The selector refinement flag.
+        """
+        self._persist()
+        Group.set_refine(self, refine)
+
+    def set_indexes(self, indexes):
+        """
+        Set group atoms index. Indexes redundancy is not checked
+        and indexes order is preserved.
+
+        :Parameters:
+            #. indexes (list,set,tuple,np.ndarray): The group atoms indexes.
+        """
+        self._persist()
+        Group.set_indexes(self, indexes)
+
+    def set_move_generator(self, generator):
+        """
+        Set group move generator.
+
+        :Parameters:
+            #. generator (None, MoveGenerator): Move generator instance.
+               If None is given TranslationGenerator is considered by default.
+        """
+        self._persist(copyGenerator=False)
+        Group.set_move_generator(self, generator)
+
+
+class _GroupGeometry(object):
+    """
+    Group geometric properties computed upon request from a group atoms
+    coordinates array. This is used by the engine's groups table to share
+    center and principal axis between move generators for as long as group
+    atoms don't move.
+
+    :Parameters:
+        #. coordinates (np.ndarray): Group atoms (N,3) coordinates array.
+        #. version (None, object): Version of the engine coordinates the
+           given coordinates are taken from. If None, coordinates are not
+           the engine ones and the properties are only valid for the very
+           same coordinates array instance.
+    """
+    def __init__(self, coordinates, version=None):
+        self.coordinates = coordinates
+        self.version     = version
+        self.__center    = None
+        self.__axis      = None
+
+    def get_center(self):
+        """ Get coordinates geometric center."""
+        if self.__center is None:
+            coordinates   = self.coordinates
+            self.__center = np.array(np.sum(coordinates, 0)/coordinates.shape[0], dtype=FLOAT_TYPE)
+        return np.array(self.__center)
+
+    def get_principal_axis(self):
+        """ Get coordinates principal axis as computed by
+        fullrmc.Core.Collection.get_principal_axis."""
+        if self.__axis is None:
+            self.__axis = get_principal_axis(self.coordinates)
+        center, eval1, eval2, eval3, axis1, axis2, axis3 = self.__axis
+        return np.array(center), eval1, eval2, eval3, np.array(axis1), np.array(axis2), np.array(axis3)
+
+
+class GroupTable(object):
+    """
+    Compact groups container used by the Engine. Groups atoms index are
+    stored contiguously in a single integer array delimited by CSR-like
+    offsets, and every group refers through a generator id to a small
+    table of move generators shared among groups. Group instances are
+    created on demand as temporary views and are only kept as the group's
+    reference definition once modified. This allows defining and iterating
+    hundreds of thousands of groups, as in Engine.set_groups_as_atoms,
+    without creating a Group and a MoveGenerator instance per atom.
+
+    Shared move generators are not assigned to any group, therefore they
+    must be generators that don't require knowing their group.
+
+    :Parameters:
+        #. groups (None, list): List of Group instances or numpy.ndarray of
+           atoms index to initialize the table with.
+
+    .. code-block:: python
+
+        # import fullrmc modules
+        from fullrmc.Engine import Engine
+        from fullrmc.Generators.Translations import TranslationGenerator
+
+        # create engine
+        ENGINE = Engine(path='my_engine.rmc')
+
+        # set pdb file
+        ENGINE.set_pdb('system.pdb')
+
+        # set groups as atoms. No Group instance is created
+        ENGINE.set_groups_as_atoms()
+
+        # set a shared translation generator to all groups
+        ENGINE.groups.set_move_generator(TranslationGenerator(amplitude=0.1))
+
+        # Group instances are created upon request. Group 0 generator
+        # is changed and this will only apply to group 0
+        ENGINE.groups[0].set_move_generator(TranslationGenerator(amplitude=0.5))
+
+    """
+    def __init__(self, groups=None):
+        self.__offsets      = np.zeros(1, dtype=INT_TYPE)
+        self.__indexes      = np.array([], dtype=INT_TYPE)
+        self.__generatorIds = np.array([], dtype=INT_TYPE)
+        self.__generators   = [TranslationGenerator(group=None)]
+        self.__views        = {}
+        self.__viewsIndexes = {}
+        self.__tempViews    = weakref.WeakValueDictionary()
+        self.__pending      = []
+        self.__engine       = None
+        self.__geometry     = {}
+        self._reset_cache()
+        if groups is not None:
+            assert isinstance(groups, (list,tuple,GroupTable)), LOGGER.error("groups must be a list of Group instances or numpy.ndarray")
+            for g in groups:
+                self.append(g)
+
+    def __getstate__(self):
+        self.__flush()
+        state = self.__dict__.copy()
+        state['_GroupTable__collectorState']       = None
+        state['_GroupTable__notCollectedMask']     = None
+        state['_GroupTable__relativeIndexesArray'] = None
+        state['_GroupTable__geometry']             = {}
+        state.pop('_GroupTable__tempViews', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__tempViews = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        if self.__pending:
+            self.__flush()
+        return self.__generatorIds.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in xrange(*index.indices(len(self)))]
+        return self.get_view(index, create=True)
+
+    def __iter__(self):
+        for idx in xrange(len(self)):
+            yield self.get_view(idx, create=True)
+
+    @classmethod
+    def from_offsets(cls, offsets, indexes):
+        """
+        Create a groups table from CSR-like offsets and atoms index arrays.
+        Given arrays are not checked for redundancy.
+
+        :Parameters:
+            #. offsets (numpy.ndarray): Groups offsets of size number of
+               groups+1 where group i atoms are indexes[offsets[i]:offsets[i+1]]
+            #. indexes (numpy.ndarray): Groups atoms index.
+
+        :Returns:
+            #. table (GroupTable): The created groups table.
+        """
+        offsets = np.array(offsets, dtype=INT_TYPE)
+        indexes = np.array(indexes, dtype=INT_TYPE)
+        assert len(offsets.shape) == 1 and len(offsets), LOGGER.error("offsets must be a non-empty numpy.ndarray of dimension 1")
+        assert offsets[0] == 0, LOGGER.error("offsets first item must be 0")
+        assert offsets[-1] == indexes.shape[0], LOGGER.error("offsets last item must be equal to indexes size")
+        assert np.all(offsets[1:]>offsets[:-1]), LOGGER.error("offsets must be strictly increasing. Groups can't be empty")
+        assert not len(indexes) or np.min(indexes)>=0, LOGGER.error("group index must equal or bigger than 0")
+        table = cls()
+        table.__offsets      = offsets
+        table.__indexes      = indexes
+        table.__generatorIds = np.zeros(offsets.shape[0]-1, dtype=INT_TYPE)
+        return table
+
+    def __flush(self):
+        # concatenate pending appended groups to the table arrays
+        if not self.__pending:
+            return
+        size      = self.__generatorIds.shape[0]
+        lengths   = [len(idxs) for idxs, _ in self.__pending]
+        offsets   = np.cumsum(lengths, dtype=INT_TYPE) + self.__offsets[-1]
+        self.__offsets      = np.concatenate((self.__offsets, offsets)).astype(INT_TYPE)
+        self.__indexes      = np.concatenate([self.__indexes]+[idxs for idxs, _ in self.__pending]).astype(INT_TYPE)
+        self.__generatorIds = np.concatenate((self.__generatorIds, np.array([gid for _, gid in self.__pending], dtype=INT_TYPE)))
+        self.__pending      = []
+        self._reset_cache()
+
+    def __synchronize_views(self):
+        # rebuild table arrays when views indexes got changed
+        self.__flush()
+        changed = [idx for idx, view in self.__views.items() if view.indexes is not self.__viewsIndexes[idx]]
+        if not len(changed):
+            return
+        for idx in changed:
+            self.__viewsIndexes[idx] = self.__views[idx].indexes
+        groupsIndexes = []
+        for idx in xrange(self.__generatorIds.shape[0]):
+            if idx in self.__views:
+                indexes = self.__viewsIndexes[idx]
+                groupsIndexes.append( np.array([], dtype=INT_TYPE) if indexes is None else indexes )
+            else:
+                groupsIndexes.append( self.__indexes[self.__offsets[idx]:self.__offsets[idx+1]] )
+        lengths        = [len(idxs) for idxs in groupsIndexes]
+        self.__offsets = np.concatenate(([0], np.cumsum(lengths))).astype(INT_TYPE)
+        self.__indexes = np.concatenate(groupsIndexes).astype(INT_TYPE)
+        self._reset_cache()
+
+    def _reset_cache(self):
+        """ Reset table cached collector metadata. Not collected atoms and
+        relative indexes will be recomputed upon next request."""
+        self.__collectorState       = None
+        self.__notCollectedMask     = None
+        self.__relativeIndexesArray = None
+
+    def _set_engine(self, engine):
+        """ This is a fullrmc API method to set the table and all created
+        views engine. Use with caution and better not to."""
+        self.__engine = engine
+        for view in self.__views.values():
+            view._set_engine(engine)
+        for view in self.__tempViews.values():
+            view._set_engine(engine)
+
+    def _persist_view(self, index, view):
+        """ This is a fullrmc API method called by a temporary view to be
+        kept as the group's reference definition. Use with caution and
+        better not to.
+
+        :Parameters:
+            #. index (integer): The group index.
+            #. view (Group): The group view.
+
+        :Returns:
+            #. generator (MoveGenerator): The group's shared move generator
+               before keeping the view.
+        """
+        self.__flush()
+        assert self.__tempViews.get(index, None) is view, LOGGER.error("view is not a temporary view of group %i"%index)
+        generator = self.__generators[self.__generatorIds[index]]
+        self.__tempViews.pop(index, None)
+        self.__views[index]        = view
+        self.__viewsIndexes[index] = view.indexes
+        self.__generatorIds[index] = -1
+        return generator
+
+    def _get_engine(self):
+        """ This is a fullrmc API method to get the table engine."""
+        return self.__engine
+
+    @property
+    def offsets(self):
+        """ Groups CSR-like offsets array of size number of groups+1."""
+        self.__synchronize_views()
+        return self.__offsets
+
+    @property
+    def indexes(self):
+        """ All groups contiguous atoms index array."""
+        self.__synchronize_views()
+        return self.__indexes
+
+    @property
+    def generatorIds(self):
+        """ Groups shared generator id array. Groups of created views
+        are set to -1 as the view's own generator is used."""
+        self.__flush()
+        return self.__generatorIds
+
+    @property
+    def generators(self):
+        """ Shared move generators tuple."""
+        return tuple(self.__generators)
+
+    @property
+    def views(self):
+        """ Created Group views dictionary copy."""
+        return dict(self.__views)
+
+    def copy(self):
+        """
+        Get a shallow copy of the table. Table arrays, shared generators
+        and created views are shared and not copied.
+
+        :Returns:
+            #. table (GroupTable): The groups table copy.
+        """
+        self.__flush()
+        table = GroupTable()
+        table.__offsets      = self.__offsets
+        table.__indexes      = self.__indexes
+        table.__generatorIds = np.array(self.__generatorIds, dtype=INT_TYPE)
+        table.__generators   = list(self.__generators)
+        table.__views        = dict(self.__views)
+        table.__viewsIndexes = dict(self.__viewsIndexes)
+        table.__engine       = self.__engine
+        return table
+
+    def append(self, group):
+        """
+        Append a group to the table. Redundancy of atoms index within
+        the group is not checked here.
+
+        :Parameters:
+            #. group (Group, numpy.ndarray): Group instance or atoms index
+               array. A Group instance is kept as the group's view unless
+               it's a temporary view of a table, in which case it's appended
+               sharing the same move generator.
+        """
+        # temporary views of a table are appended with their shared generator
+        generator = None
+        if isinstance(group, _GroupView):
+            generator = group._get_shared_move_generator()
+        if generator is not None:
+            self.__pending.append( (group.indexes, self.add_generator(generator)) )
+        elif isinstance(group, Group):
+            index   = self.__generatorIds.shape[0] + len(self.__pending)
+            indexes = group.indexes
+            self.__views[index]        = group
+            self.__viewsIndexes[index] = indexes
+            if indexes is None:
+                indexes = np.array([], dtype=INT_TYPE)
+            self.__pending.append( (indexes, -1) )
+            group._set_engine(self.__engine)
+        else:
+            assert isinstance(group, np.ndarray), LOGGER.error("group must be a Group instance or a numpy.ndarray")
+            assert len(group.shape) == 1, LOGGER.error("each group must be a numpy.ndarray of dimension 1")
+            assert len(group), LOGGER.error("group found to have no indexes")
+            self.__pending.append( (group.astype(INT_TYPE), 0) )
+
+    def get_view(self, index, create=False):
+        """
+        Get group's Group instance view.
+
+        :Parameters:
+            #. index (integer): The group index.
+            #. create (boolean): Whether to create a temporary view when no
+               view is kept for the group. If False and no view is kept,
+               None is returned.
+
+        :Returns:
+            #. group (None, Group): The group view.
+        """
+        view = self.__views.get(index, None)
+        if view is not None or not create:
+            return view
+        size = len(self)
+        assert is_integer(index), LOGGER.error("group index must be an integer")
+        index = int(index)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError(LOGGER.error("group index out of range"))
+        view = self.__views.get(index, None)
+        if view is None:
+            view = self.__tempViews.get(index, None)
+        if view is None:
+            view = _GroupView(table=self, index=index, indexes=self.__indexes[self.__offsets[index]:self.__offsets[index+1]])
+            self.__tempViews[index] = view
+        return view
+
+    def get_indexes(self, index):
+        """
+        Get group atoms index without creating a view.
+
+        :Parameters:
+            #. index (integer): The group index.
+
+        :Returns:
+            #. indexes (numpy.ndarray): The group atoms index.
+        """
+        view = self.__views.get(index, None)
+        if view is not None:
+            return view.indexes
+        if self.__pending:
+            self.__flush()
+        return self.__indexes[self.__offsets[index]:self.__offsets[index+1]]
+
+    def get_move_generator(self, index):
+        """
+        Get group move generator without creating a view.
+
+        :Parameters:
+            #. index (integer): The group index.
+
+        :Returns:
+            #. generator (MoveGenerator): The group move generator.
+        """
+        view = self.__views.get(index, None)
+        if view is not None:
+            return view.moveGenerator
+        if self.__pending:
+            self.__flush()
+        return self.__generators[self.__generatorIds[index]]
+
+    def get_relative_indexes(self, index, collector):
+        """
+        Get group's not collected atoms index and their relative index
+        without creating a view. Collector dependant data are computed
+        once for the whole table and recomputed only when collector state
+        changes.
+
+        :Parameters:
+            #. index (integer): The group index.
+            #. collector (_AtomsCollector): The engine's atoms collector.
+
+        :Returns:
+            #. indexes (numpy.ndarray): Not collected group atoms index.
+            #. relativeIndexes (numpy.ndarray): Not collected group atoms
+               relative index.
+        """
+        view = self.__views.get(index, None)
+        if view is not None:
+            return view._get_relative_indexes(collector)
+        if self.__pending:
+            self.__flush()
+        start   = self.__offsets[index]
+        end     = self.__offsets[index+1]
+        indexes = self.__indexes[start:end]
+        if not len(collector):
+            return indexes, indexes
+        state = collector.state
+        if self.__collectorState != state:
+            self.__notCollectedMask     = np.in1d(self.__indexes, collector.indexesSortedArray, invert=True)
+            self.__relativeIndexesArray = collector.get_relative_indexes(self.__indexes).astype(INT_TYPE)
+            self.__collectorState       = state
+        mask = self.__notCollectedMask[start:end]
+        return indexes[mask], self.__relativeIndexesArray[start:end][mask]
+
+    def get_geometry(self, index, coordinates, version=None):
+        """
+        Get group geometric properties for given group atoms coordinates.
+        This is called by the engine before moving a group. Properties are
+        kept per group and reused as long as the same coordinates array is
+        given or, for coordinates taken from the engine, as long as the
+        engine coordinates version didn't change.
+
+        :Parameters:
+            #. index (integer): The group index.
+            #. coordinates (np.ndarray): Group atoms (N,3) coordinates array.
+            #. version (None, object): The engine coordinates version. It
+               must be None if coordinates are not the group's current
+               engine coordinates.
+
+        :Returns:
+            #. geometry (_GroupGeometry): The group geometric properties.
+        """
+        geometry = self.__geometry.get(index, None)
+        if geometry is not None:
+            if geometry.coordinates is coordinates:
+                return geometry
+            if version is not None and geometry.version == version:
+                geometry.coordinates = coordinates
+                return geometry
+        geometry = _GroupGeometry(coordinates, version=version)
+        self.__geometry[index] = geometry
+        return geometry
+
+    def invalidate_geometry(self, index=None):
+        """
+        Invalidate groups geometric properties. This is called by the
+        engine upon setting coordinates.
+
+        :Parameters:
+            #. index (None, integer): The group index. If None, all groups
+               geometric properties are invalidated.
+        """
+        if index is None:
+            self.__geometry = {}
+        else:
+            self.__geometry.pop(index, None)
+
+    def add_generator(self, generator):
+        """
+        Add a shared move generator to the table generators.
+
+        :Parameters:
+            #. generator (MoveGenerator): Move generator instance that is
+               not assigned to any group.
+
+        :Returns:
+            #. generatorId (integer): The shared generator id.
+        """
+        assert isinstance(generator, MoveGenerator), LOGGER.error("generator must be a MoveGenerator instance")
+        assert not isinstance(generator, RemoveGenerator), LOGGER.error("generator must not be a RemoveGenerator instance")
+        assert generator.group is None, LOGGER.error("shared generator must not be assigned to a group")
+        assert not generator._requires_group(), LOGGER.error("shared generator must not require its group to generate moves")
+        for gid, gen in enumerate(self.__generators):
+            if gen is generator:
+                return gid
+        self.__generators.append(generator)
+        return len(self.__generators)-1
+
+    def __prune_generators(self):
+        # remove shared generators no group uses anymore. Default generator
+        # is always kept
+        used    = np.zeros(len(self.__generators), dtype=bool)
+        used[0] = True
+        ids     = self.__generatorIds
+        used[ids[ids!=-1]] = True
+        if np.all(used):
+            return
+        remap = (np.cumsum(used)-1).astype(INT_TYPE)
+        self.__generatorIds = np.where(ids!=-1, remap[ids], ids).astype(INT_TYPE)
+        self.__generators   = [g for g, u in zip(self.__generators, used) if u]
+
+    def set_move_generator(self, generator, groups=None):
+        """
+        Set a shared move generator to groups. Groups already having a
+        view are set the same generator instance except for EmptyGroup
+        views. Shared generators no group uses anymore are removed.
+
+        :Parameters:
+            #. generator (MoveGenerator): Move generator instance that is
+               not assigned to any group.
+            #. groups (None, list, numpy.ndarray): Groups index. If None
+               all groups are considered.
+        """
+        gid = self.add_generator(generator)
+        self.__flush()
+        if groups is None:
+            groups = np.arange(self.__generatorIds.shape[0], dtype=INT_TYPE)
+        else:
+            groups = np.array(groups, dtype=INT_TYPE).reshape((-1,))
+            assert not len(groups) or (np.min(groups)>=0 and np.max(groups)<self.__generatorIds.shape[0]), LOGGER.error("groups index out of range")
+        for idx in groups[self.__generatorIds[groups] == -1]:
+            if not isinstance(self.__views[idx], EmptyGroup):
+                # check generator against the view and keep it shared
+                self.__views[idx].set_move_generator(generator)
+                generator.set_group(None)
+        self.__generatorIds[groups[self.__generatorIds[groups] != -1]] = gid
+        self.__prune_generators()
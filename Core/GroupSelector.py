@@ -484,7 +484,7 @@ class RecursiveGroupSelector(GroupSelector):
             self.__position = 0
             # reset recur
             if self.__override:
-                groupGenerator = self.engine.groups[self.__lastSelectedIndex].moveGenerator
+                groupGenerator = self.engine.groups.get_move_generator(self.__lastSelectedIndex)
                 if isinstance(groupGenerator, PathGenerator):
                     self.__recur = len(groupGenerator.path)
             else:
@@ -11,6 +11,7 @@ possible to fully customize how a group of atoms should move.
 
 # standard libraries imports
 import inspect
+import weakref
 from random import randint, shuffle
 
 # external libraries imports
@@ -18,7 +19,7 @@ import numpy as np
 
 # fullrmc imports
 from fullrmc.Globals import INT_TYPE, FLOAT_TYPE, LOGGER
-from fullrmc.Core.Collection import ListenerBase, is_number, is_integer, get_path, generate_random_float
+from fullrmc.Core.Collection import ListenerBase, is_number, is_integer, get_path, generate_random_float, get_principal_axis
 from fullrmc.Core.Collection import _Container
 
 
@@ -67,6 +68,34 @@ class MoveGenerator(object):
         """
         raise Exception(LOGGER.impl("MovesGenerator '%s' method must be overloaded"%inspect.stack()[0][3]))
 
+    def _set_runtime_geometry(self, geometry):
+        """ This is a fullrmc API method called by the engine to set the
+        selected group geometric properties before moving it and to unset
+        them after. Use with caution and better not to."""
+        self._RT_geometry = geometry
+
+    def _requires_group(self):
+        """ This is a fullrmc API method to get whether the generator needs
+        its group to generate moves. Such a generator can't be shared
+        between groups. Use with caution and better not to."""
+        return False
+
+    def _get_center(self, coordinates):
+        """ Get coordinates geometric center using the selected group
+        shared value when coordinates are the group's ones."""
+        geometry = getattr(self, '_RT_geometry', None)
+        if geometry is not None and geometry.coordinates is coordinates:
+            return geometry.get_center()
+        return np.array(np.sum(coordinates, 0)/coordinates.shape[0], dtype=FLOAT_TYPE)
+
+    def _get_principal_axis(self, coordinates):
+        """ Get coordinates principal axis using the selected group
+        shared value when coordinates are the group's ones."""
+        geometry = getattr(self, '_RT_geometry', None)
+        if geometry is not None and geometry.coordinates is coordinates:
+            return geometry.get_principal_axis()
+        return get_principal_axis(coordinates)
+
     def transform_coordinates(self, coordinates, argument=None):
         """
         Transform coordinates. This method is called to move atoms.
@@ -296,6 +325,156 @@ class RemoveGenerator(MoveGenerator):
         """
         raise Exception(LOGGER.impl("%s '%s' method must be overloaded"%(self.__class__.__name__,inspect.stack()[0][3])))
 
+class _SwapList(object):
+    """
+    Swap list shared between all swap generators created with the same
+    swapList object. It holds the swap sub-lists along with an atom to
+    sub-lists lookup table and the remaining sub-lists having no collected
+    atom. Remaining sub-lists are updated upon engine's atoms collector
+    collect and release events and rebuilt only when an event was missed.
+    For internal use only.
+
+    :Parameters:
+        #. swapList (numpy.ndarray, tuple): The swap sub-lists as a
+           (S, swapLength) integer numpy.ndarray or a tuple of integer
+           numpy arrays.
+        #. hint (None, object): The object swapList was created from.
+    """
+    # all instances are registered to receive collector events
+    __INSTANCES = weakref.WeakSet()
+    # instances created from a hint, keyed by hint id
+    __BY_HINT   = weakref.WeakValueDictionary()
+
+    def __init__(self, swapList, hint=None):
+        self.swapList = swapList
+        self.__hint   = hint
+        # build flat atoms and sub-lists index
+        if isinstance(swapList, np.ndarray):
+            nswaps = swapList.shape[0]
+            atoms  = swapList.ravel()
+            swaps  = np.repeat(np.arange(nswaps, dtype=INT_TYPE), swapList.shape[1])
+        elif len(swapList):
+            nswaps = len(swapList)
+            atoms  = np.concatenate(swapList).astype(INT_TYPE)
+            swaps  = np.repeat(np.arange(nswaps, dtype=INT_TYPE), [len(sl) for sl in swapList])
+        else:
+            nswaps = 0
+            atoms  = np.array([], dtype=INT_TYPE)
+            swaps  = np.array([], dtype=INT_TYPE)
+        # sort by atom index so sub-lists containing an atom are a slice
+        order = np.argsort(atoms, kind='mergesort')
+        self.__lutAtoms = atoms[order]
+        self.__lutSwaps = swaps[order].astype(INT_TYPE)
+        self.__reset_remaining_swaps()
+        # register
+        _SwapList.__INSTANCES.add(self)
+        if hint is not None:
+            _SwapList.__BY_HINT[id(hint)] = self
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_SwapList__hint'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # engine's atoms collector state is not guaranteed to match anymore
+        self.__reset_remaining_swaps()
+        _SwapList.__INSTANCES.add(self)
+
+    def __len__(self):
+        return len(self.swapList)
+
+    @classmethod
+    def get(cls, hint):
+        """ Get swap list created from given hint object if existing."""
+        sl = cls.__BY_HINT.get(id(hint), None)
+        if sl is not None and sl.__hint is hint:
+            return sl
+        return None
+
+    @classmethod
+    def on_collector_collect_atom(cls, index, lastState, state):
+        """ Update all swap lists upon engine's atoms collector atom
+        collection. lastState is the collector state before collection."""
+        for sl in list(cls.__INSTANCES):
+            sl.__on_collector_event(index, lastState, state, collect=True)
+
+    @classmethod
+    def on_collector_release_atom(cls, index, lastState, state):
+        """ Update all swap lists upon engine's atoms collector atom
+        release. lastState is the collector state before release."""
+        for sl in list(cls.__INSTANCES):
+            sl.__on_collector_event(index, lastState, state, collect=False)
+
+    @property
+    def numberOfRemainingSwaps(self):
+        """ Number of sub-lists having no collected atom."""
+        return self.__numberOfValidSwaps
+
+    def __reset_remaining_swaps(self):
+        # all sub-lists are remaining until synchronized with a collector
+        self.__collectorState     = None
+        self.__collectedCount     = None
+        self.__validSwaps         = None
+        self.__validPosition      = None
+        self.__numberOfValidSwaps = len(self.swapList)
+
+    def __on_collector_event(self, index, lastState, state, collect):
+        # remaining swaps are out of sync and will be rebuilt upon request
+        if self.__collectorState is None or self.__collectorState != lastState:
+            return
+        self.__collectorState = state
+        lower = np.searchsorted(self.__lutAtoms, index, side='left')
+        upper = np.searchsorted(self.__lutAtoms, index, side='right')
+        swaps = self.__lutSwaps[lower:upper]
+        if not len(swaps):
+            return
+        if collect:
+            self.__collectedCount[swaps] += 1
+            for swap in swaps[self.__collectedCount[swaps]==1]:
+                # swap removed sub-list with last valid one
+                pos  = self.__validPosition[swap]
+                last = self.__validSwaps[self.__numberOfValidSwaps-1]
+                self.__validSwaps[pos]     = last
+                self.__validPosition[last] = pos
+                self.__validPosition[swap] = -1
+                self.__numberOfValidSwaps -= 1
+        else:
+            self.__collectedCount[swaps] -= 1
+            for swap in swaps[self.__collectedCount[swaps]==0]:
+                self.__validSwaps[self.__numberOfValidSwaps] = swap
+                self.__validPosition[swap] = self.__numberOfValidSwaps
+                self.__numberOfValidSwaps += 1
+
+    def synchronize(self, collector):
+        """ Rebuild remaining swaps if given collector events were missed."""
+        state = collector.state
+        if state == self.__collectorState:
+            return
+        nswaps    = len(self.swapList)
+        collected = collector.indexesSortedArray
+        if len(collected):
+            isCollected = np.in1d(self.__lutAtoms, collected, assume_unique=False)
+            count = np.bincount(self.__lutSwaps[isCollected], minlength=nswaps)
+        else:
+            count = np.zeros(nswaps)
+        self.__collectedCount = count.astype(INT_TYPE)
+        valid = np.where(self.__collectedCount==0)[0].astype(INT_TYPE)
+        self.__validSwaps     = np.zeros(nswaps, dtype=INT_TYPE)
+        self.__validSwaps[:len(valid)] = valid
+        self.__validPosition  = -np.ones(nswaps, dtype=INT_TYPE)
+        self.__validPosition[valid] = np.arange(len(valid), dtype=INT_TYPE)
+        self.__numberOfValidSwaps   = len(valid)
+        self.__collectorState       = state
+
+    def get_random_swap(self):
+        """ Get a random remaining sub-list or None if none is remaining."""
+        if not self.__numberOfValidSwaps:
+            return None
+        swap = self.__validSwaps[ randint(0,self.__numberOfValidSwaps-1) ]
+        return self.swapList[swap]
+
 
 class SwapGenerator(MoveGenerator):
     """
@@ -320,6 +499,9 @@ class SwapGenerator(MoveGenerator):
            If None is given, no swapping or exchanging will be performed.
            If List is given, it must contain lists of atom indexes where every
            sub-list must have the same number of atoms as the group.
+           swapList is stored as a (S, swapLength) integer numpy.ndarray.
+           Sub-lists containing removed atoms are tracked incrementally
+           upon atoms collection and release so picking a swap is O(1).
     """
     def __init__(self, group=None, swapLength=1, swapList=None):
         super(SwapGenerator, self).__init__(group=group)
@@ -330,8 +512,6 @@ class SwapGenerator(MoveGenerator):
         #  initialize swapping variables
         self.__groupAtomsIndexes = None
         self.__swapAtomsIndexes  = None
-        # reset collector state
-        self._collectorState = None
 
     @property
     def swapLength(self):
@@ -340,7 +520,7 @@ class SwapGenerator(MoveGenerator):
 
     @property
     def swapList(self):
-        """ Swap list."""
+        """ Swap list numpy.ndarray of shape (S, swapLength)."""
         return self.__swapList
 
     @property
@@ -353,6 +533,35 @@ class SwapGenerator(MoveGenerator):
         """ Last swap atoms index."""
         return self.__swapAtomsIndexes
 
+    @property
+    def numberOfRemainingSwaps(self):
+        """ Number of swapList sub-lists having no collected atom as of
+        the last engine collector synchronization."""
+        return self.__swapListState.numberOfRemainingSwaps
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # swap generators saved before swap lists were shared must have
+        # their swap list state created
+        if '_SwapGenerator__swapListState' not in state:
+            for name in ('_remainingAtomsSwapList', '_collectorState', '_SwapGenerator__lutAtoms',
+                         '_SwapGenerator__lutSwaps', '_SwapGenerator__collectedCount',
+                         '_SwapGenerator__validSwaps', '_SwapGenerator__validPosition',
+                         '_SwapGenerator__numberOfValidSwaps', '_SwapGenerator__collectedIndexes'):
+                self.__dict__.pop(name, None)
+            self._update_swap_list( self.__dict__.get('_SwapGenerator__swapList', ()) )
+
+    def _update_swap_list(self, swapList, hint=None):
+        """ Set swap list and its shared state. Swap generators created
+        with the same swapList object share the same state.
+        For internal use only."""
+        if isinstance(swapList, _SwapList):
+            state = swapList
+        else:
+            state = _SwapList(swapList, hint=hint)
+        self.__swapListState = state
+        self.__swapList      = state.swapList
+
     def set_swap_length(self, swapLength):
         """
         Set swap length. it will empty and reset swaplist automatically.
@@ -366,11 +575,7 @@ class SwapGenerator(MoveGenerator):
         swapLength = INT_TYPE(swapLength)
         assert swapLength>0, LOGGER.error("swapLength must be bigger than 0")
         self.__swapLength = swapLength
-        self.__swapList   = ()
-        # set uncollected atoms swapList
-        self._remainingAtomsSwapList  = self.__swapList
-        # reset collector state
-        self._collectorState = None
+        self._update_swap_list( np.zeros((0,swapLength), dtype=INT_TYPE) )
 
     def set_group(self, group):
         """
@@ -388,26 +593,35 @@ class SwapGenerator(MoveGenerator):
         Set the swap-list to exchange atoms position from.
 
         :Parameters:
-            #. swapList (None, List): The list of atoms.\n
+            #. swapList (None, List, numpy.ndarray): The list of atoms.\n
                If None is given, no swapping or exchanging will be performed.\n
                If List is given, it must contain lists of atom indexes where
-               every sub-list length must be equal to swapLength.
+               every sub-list length must be equal to swapLength.\n
+               If numpy.ndarray is given, it must be a two dimensional
+               integer array of shape (S, swapLength).
         """
-        C = _Container()
-        # add container
-        if not C.is_container('swapList'):
-            C.add_container('swapList')
         # check if swapList already defined
-        loc = C.get_location_by_hint(swapList)
-        if loc is not None:
-            self.__swapList = C.get_value(loc)
+        SL = _SwapList.get(swapList)
+        if SL is not None:
+            self._update_swap_list(SL)
+            return
         elif swapList is None:
-            self.__swapList = ()
+            SL = ()
+        elif isinstance(swapList, np.ndarray):
+            assert len(swapList.shape) == 2, LOGGER.error("swapList numpy.ndarray must be two dimensional")
+            assert 'int' in swapList.dtype.name, LOGGER.error("swapList numpy.ndarray must be of integer type")
+            assert np.all(swapList>=0), LOGGER.error("swapList sub-list items must be positive")
+            if self.swapLength is not None:
+                assert swapList.shape[1] == self.swapLength, LOGGER.error("swapList item length must be equal to swapLength")
+            SL = np.array(swapList, dtype=INT_TYPE)
+            if SL.shape[1]>1:
+                sortedSL = np.sort(SL, axis=1)
+                assert not np.any(sortedSL[:,1:]==sortedSL[:,:-1]), LOGGER.error("swapList items must not have any redundancy")
         else:
             SL = []
             assert isinstance(swapList, (list,tuple)), LOGGER.error("swapList must be a list")
             for sl in swapList:
-                assert isinstance(sl, (list,tuple)), LOGGER.error("swapList items must be a list")
+                assert isinstance(sl, (list,tuple,np.ndarray)), LOGGER.error("swapList items must be a list")
                 subSL = []
                 for num in sl:
                     assert is_integer(num), LOGGER.error("swapList sub-list items must be integers")
@@ -418,13 +632,18 @@ class SwapGenerator(MoveGenerator):
                 if self.swapLength is not None:
                     assert len(subSL) == self.swapLength, LOGGER.error("swapList item length must be equal to swapLength")
                 SL.append(np.array(subSL, dtype=INT_TYPE))
-            self.__swapList = tuple(SL)
-            # add swapList to container
-            C.set_value(container='swapList', value=self.__swapList, hint=swapList)
-        # set uncollected atoms swapList
-        self._remainingAtomsSwapList  = self.__swapList
-        # reset collector state
-        self._collectorState = None
+            # sub-lists of different lengths are only allowed when swapLength
+            # is None and are kept as a tuple of numpy arrays
+            if self.swapLength is not None:
+                SL = np.array(SL, dtype=INT_TYPE).reshape((-1,self.swapLength))
+            elif len(set([len(sl) for sl in SL])) == 1:
+                SL = np.array(SL, dtype=INT_TYPE)
+            else:
+                SL = tuple(SL)
+        # set swap list. swapList object is kept as hint to share it
+        if self.swapLength is not None and not len(SL):
+            SL = np.zeros((0,self.swapLength), dtype=INT_TYPE)
+        self._update_swap_list(SL, hint=swapList)
 
     def append_to_swap_list(self, subList):
         """
@@ -442,58 +661,16 @@ class SwapGenerator(MoveGenerator):
             assert num>=0, LOGGER.error("subList items must be positive")
             subSL.append(num)
         assert len(set(subSL))==len(subSL), LOGGER.error("swapList items must not have any redundancy")
-        assert len(subSL) == self.__swapLength, LOGGER.error("swapList item length must be equal to swapLength")
+        if self.swapLength is not None:
+            assert len(subSL) == self.swapLength, LOGGER.error("swapList item length must be equal to swapLength")
         # append
-        self.__swapList = list(self.__swapList)
         subSL = np.array(subSL, dtype=INT_TYPE)
-        self.__swapList.append(subSL)
-        self.__swapList = tuple(self.__swapList)
-        # set uncollected atoms swapList
-        self._remainingAtomsSwapList  = self.__swapList
-        # reset collector state
-        self._collectorState = None
-
-    def _set_remaining_atoms_swap_list(self, engine):
-        collectorState = engine._atomsCollector.state
-        # check engine's atomsCollector state
-        if collectorState == self._collectorState or not len(engine._atomsCollector):
-            self._collectorState = collectorState
-            return
-        C = _Container()
-        # add container
-        if not C.is_container('swapList'):
-            C.add_container('swapList')
-        # get swapList location
-        loc = C.get_location_by_hint(self.swapList)
-        # if location exists
-        if loc is not None:
-            remainingAtomsSwapList = C.get_value(loc)
-            # it must be a dict
-            if not isinstance(remainingAtomsSwapList, dict):
-                remainingAtomsSwapList = None
-            # collector state must be the same as engineCollectorState
-            elif remainingAtomsSwapList['collectorState'] != collectorState:
-                remainingAtomsSwapList = None
-            # if same as engineCollectorState
-            else:
-                remainingAtomsSwapList = remainingAtomsSwapList['remainingAtomsSwapList']
-        # if location doesn't exit
+        SL    = self.__swapList
+        if isinstance(SL, np.ndarray) and (not len(SL) or SL.shape[1]==len(subSL)):
+            SL = np.concatenate( (SL.reshape((-1,len(subSL))), subSL.reshape((1,-1))) )
         else:
-            remainingAtomsSwapList = None
-        # in case swapList needs to be rebuilt
-        if remainingAtomsSwapList is None:
-            remainingAtomsSwapList = []
-            for sl in self.swapList:
-                if engine._atomsCollector.any_collected(sl):
-                    continue
-                remainingAtomsSwapList.append(sl)
-            # add to container
-            value = {'remainingAtomsSwapList':remainingAtomsSwapList, 'collectorState':collectorState}
-            C.set_value(container='swapList', value=value, hint=self.swapList)
-        # set remainingAtomsSwapList
-        self._remainingAtomsSwapList = remainingAtomsSwapList
-        # update collectorState
-        self._collectorState = collectorState
+            SL = tuple(SL) + (subSL,)
+        self._update_swap_list(SL)
 
     def get_ready_for_move(self, engine, groupAtomsIndexes):
         """
@@ -513,14 +690,13 @@ class SwapGenerator(MoveGenerator):
             #. indexes (numpy.ndarray): All the atoms involved in the swap move
                including the given groupAtomsIndexes.
         """
-        # update and set _remainingAtomsSwapList and _collectorState
-        self._set_remaining_atoms_swap_list(engine=engine)
+        # rebuild remaining swaps only if collector events were missed
+        self.__swapListState.synchronize(engine._atomsCollector)
         # select
         self.__groupAtomsIndexes = groupAtomsIndexes
         # check if existing atoms swap list is not empty. if not swap with itself.
-        if len(self._remainingAtomsSwapList):
-            self.__swapAtomsIndexes  = self._remainingAtomsSwapList[ randint(0,len(self._remainingAtomsSwapList)-1) ]
-        else:
+        self.__swapAtomsIndexes = self.__swapListState.get_random_swap()
+        if self.__swapAtomsIndexes is None:
             self.__swapAtomsIndexes = self.__groupAtomsIndexes
         return np.concatenate( (self.__groupAtomsIndexes,self.__swapAtomsIndexes) )
 
@@ -730,6 +906,18 @@ class MoveGeneratorCombinator(MoveGenerator):
         for mg in self.__combination:
             mg.set_group(group)
 
+    def _set_runtime_geometry(self, geometry):
+        """ This is a fullrmc API method called by the engine to set the
+        selected group geometric properties to all combined generators."""
+        MoveGenerator._set_runtime_geometry(self, geometry)
+        for mg in self.__combination:
+            mg._set_runtime_geometry(geometry)
+
+    def _requires_group(self):
+        """ This is a fullrmc API method to get whether any combined
+        generator needs its group to generate moves."""
+        return any([mg._requires_group() for mg in self.__combination])
+
     def set_combination(self, combination):
         """
         Set the generators combination list.
@@ -891,6 +1079,18 @@ class MoveGeneratorCollector(MoveGenerator):
         for mg in self.__collection:
             mg.set_group(group)
 
+    def _set_runtime_geometry(self, geometry):
+        """ This is a fullrmc API method called by the engine to set the
+        selected group geometric properties to all collected generators."""
+        MoveGenerator._set_runtime_geometry(self, geometry)
+        for mg in self.__collection:
+            mg._set_runtime_geometry(geometry)
+
+    def _requires_group(self):
+        """ This is a fullrmc API method to get whether any collected
+        generator needs its group to generate moves."""
+        return any([mg._requires_group() for mg in self.__collection])
+
     def check_group(self, group):
         """
         Check the generator's group. This methods always returns True
@@ -14,9 +14,9 @@ import os
 import time
 import sys
 import uuid
-import tempfile
-import multiprocessing
 import copy
+from collections import namedtuple
+from itertools import islice
 
 # external libraries imports
 import numpy as np
@@ -33,14 +33,20 @@ from __pkginfo__ import __version__
 from Globals import INT_TYPE, FLOAT_TYPE, LOGGER
 from Core.boundary_conditions_collection import transform_coordinates
 from Core.Collection import Broadcaster, is_number, is_integer, get_elapsed_time, generate_random_float
-from Core.Collection import _AtomsCollector, _Container
-from Core.Constraint import Constraint, SingularConstraint, RigidConstraint
-from Core.Group import Group, EmptyGroup
-from Core.MoveGenerator import SwapGenerator, RemoveGenerator
+from Core.Collection import _AtomsCollector, _Container, _CompressedRepository
+from Core.Constraint import Constraint, SingularConstraint, RigidConstraint, _BondedTermsEvaluator
+from Core.Group import Group, EmptyGroup, GroupTable
+from Core.MoveGenerator import SwapGenerator, RemoveGenerator, _SwapList
 from Core.GroupSelector import GroupSelector
 from Selectors.RandomSelectors import RandomSelector
 
 
+# read-only engine run statistics passed to Engine.run callback
+RunStatistics = namedtuple('RunStatistics', ['step', 'generated', 'tried', 'accepted', 'removed',
+                                             'totalStandardError', 'bestTotalStandardError',
+                                             'elapsedTime'])
+
+
 class Engine(object):
     """
     fulrmc's engine, is used to launch a stochastic modelling which is
@@ -159,6 +165,7 @@ class Engine(object):
             assert result, LOGGER.error(message)
         self.__path       = path
         self.__repository = None
+        self.__repositoryCodec = None
 
         # initialize atoms collector
         dataKeys = ('realCoordinates', 'boxCoordinates',
@@ -174,9 +181,10 @@ class Engine(object):
         self.__broadcaster   = Broadcaster()
         self.__constraints   = []
         self.__state         = time.time()
-        self.__groups        = []
+        self.__groups        = GroupTable()
         self.__groupSelector = None
         self.__tolerance     = 0.
+        self.__precision     = FLOAT_TYPE
 
         # set mustSave flag, it indicates  whether saving whole engine is needed before running
         self.__mustSave = False
@@ -186,7 +194,11 @@ class Engine(object):
         self.set_pdb(pdb=None)
 
         # create runtime variables and arguments
-        self._runtime_ncores = INT_TYPE(1)
+        self._runtime_ncores              = INT_TYPE(1)
+        self._runtime_measureConstraints  = False
+        self._runtime_logAccepted         = True
+        self._runtime_logRejected         = True
+        self._runtime_logNotTried         = True
 
         # set LOGGER file path
         if logFile is not None:
@@ -205,9 +217,22 @@ class Engine(object):
                 continue
             if k in self.FRAME_DATA:
                 continue
+            if k == '_Engine__lazyData':
+                continue
             state[k] = v
         return state
 
+    def __getattr__(self, name):
+        # only called when attribute is not found. Lazily loaded engine
+        # data are pulled from the repository upon first access
+        lazyData = self.__dict__.get('_Engine__lazyData', None)
+        if not lazyData or name not in lazyData:
+            raise AttributeError("'%s' object has no attribute '%s'"%(self.__class__.__name__, name))
+        relativePath = lazyData.pop(name)
+        value = self.__dict__['_Engine__repository'].pull(relativePath=relativePath, name=name)
+        object.__setattr__(self, name, value)
+        return value
+
     def __get_normalized_frames_name(self, frames, raiseExisting=True):
         if not isinstance(frames, (list,set,tuple)):
             frames = [frames]
@@ -250,6 +275,7 @@ class Engine(object):
             assert is_integer(ncores), LOGGER.error("ncores must be an integer")
             ncores = INT_TYPE(ncores)
             assert ncores>0, LOGGER.error("ncores must be > 0")
+            import multiprocessing
             if ncores > multiprocessing.cpu_count():
                 LOGGER.warn("ncores '%s' is reset to %s which is the number of available cores on your machine"%(ncores, multiprocessing.cpu_count()))
                 ncores = INT_TYPE(multiprocessing.cpu_count())
@@ -293,7 +319,16 @@ class Engine(object):
         self.__path = path
 
     def _set_repository(self, repo):
-        self.__repository = repo
+        self.__repository = self.__get_codec_repository(repo)
+
+    def __get_codec_repository(self, repository):
+        # wrap repository to compress dumped arrays when a codec is set
+        if isinstance(repository, _CompressedRepository):
+            repository = repository.repository
+        codec = self.__dict__.get('_Engine__repositoryCodec', None)
+        if repository is None or codec is None:
+            return repository
+        return _CompressedRepository(repository, **codec)
 
     def _get_repository(self):
         return self.__repository
@@ -319,12 +354,16 @@ class Engine(object):
         dataDict['allNames']         = self.__allNames[relativeIndex]
         assert self.__numberOfAtomsPerElement[dataDict['allElements']]-1>0, LOGGER.error("Collecting last atom of any element type is not allowed. It's better to restart your simulation without any '%s' rather than removing them all!"%dataDict['allElements'])
         # collect atom
+        lastState = self._atomsCollector.state
         self._atomsCollector.collect(index=realIndex, dataDict=dataDict)
+        # update swap lists remaining swaps
+        _SwapList.on_collector_collect_atom(realIndex, lastState, self._atomsCollector.state)
         # collect all constraints BEFORE removing data from engine.
         for c in self.__constraints:
             c._on_collector_collect_atom(realIndex=realIndex)
         # remove data from engine AFTER collecting constraints data.
         self.__realCoordinates = np.delete(self.__realCoordinates, relativeIndex, axis=0)
+        self.__ownsCoordinates = True
         self.__boxCoordinates  = np.delete(self.__boxCoordinates,  relativeIndex, axis=0)
         self.__moleculesIndex  = np.delete(self.__moleculesIndex,relativeIndex, axis=0)
         self.__moleculesName.pop(relativeIndex)
@@ -344,12 +383,16 @@ class Engine(object):
         # get relative index
         relativeIndex = self._atomsCollector.get_relative_index(realIndex)
         # get dataDict
-        dataDict = self._atomsCollector.release(realIndex)
+        lastState = self._atomsCollector.state
+        dataDict  = self._atomsCollector.release(realIndex)
+        # update swap lists remaining swaps
+        _SwapList.on_collector_release_atom(realIndex, lastState, self._atomsCollector.state)
         # release all constraints
         for c in self.__constraints:
             c._on_collector_release_atom(realIndex=realIndex)
         # re-insert data
         self.__realCoordinates = np.insert(self.__realCoordinates,  relativeIndex, dataDict["realCoordinates"], axis=0)
+        self.__ownsCoordinates = True
         self.__boxCoordinates  = np.insert(self.__boxCoordinates,   relativeIndex, dataDict["boxCoordinates"],  axis=0)
         self.__moleculesIndex  = np.insert(self.__moleculesIndex, relativeIndex, dataDict["moleculesIndex"],axis=0)
         self.__moleculesName.insert(relativeIndex, dataDict["moleculesName"])
@@ -390,14 +433,14 @@ class Engine(object):
         """ The last moved group instance. """
         if self.__lastSelectedGroupIndex is None:
             return None
-        return self.__groups[self.__lastSelectedGroupIndex]
+        return self.groups[self.__lastSelectedGroupIndex]
 
     @property
     def lastSelectedAtomsIndex(self):
         """ The last moved atoms index. """
         if self.__lastSelectedGroupIndex is None:
             return None
-        return self.lastSelectedGroup.indexes
+        return self.groups.get_indexes(self.__lastSelectedGroupIndex)
 
     @property
     def state(self):
@@ -435,9 +478,21 @@ class Engine(object):
         """ Tolerance in percent. """
         return self.__tolerance*100.
 
+    @property
+    def precision(self):
+        """ Floating data type used by constraints to accumulate their
+        data upon accepted moves. Engines created before precision was
+        introduced use FLOAT_TYPE."""
+        return self.__dict__.get('_Engine__precision', FLOAT_TYPE)
+
     @property
     def groups(self):
-        """ Engine's defined groups list. """
+        """ Engine's defined groups table. Group instances are created
+        upon indexing or iterating."""
+        if not isinstance(self.__groups, GroupTable):
+            # engines saved with groups list
+            self.__groups = GroupTable(list(self.__groups))
+            self.__groups._set_engine(self)
         return self.__groups
 
     @property
@@ -684,7 +739,7 @@ class Engine(object):
         LOGGER.saved("Runtime saving frame %s... DON'T INTERRUPT"%frame)
         # dump engine's used frame FRAME_DATA
         for dname in self.RUNTIME_DATA:
-            value = self.__dict__[dname]
+            value = getattr(self, dname)
             #name  = dname.split('_Engine__')[1]
             name = dname
             #tic = time.time()
@@ -696,7 +751,7 @@ class Engine(object):
             #print c.__class__.__name__, cp
             #self.__repository.add_directory( cp )
             for dname in c.RUNTIME_DATA:
-                value = c.__dict__[dname]
+                value = getattr(c, dname)
                 #name  = dname.split('__')[1]
                 name = dname
                 #tic = time.time()
@@ -741,6 +796,7 @@ class Engine(object):
         # engine loaded or saved before
         else:
             REP = self.__repository
+        REP = self.__get_codec_repository(REP)
         # create repository frames
         if (self.__repository is None) or (path is not None and copyFrames):
             for frame in self.__frames:
@@ -752,13 +808,13 @@ class Engine(object):
         REP.dump(value=self, relativePath='.', name='engine', replace=True)
         # dump used frame ENGINE_DATA
         for dname in self.ENGINE_DATA:
-            value = self.__dict__[dname]
+            value = getattr(self, dname)
             #name  = dname.split('_Engine__')[1]
             name = dname
             REP.dump(value=value, relativePath='.', name=name, replace=True)
         # dump engine's used frame FRAME_DATA
         for dname in self.FRAME_DATA:
-            value = self.__dict__[dname]
+            value = getattr(self, dname)
             #name  = dname.split('_Engine__')[1]
             name = dname
             REP.dump(value=value, relativePath=self.__usedFrame, name=name, replace=True)
@@ -772,7 +828,7 @@ class Engine(object):
             cp = os.path.join(self.__usedFrame, 'constraints', c.constraintId)
             REP.add_directory( cp )
             for dname in c.FRAME_DATA:
-                value = c.__dict__[dname]
+                value = getattr(c, dname)
                 #name  = dname.split('__')[1]
                 name = dname
                 REP.dump(value=value, relativePath=cp, name=name, replace=True)
@@ -792,7 +848,7 @@ class Engine(object):
         # engine saved
         LOGGER.saved("Engine and frame %s data saved successfuly to '%s'"%(self.__usedFrame, self.__path) )
 
-    def load(self, path):
+    def load(self, path, lazy=False):
         """
         Load and return engine instance. None of the current engine attribute
         will be updated. must be used as the following:
@@ -806,13 +862,23 @@ class Engine(object):
             # create engine
             ENGINE = Engine().load(path)
 
+            # lazily load engine to inspect it quickly
+            ENGINE = Engine().load(path, lazy=True)
+            print ENGINE.totalStandardError
+
 
         :Parameters:
             #. path (string): Directory path to save the engine.
+            #. lazy (boolean): Whether to pull engine's and constraints' used
+               frame data from the repository upon first access only rather
+               than at loading time. Lazily loaded engines can be fully pulled
+               at once using materialize method, which is automatically
+               called by run method.
 
         :Returns:
             #. engine (Engine): Engine instance.
         """
+        assert isinstance(lazy, bool), LOGGER.error("lazy must be boolean")
         # check whether an engine exists at this path
         isEngine, REP, message = self.is_engine(path=path, repo=True, mes=True)
         if not isEngine:
@@ -827,6 +893,21 @@ class Engine(object):
         for name in engine.ENGINE_DATA:
             value = REP.pull(relativePath='.', name=name)
             object.__setattr__(engine, name, value)
+        # pull precision set after engine was last saved. Repositories
+        # created before precision was introduced don't have it
+        if os.path.isfile(os.path.join(path, '_Engine__precision')):
+            value = REP.pull(relativePath='.', name='_Engine__precision')
+        else:
+            value = engine.precision
+        object.__setattr__(engine, '_Engine__precision', value)
+        # lazy loading, register engine's and constraints' FRAME_DATA to be pulled upon access
+        if lazy:
+            object.__setattr__(engine, '_Engine__lazyData', dict([(name, engine.usedFrame) for name in engine.FRAME_DATA]))
+            for c in engine.constraints:
+                cp = os.path.join(engine.usedFrame, 'constraints', c.constraintId)
+                c._set_lazy_data(repository=REP, relativePath=cp)
+            object.__setattr__(engine, '_Engine__mustSave', False)
+            return engine
         # pull engine's FRAME_DATA
         for name in engine.FRAME_DATA:
             value = REP.pull(relativePath=engine.usedFrame, name=name)
@@ -844,6 +925,31 @@ class Engine(object):
         # return engine instance
         return engine
 
+    @property
+    def isMaterialized(self):
+        """ Whether all engine's and constraints' used frame data are
+        pulled from the repository."""
+        if self.__dict__.get('_Engine__lazyData', None):
+            return False
+        return not any([c._has_lazy_data() for c in self.__constraints])
+
+    def materialize(self):
+        """
+        Pull all engine's and constraints' used frame data that are not
+        pulled yet from the repository. This is only needed for engines
+        loaded with lazy flag set to True and it's automatically called
+        by run method.
+        """
+        lazyData = self.__dict__.get('_Engine__lazyData', None)
+        if lazyData is not None:
+            for name in list(lazyData):
+                getattr(self, name)
+            object.__setattr__(self, '_Engine__lazyData', None)
+            # set engine group selector
+            self.__groupSelector.set_engine(self)
+        for c in self.__constraints:
+            c._materialize()
+
     def set_log_file(self, logFile):
         """
         Set the log file basename.
@@ -872,7 +978,7 @@ class Engine(object):
                 LOGGER.warn("Using frame '%s' data to create '%s' frame '%s' data."%(self.__usedFrame, this.__class__.__name__, frame))
                 # create frame data
                 for name in this.FRAME_DATA:
-                    value = this.__dict__[name]
+                    value = getattr(this, name)
                     self.__repository.dump(value=value, relativePath=relativePath, name=name, replace=True)
         # check engine frame data
         check_set_or_raise(this=self, relativePath=frame)
@@ -989,6 +1095,9 @@ class Engine(object):
                     value = self.__repository.pull(relativePath=cp, name=name)
                     # set data
                     object.__setattr__(c, dname, value)
+                c._set_lazy_data(None)
+            # all frame data are pulled
+            object.__setattr__(self, '_Engine__lazyData', None)
         # set engine to specific frame data
         self.__groupSelector.set_engine(self)
         # save used frames to disk
@@ -1084,6 +1193,186 @@ class Engine(object):
         if self.__repository is not None:
             self.__repository.dump(value=self.__tolerance, relativePath='.', name='_Engine__tolerance', replace=True)
 
+    def set_repository_codec(self, codec=None, level=6, shuffle=True, minimumSize=65536):
+        """
+        Set engine's repository compression codec. Once set, all numerical
+        numpy arrays dumped to the repository, such as atoms coordinates
+        and constraints data, original data and shape arrays, are stored
+        compressed. Compressed arrays are decompressed transparently upon
+        loading. Arrays dumped prior to setting a codec remain uncompressed
+        until they are dumped again.
+
+        :Parameters:
+            #. codec (None, string, dict): Compression codec. If None is given
+               arrays are stored uncompressed. 'zlib' is fast while 'bz2'
+               compresses better at a higher CPU cost. If dict is given, keys
+               are dumped data names such as '_Engine__realCoordinates' or
+               '_Constraint__originalData' and values are codecs or None to
+               choose the CPU to I/O trade per data. None key sets the codec
+               of all other names.
+            #. level (integer): Compression level between 1 and 9.
+            #. shuffle (boolean): Whether to byte shuffle arrays before
+               compressing. This groups together bytes of the same
+               significance which greatly improves floating data compression.
+            #. minimumSize (integer): Minimum array size in bytes to compress.
+        """
+        codec = {'codec':codec, 'level':level, 'shuffle':shuffle, 'minimumSize':minimumSize}
+        # check codec arguments
+        _CompressedRepository(None, **codec)
+        if codec['codec'] is None:
+            codec = None
+        self.__repositoryCodec = codec
+        self.__repository      = self.__get_codec_repository(self.__repository)
+        # save engine to disk
+        if self.__repository is not None:
+            self.__repository.dump(value=self, relativePath='.', name='engine', replace=True)
+
+    def set_precision(self, precision):
+        """
+        Set engine's constraints data accumulation precision. Atoms
+        coordinates and compiled kernels always use fullrmc FLOAT_TYPE.
+        Constraints data are updated upon every accepted move as
+        data-before+after which accumulates floating rounding errors over
+        millions of moves. Setting precision to numpy.float64 makes
+        constraints store and accumulate their data in double precision.
+
+        :Parameters:
+            #. precision (string, type): Floating data type. Can be
+               numpy.float32, numpy.float64, 'float32' or 'float64'.
+        """
+        if isinstance(precision, basestring):
+            assert precision in ('float32','float64'), LOGGER.error("precision string must be 'float32' or 'float64'")
+            precision = getattr(np, precision)
+        assert precision in (np.float32, np.float64), LOGGER.error("precision must be numpy.float32 or numpy.float64")
+        if precision is np.float32:
+            precision = FLOAT_TYPE
+        self.__precision = precision
+        # save precision to disk
+        if self.__repository is not None:
+            self.__repository.dump(value=self.__precision, relativePath='.', name='_Engine__precision', replace=True)
+        # cast constraints data
+        for c in self.__constraints:
+            if c.data is not None:
+                c.set_data(c.data)
+
+    def __get_drift_gap(self, incremental, full):
+        if isinstance(incremental, dict) and isinstance(full, dict):
+            gaps = [self.__get_drift_gap(incremental[k], full[k]) for k in incremental if k in full]
+            return max(gaps) if len(gaps) else 0.
+        if isinstance(incremental, np.ndarray) and isinstance(full, np.ndarray):
+            if incremental.shape != full.shape or not incremental.size:
+                return 0.
+            return float( np.max(np.abs(incremental.astype(np.float64)-full)) )
+        if is_number(incremental) and is_number(full):
+            return abs(float(incremental)-float(full))
+        return 0.
+
+    def __copy_constraint_runtime_value(self, value):
+        # arrays are copied, constraints runtime buffers can be filled
+        # in place. Other objects such as engine or constraints references
+        # are kept as is
+        if isinstance(value, np.ndarray):
+            return np.array(value)
+        elif isinstance(value, dict):
+            return dict([(k, self.__copy_constraint_runtime_value(v)) for k, v in value.items()])
+        elif isinstance(value, (list, tuple)):
+            return type(value)([self.__copy_constraint_runtime_value(v) for v in value])
+        return value
+
+    def __get_constraint_incremental_state_names(self, constraint):
+        # compute_data rewrites constraint runtime data, runtime buffers
+        # and caches and may refit experimental constraints scale factor
+        names = [n for n in constraint.RUNTIME_DATA if n != '_atomsCollector']
+        names.extend( [n for n in constraint.__dict__ if n.startswith('_RT_')] )
+        names.append('_fittedScaleFactor')
+        return set(names)
+
+    def __get_constraint_incremental_state(self, constraint):
+        names      = self.__get_constraint_incremental_state_names(constraint)
+        attributes = dict([(n, self.__copy_constraint_runtime_value(constraint.__dict__[n])) for n in names if n in constraint.__dict__])
+        return {'data'         :attributes.get('_Constraint__data', None),
+                'standardError':attributes.get('_Constraint__standardError', None),
+                'attributes'   :attributes}
+
+    def __restore_constraint_incremental_state(self, constraint, state):
+        attributes = state['attributes']
+        for n in self.__get_constraint_incremental_state_names(constraint):
+            if n not in attributes:
+                constraint.__dict__.pop(n, None)
+        constraint.__dict__.update(attributes)
+
+    def check_drift(self, constraints=None):
+        """
+        Measure the gap between constraints incrementally updated data and
+        a full recomputation from current atoms coordinates. Constraints
+        data, standard error, runtime buffers and caches are restored after
+        measuring, therefore calling this method does not re-anchor
+        constraints.
+
+        :Parameters:
+            #. constraints (None, list): The constraints to check. If None
+               is given, all used constraints will be checked.
+
+        :Returns:
+            #. drift (dict): Constraints drift where keys are constraints id
+               and values are dictionaries of 'data', the maximum absolute
+               difference found in constraint data and 'standardError',
+               the absolute difference of the constraint standard error.
+        """
+        get_gap = self.__get_drift_gap
+        if constraints is None:
+            constraints = self.get_used_constraints()[0]
+        drift = {}
+        for c in constraints:
+            if c.data is None:
+                continue
+            state = self.__get_constraint_incremental_state(c)
+            c.compute_data()
+            gap = {'data'         :get_gap(state['data'], c.data),
+                   'standardError':get_gap(state['standardError'], c.standardError)}
+            drift[c.constraintId] = gap
+            LOGGER.info("Drift check '%s' data gap is %.6e and standard error gap is %.6e"%(c.constraintId, gap['data'], gap['standardError']))
+            # restore incremental data
+            self.__restore_constraint_incremental_state(c, state)
+        return drift
+
+    def resync_constraint(self, constraint, threshold=None):
+        """
+        Replace constraint incrementally updated data by a full
+        recomputation from current atoms coordinates, cancelling the
+        floating point error accumulated over accepted moves.
+
+        :Parameters:
+            #. constraint (Constraint): The constraint to resynchronize.
+            #. threshold (None, number): If None is given, full
+               recomputation is always kept. Otherwise it is only kept
+               when the maximum absolute data difference exceeds threshold
+               and incremental data, standard error, runtime buffers and
+               caches are restored otherwise.
+
+        :Returns:
+            #. gap (None, dict): None if constraint has no data yet.
+               Otherwise the drift dictionary as returned by check_drift
+               for this constraint with an extra 'applied' key.
+        """
+        if threshold is not None:
+            assert is_number(threshold), LOGGER.error("threshold must be None or a number")
+            threshold = float(threshold)
+            assert threshold>=0, LOGGER.error("threshold must be positive")
+        if constraint.data is None:
+            return None
+        state = self.__get_constraint_incremental_state(constraint)
+        constraint.compute_data()
+        gap = {'data'         :self.__get_drift_gap(state['data'], constraint.data),
+               'standardError':self.__get_drift_gap(state['standardError'], constraint.standardError)}
+        gap['applied'] = threshold is None or gap['data']>threshold
+        if gap['applied']:
+            LOGGER.info("Resync '%s' data gap is %.6e and standard error gap is %.6e, full recomputation applied"%(constraint.constraintId, gap['data'], gap['standardError']))
+        else:
+            LOGGER.info("Resync '%s' data gap is %.6e and standard error gap is %.6e, incremental data kept"%(constraint.constraintId, gap['data'], gap['standardError']))
+            self.__restore_constraint_incremental_state(constraint, state)
+        return gap
+
     def set_group_selector(self, selector):
         """
         Set engine's group selector instance.
@@ -1113,7 +1402,8 @@ class Engine(object):
     def clear_groups(self):
         """ Clear all engine's defined groups.
         """
-        self.__groups = []
+        self.__groups = GroupTable()
+        self.__groups._set_engine(self)
         # save groups to repository
         if self.__repository is not None:
             self.__repository.dump(value=self.__groups, relativePath=self.__usedFrame, name='_Engine__groups', replace=True)
@@ -1136,13 +1426,14 @@ class Engine(object):
         elif is_integer(g):
             g = INT_TYPE(g)
             assert g<self.__pdb.numberOfAtoms, LOGGER.error("group index must be smaller than number of atoms in pdb")
-            gr = Group(indexes= [g] )
+            gr = np.array([g], dtype=INT_TYPE)
         elif isinstance(g, (list, set, tuple)):
-            sortedGroup = sorted(set(g))
+            sortedGroup = np.unique(np.array(list(g)))
+            assert len(sortedGroup), LOGGER.error("group found to have no indexes")
             assert len(sortedGroup) == len(g), LOGGER.error("redundant indexes found in group")
-            assert is_integer(sortedGroup[-1]), LOGGER.error("group indexes must be integers")
+            assert sortedGroup.dtype.kind in ('i','u'), LOGGER.error("group indexes must be integers")
             assert sortedGroup[-1]<self.__pdb.numberOfAtoms, LOGGER.error("group index must be smaller than number of atoms in pdb")
-            gr = Group(indexes= sortedGroup )
+            gr = sortedGroup.astype(INT_TYPE)
         else:
             assert isinstance(g, np.ndarray), LOGGER.error("each group in groups can be either a list, set, tuple, numpy.ndarray or fullrmc Group instance")
             # check group dimension
@@ -1151,14 +1442,13 @@ class Engine(object):
             # check type
             assert "int" in g.dtype.name, LOGGER.error("each group in groups must be of integer type")
             # sort and check limits
-            sortedGroup = sorted(set(g))
+            sortedGroup = np.unique(g)
             assert len(sortedGroup) == len(g), LOGGER.error("redundant indexes found in group")
             assert sortedGroup[-1]<self.__pdb.numberOfAtoms, LOGGER.error("group index must be smaller than number of atoms in pdb")
-            gr = Group(indexes= g )
-        # append group
-        self.__groups.append( gr )
-        # set group engine
-        gr._set_engine(self)
+            gr = g
+        # append group. Group instances are kept as the group view while
+        # indexes are stored in the compact groups table
+        self.groups.append( gr )
         # broadcast to constraints
         if broadcast:
             self.__broadcaster.broadcast("update groups")
@@ -1180,10 +1470,14 @@ class Engine(object):
         """
         self.__saveGroupsFlag = False
         lastGroups            = self.__groups
-        self.__groups         = []
+        self.__groups         = GroupTable()
+        self.__groups._set_engine(self)
         try:
             if groups is None:
-                self.__groups = [Group(indexes=[idx]) for idx in self.__pdb.xindexes]
+                numberOfAtoms = self.__pdb.numberOfAtoms
+                self.__groups = GroupTable.from_offsets(offsets=np.arange(numberOfAtoms+1, dtype=INT_TYPE),
+                                                        indexes=np.arange(numberOfAtoms, dtype=INT_TYPE))
+                self.__groups._set_engine(self)
             elif isinstance(groups, Group):
                 self.add_group(groups, broadcast=False)
             else:
@@ -1211,7 +1505,7 @@ class Engine(object):
                numpy.ndarray of atoms index of type numpy.int32.
         """
         self.__saveGroupsFlag = False
-        lastGroups            = [g for g in self.__groups]
+        lastGroups            = self.groups.copy()
         try:
             if isinstance(groups, Group):
                 self.add_group(groups, broadcast=False)
@@ -1238,20 +1532,17 @@ class Engine(object):
     def set_groups_as_molecules(self):
         """ Automatically set engine's groups indexes according to
         molecules indexes. """
-        molecules = list(set(self.__moleculesIndex))
-        moleculesIndex = {}
-        for idx in range(len(self.__moleculesIndex)):
-            mol = self.__moleculesIndex[idx]
-            if not moleculesIndex.has_key(mol):
-                moleculesIndex[mol] = []
-            moleculesIndex[mol].append(idx)
-        # create groups
-        keys = sorted(moleculesIndex.keys())
+        # stable sort atoms by molecule index and split where it changes
+        order   = np.argsort(self.__moleculesIndex, kind='mergesort').astype(INT_TYPE)
+        sortedMolecules = self.__moleculesIndex[order]
+        changes = np.flatnonzero(sortedMolecules[1:] != sortedMolecules[:-1])+1
         # reset groups
-        self.__groups = []
-        # add groups
-        for k in keys:
-            self.add_group(np.array(moleculesIndex[k], dtype=INT_TYPE), broadcast=False)
+        if len(order):
+            offsets = np.concatenate(([0], changes, [len(order)])).astype(INT_TYPE)
+            self.__groups = GroupTable.from_offsets(offsets=offsets, indexes=order)
+        else:
+            self.__groups = GroupTable()
+        self.__groups._set_engine(self)
         # save groups to repository
         if self.__repository is not None:
             self.__repository.dump(value=self.__groups, relativePath=self.__usedFrame, name='_Engine__groups', replace=True)
@@ -1308,6 +1599,7 @@ class Engine(object):
         self.__pdb = pdb
         # get coordinates
         self.__realCoordinates = np.array(self.__pdb.coordinates, dtype=FLOAT_TYPE)
+        self.__ownsCoordinates = True
         # save data to repository
         if self.__repository is not None:
             self.__repository.dump(value=self.__pdb, relativePath=self.__usedFrame, name='_Engine__pdb', replace=True)
@@ -1329,6 +1621,62 @@ class Engine(object):
         # reset engine flags
         self.reset_engine()
 
+    def set_coordinates(self, realCoordinates, copy=False):
+        """
+        Set current configuration atoms real coordinates. Unlike set_pdb,
+        system's topology, boundary conditions, groups, constraints
+        definitions and repository are not touched. Engine state is
+        updated so constraints data will be recomputed upon next call to
+        initialize_used_constraints, set_total_standard_error or run.
+        This is meant to score many configurations of the same system
+        against the same constraints. Coordinates are not saved until
+        engine is saved.
+
+        :Parameters:
+            #. realCoordinates (numpy.ndarray): The (N,3) real coordinates
+               array where N is the current number of not collected atoms.
+            #. copy (boolean): Whether to copy realCoordinates. If False and
+               realCoordinates is a C contiguous array of
+               fullrmc.Globals.FLOAT_TYPE, it will be adopted as engine's
+               coordinates buffer without copying and accepted moves will
+               be written into it. Otherwise it will be copied into
+               engine's own coordinates buffer. A buffer adopted from a
+               previous call is never written, a new one is allocated
+               instead.
+
+        .. code-block:: python
+
+            # score every snapshot against the same constraints
+            for coords in snapshots:
+                ENGINE.set_coordinates(coords)
+                ENGINE.set_total_standard_error()
+                print ENGINE.totalStandardError
+        """
+        assert isinstance(copy, bool), LOGGER.error("copy must be boolean")
+        assert isinstance(realCoordinates, np.ndarray), LOGGER.error("realCoordinates must be a numpy.ndarray")
+        assert realCoordinates.shape == self.__realCoordinates.shape, LOGGER.error("realCoordinates shape %s must be the same as engine's coordinates %s"%(realCoordinates.shape, self.__realCoordinates.shape))
+        assert realCoordinates.dtype.kind == 'f', LOGGER.error("realCoordinates must be a floating numpy.ndarray")
+        # set coordinates
+        if not copy and realCoordinates.dtype == FLOAT_TYPE and realCoordinates.flags['C_CONTIGUOUS']:
+            self.__realCoordinates   = realCoordinates
+            self.__ownsCoordinates   = False
+        elif self.__dict__.get('_Engine__ownsCoordinates', True):
+            self.__realCoordinates[:] = realCoordinates
+        else:
+            # never write into a buffer adopted from a previous call
+            self.__realCoordinates   = np.array(realCoordinates, dtype=FLOAT_TYPE)
+            self.__ownsCoordinates   = True
+        # set box coordinates
+        if self.__isPBC:
+            self.__boxCoordinates = transform_coordinates(transMatrix=self.__reciprocalBasisVectors , coords=self.__realCoordinates)
+        else:
+            self.__boxCoordinates = self.__realCoordinates
+        # invalidate groups geometric properties
+        self.__groups.invalidate_geometry()
+        # update state to flag constraints data as out of date
+        self.__state = time.time()
+        self.__totalStandardError = None
+
     def set_boundary_conditions(self, boundaryConditions):
         """
         Sets the configuration's boundary conditions. Any type of periodic
@@ -1457,24 +1805,12 @@ class Engine(object):
         if not self.__pdb.numberOfAtoms:
             moleculesIndex = []
         elif moleculesIndex is None:
-            moleculesIndex = []
-            residues   = self.__pdb.residues
-            sequences  = self.__pdb.sequences
-            segments   = self.__pdb.segments
-            currentRes = residues[0]
-            currentSeq = sequences[0]
-            currentSeg = segments[0]
-            molIndex   = 0
-            for idx in range(len(residues)):
-                res = residues[idx]
-                seq = sequences[idx]
-                seg = segments[idx]
-                if not(res==currentRes and seq==currentSeq and seg==currentSeg):
-                    molIndex += 1
-                    currentRes = res
-                    currentSeq = seq
-                    currentSeg = seg
-                moleculesIndex.append(molIndex)
+            # a new molecule starts wherever residue, sequence or segment changes
+            changes = np.zeros(self.__pdb.numberOfAtoms, dtype=bool)
+            for values in (self.__pdb.residues, self.__pdb.sequences, self.__pdb.segments):
+                values      = np.asarray(values)
+                changes[1:] = changes[1:] | (values[1:] != values[:-1])
+            moleculesIndex = np.cumsum(changes, dtype=INT_TYPE)
         else:
             assert isinstance(moleculesIndex, (list,set,tuple, np.ndarray)), LOGGER.error("moleculesIndex must be a list of indexes")
             assert len(moleculesIndex)==self.__pdb.numberOfAtoms, LOGGER.error("moleculesIndex must have the same length as pdb")
@@ -1482,10 +1818,10 @@ class Engine(object):
                 assert len(moleculesIndex.shape)==1, LOGGER.error("moleculesIndex numpy.ndarray must have a dimension of 1")
                 assert moleculesIndex.dtype.type is INT_TYPE, LOGGER.error("moleculesIndex must be of type numpy.int32")
             else:
-                for molIdx in moleculesIndex:
-                    assert is_integer(molIdx), LOGGER.error("molecule's index must be an integer")
-                    molIdx = INT_TYPE(molIdx)
-                    assert int(molIdx)>=0, LOGGER.error("molecule's index must positive")
+                moleculesIndex = list(moleculesIndex)
+                molIdxs = np.array(moleculesIndex)
+                assert molIdxs.dtype.kind in ('i','u'), LOGGER.error("molecule's index must be an integer")
+                assert not len(molIdxs) or np.min(molIdxs)>=0, LOGGER.error("molecule's index must positive")
         # check molecules name
         if moleculesName is not None:
             assert isinstance(moleculesName, (list, set, tuple)), LOGGER.error("moleculesName must be a list")
@@ -1494,19 +1830,14 @@ class Engine(object):
         else:
             moleculesName = self.__pdb.residues
         if len(moleculesName):
-            molName  = moleculesName[0]
-            molIndex = moleculesIndex[0]
-            for idx in range(len(moleculesIndex)):
-                newMolIndex = moleculesIndex[idx]
-                newMolName  = moleculesName[idx]
-                if newMolIndex == molIndex:
-                    assert newMolName == molName, LOGGER.error("Same molecule atoms can't have different molecule name")
-                else:
-                    molName  = newMolName
-                    molIndex = newMolIndex
+            # consecutive atoms of the same molecule must have the same name
+            molIdxs  = np.asarray(moleculesIndex)
+            molNames = np.asarray(moleculesName)
+            sameMol  = molIdxs[1:] == molIdxs[:-1]
+            assert not np.any(sameMol & (molNames[1:] != molNames[:-1])), LOGGER.error("Same molecule atoms can't have different molecule name")
         # set moleculesIndex
-        self.__numberOfMolecules = len(set(moleculesIndex))
         self.__moleculesIndex  = np.array(moleculesIndex, dtype=INT_TYPE)
+        self.__numberOfMolecules = len(np.unique(self.__moleculesIndex))
         self.__moleculesName    = list(moleculesName)
         # save data to repository
         if self.__repository is not None:
@@ -1550,17 +1881,13 @@ class Engine(object):
             assert len(elements)==self.__pdb.numberOfAtoms, LOGGER.error("elements have the same length as pdb")
         # set all atoms elements
         self.__allElements = elements
-        # get elements
-        self.__elements = sorted(set(self.__allElements))
-        # get elementsIndex
-        lut = dict(zip(self.__elements,range(len(self.__elements))))
-        self.__elementsIndex = np.array([lut[el] for el in self.__allElements], dtype=INT_TYPE)
+        # get elements and elementsIndex
+        elements, elementsIndex = np.unique(np.array(list(self.__allElements)), return_inverse=True)
+        self.__elements      = elements.tolist()
+        self.__elementsIndex = elementsIndex.astype(INT_TYPE)
         # number of atoms per element
-        self.__numberOfAtomsPerElement = {}
-        for el in self.__allElements:
-            if not self.__numberOfAtomsPerElement.has_key(el):
-                self.__numberOfAtomsPerElement[el] = 0
-            self.__numberOfAtomsPerElement[el] += 1
+        counts = np.bincount(self.__elementsIndex, minlength=len(self.__elements))
+        self.__numberOfAtomsPerElement = dict(zip(self.__elements, counts.tolist()))
         # save data to repository
         if self.__repository is not None:
             self.__repository.dump(value=self.__allElements, relativePath=self.__usedFrame, name='_Engine__allElements', replace=True)
@@ -1601,20 +1928,16 @@ class Engine(object):
             names = self.__pdb.names
         else:
             assert isinstance(names, (list,set,tuple)), LOGGER.error("names must be a list of indexes")
-            assert len(names)==self.self.__pdb.numberOfAtoms, LOGGER.error("names have the same length as pdb")
+            assert len(names)==self.__pdb.numberOfAtoms, LOGGER.error("names have the same length as pdb")
         # set all atoms names
         self.__allNames = names
-        # get atom names
-        self.__names = sorted(set(self.__allNames))
-        # get namesIndex
-        lut = dict(zip(self.__names,range(len(self.__names))))
-        self.__namesIndex = np.array([lut[n] for n in self.__allNames], dtype=INT_TYPE)
+        # get atom names and namesIndex
+        names, namesIndex = np.unique(np.array(list(self.__allNames)), return_inverse=True)
+        self.__names      = names.tolist()
+        self.__namesIndex = namesIndex.astype(INT_TYPE)
         # number of atoms per name
-        self.__numberOfAtomsPerName = {}
-        for n in self.__allNames:
-            if not self.__numberOfAtomsPerName.has_key(n):
-                self.__numberOfAtomsPerName[n] = 0
-            self.__numberOfAtomsPerName[n] += 1
+        counts = np.bincount(self.__namesIndex, minlength=len(self.__names))
+        self.__numberOfAtomsPerName = dict(zip(self.__names, counts.tolist()))
         # save data to repository
         if self.__repository is not None:
             self.__repository.dump(value=self.__allNames, relativePath=self.__usedFrame, name='_Engine__allNames', replace=True)
@@ -1720,6 +2043,7 @@ class Engine(object):
         reprParams = " ".join(reprParams)
         assert reprMethod in reps, LOGGER.error("representation method is not a recognized among allowed ones %s"%str(reps))
         # create .tcl file
+        import tempfile
         (vmdfd, tclFile) = tempfile.mkstemp()
         # write tclFile
         tclFile += ".tcl"
@@ -1856,7 +2180,7 @@ class Engine(object):
                     cp = os.path.join(frame, 'constraints', c.constraintId)
                     self.__repository.add_directory( cp )
                     for dname in c.FRAME_DATA:
-                        value = c.__dict__[dname]
+                        value = getattr(c, dname)
                         #name  = dname.split('__')[1]
                         name = dname
                         self.__repository.dump(value=value, relativePath=cp, name=name, replace=True)
@@ -1899,7 +2223,7 @@ class Engine(object):
                 # Add constraint to all frames
                 cp = os.path.join(self.__usedFrame, 'constraints', c.constraintId)
                 for dname in c.FRAME_DATA:
-                    value = c.__dict__[dname]
+                    value = getattr(c, dname)
                     #name  = dname.split('__')[1]
                     name = dname
                     self.__repository.dump(value=value, relativePath=cp, name=name, replace=True)
@@ -1954,6 +2278,95 @@ class Engine(object):
         # compute totalStandardError
         self.__totalStandardError = self.compute_total_standard_error(_constraints, current="standardError")
 
+    def _score_coordinates(self, realCoordinates):
+        """ Set coordinates, recompute used constraints data and return
+        used constraints standard error dictionary keyed by constraint id
+        and total standard error."""
+        self.set_coordinates(realCoordinates)
+        # consecutive configurations can be set within the clock resolution
+        # and share the same engine state, constraints are always recomputed
+        _usedConstraints, _constraints, _rigidConstraints = self.initialize_used_constraints(force=True)
+        standardErrors = dict([(c.constraintId, c.standardError) for c in _usedConstraints])
+        return standardErrors, self.compute_total_standard_error(_constraints, current="standardError")
+
+    def score_configurations(self, configurations, nprocs=1, chunksize=1):
+        """
+        Compute used constraints standard error and total standard error of
+        many configurations of the same system. Configurations are streamed
+        and never held all at once in memory. When nprocs is bigger than 1,
+        at most nprocs*chunksize configurations are read from configurations
+        iterable at a time.
+
+        When nprocs is 1, configurations are scored by this engine and its
+        coordinates are restored at the end. Constraints data will then be
+        recomputed upon next initialization. When nprocs is bigger than 1,
+        every worker process loads the engine as last saved to its
+        repository and scores configurations without writing anything to
+        the repository. Therefore engine must be saved beforehand.
+
+        :Parameters:
+            #. configurations (iterable): Iterable of (N,3) real coordinates
+               numpy.ndarray where N is the number of not collected atoms.
+            #. nprocs (integer): Number of processes to use.
+            #. chunksize (integer): Number of configurations sent at once
+               to every process.
+
+        :Returns:
+            #. standardErrors (dict): Every used constraint, rigid ones
+               included, standard error. Keys are constraints id and values
+               are numpy.ndarray of every configuration standard error.
+            #. totalStandardErrors (numpy.ndarray): Every configuration
+               total standard error. Rigid constraints are not accounted
+               for as in totalStandardError.
+
+        .. code-block:: python
+
+            # rank docking poses
+            SE, TSE = ENGINE.score_configurations(poses, nprocs=4)
+            ranking = np.argsort(TSE)
+        """
+        assert is_integer(nprocs), LOGGER.error("nprocs must be an integer")
+        nprocs = int(nprocs)
+        assert nprocs>0, LOGGER.error("nprocs must be > 0")
+        assert is_integer(chunksize), LOGGER.error("chunksize must be an integer")
+        chunksize = int(chunksize)
+        assert chunksize>0, LOGGER.error("chunksize must be > 0")
+        _usedConstraints, _constraints, _rigidConstraints = self.get_used_constraints()
+        standardErrors      = dict([(c.constraintId, []) for c in _usedConstraints])
+        totalStandardErrors = []
+        if nprocs == 1:
+            realCoordinates = np.array(self.__realCoordinates)
+            try:
+                for coords in configurations:
+                    SE, TSE = self._score_coordinates(coords)
+                    for cid in standardErrors:
+                        standardErrors[cid].append(SE[cid])
+                    totalStandardErrors.append(TSE)
+            finally:
+                self.set_coordinates(realCoordinates)
+        else:
+            assert self.__repository is not None, LOGGER.error("engine must be saved before scoring configurations using many processes.")
+            import multiprocessing
+            pool = multiprocessing.Pool(processes=nprocs, initializer=_init_scoring_worker, initargs=(self.__path, self.__usedFrame))
+            configurations = iter(configurations)
+            try:
+                # Pool.imap consumes the whole iterable upfront, feed it bounded batches
+                while True:
+                    batch = list(islice(configurations, nprocs*chunksize))
+                    if not len(batch):
+                        break
+                    for SE, TSE in pool.imap(_score_configuration, batch, chunksize):
+                        for cid in standardErrors:
+                            standardErrors[cid].append(SE[cid])
+                        totalStandardErrors.append(TSE)
+            finally:
+                pool.terminate()
+                pool.join()
+        # return
+        for cid in standardErrors:
+            standardErrors[cid] = np.array(standardErrors[cid], dtype=FLOAT_TYPE)
+        return standardErrors, np.array(totalStandardErrors, dtype=FLOAT_TYPE)
+
     def get_used_constraints(self, sortConstraints=False):
         """
         Parses all engine's constraints and returns different lists of
@@ -2075,6 +2488,87 @@ class Engine(object):
         # return
         return xyzFrequency, xyzPath
 
+    def __runtime_get_drift_check(self, driftCheckFrequency):
+        # check driftCheckFrequency
+        if driftCheckFrequency is not None:
+            assert is_integer(driftCheckFrequency), LOGGER.error("driftCheckFrequency must be an integer")
+            assert driftCheckFrequency>=0, LOGGER.error("driftCheckFrequency must be positive")
+            driftCheckFrequency = int(driftCheckFrequency)
+        if driftCheckFrequency == 0:
+            driftCheckFrequency = None
+        # return
+        return driftCheckFrequency
+
+    def __runtime_get_summary(self, summaryFrequency):
+        # check summaryFrequency
+        if summaryFrequency is not None:
+            assert is_integer(summaryFrequency), LOGGER.error("summaryFrequency must be an integer")
+            assert summaryFrequency>=0, LOGGER.error("summaryFrequency must be positive")
+            summaryFrequency = int(summaryFrequency)
+        if summaryFrequency == 0:
+            summaryFrequency = None
+        # return
+        return summaryFrequency
+
+    def __runtime_get_resync(self, resyncFrequency, resyncThreshold):
+        # check resyncFrequency
+        if resyncFrequency is not None:
+            assert is_integer(resyncFrequency), LOGGER.error("resyncFrequency must be an integer")
+            assert resyncFrequency>=0, LOGGER.error("resyncFrequency must be positive")
+            resyncFrequency = int(resyncFrequency)
+        if resyncFrequency == 0:
+            resyncFrequency = None
+        # check resyncThreshold
+        if resyncThreshold is not None:
+            assert is_number(resyncThreshold), LOGGER.error("resyncThreshold must be None or a number")
+            resyncThreshold = float(resyncThreshold)
+            assert resyncThreshold>=0, LOGGER.error("resyncThreshold must be positive")
+        # return
+        return resyncFrequency, resyncThreshold
+
+    def __runtime_get_stop(self, maxWallTime, targetStandardError, stallSteps, callback, callbackFrequency):
+        # check maxWallTime
+        if maxWallTime is not None:
+            assert is_number(maxWallTime), LOGGER.error("maxWallTime must be None or a number")
+            maxWallTime = float(maxWallTime)
+            assert maxWallTime>0, LOGGER.error("maxWallTime must be positive")
+        # check targetStandardError
+        if targetStandardError is not None:
+            assert is_number(targetStandardError), LOGGER.error("targetStandardError must be None or a number")
+            targetStandardError = float(targetStandardError)
+        # check stallSteps
+        if stallSteps is not None:
+            assert is_integer(stallSteps), LOGGER.error("stallSteps must be None or an integer")
+            assert stallSteps>=0, LOGGER.error("stallSteps must be positive")
+            stallSteps = int(stallSteps)
+        if stallSteps == 0:
+            stallSteps = None
+        # check callback
+        if callback is not None:
+            assert callable(callback), LOGGER.error("callback must be None or callable")
+            assert is_integer(callbackFrequency), LOGGER.error("callbackFrequency must be an integer")
+            assert callbackFrequency>0, LOGGER.error("callbackFrequency must be positive")
+            callbackFrequency = int(callbackFrequency)
+        # return
+        return {'maxWallTime'        :maxWallTime,
+                'targetStandardError':targetStandardError,
+                'stallSteps'         :stallSteps,
+                'callback'           :callback,
+                'callbackFrequency'  :callbackFrequency,
+                'best'               :None,
+                'bestStep'           :0}
+
+    def __runtime_get_adaptive_ordering(self, adaptiveOrderingFrequency):
+        # check adaptiveOrderingFrequency
+        if adaptiveOrderingFrequency is not None:
+            assert is_integer(adaptiveOrderingFrequency), LOGGER.error("adaptiveOrderingFrequency must be an integer")
+            assert adaptiveOrderingFrequency>=0, LOGGER.error("adaptiveOrderingFrequency must be positive")
+            adaptiveOrderingFrequency = int(adaptiveOrderingFrequency)
+        if adaptiveOrderingFrequency == 0:
+            adaptiveOrderingFrequency = None
+        # return
+        return adaptiveOrderingFrequency
+
 
 ##########################################################################################
 ##########################################################################################
@@ -2083,9 +2577,8 @@ class Engine(object):
     def __on_runtime_step_select_group(self, _coordsBeforeMove, movedRealCoordinates, _moveTried):
         # get group
         self.__lastSelectedGroupIndex = self.__groupSelector.select_index()
-        self._RT_selectedGroup = self.__groups[self.__lastSelectedGroupIndex]
-        # get move generator
-        self._RT_moveGenerator = self._RT_selectedGroup.moveGenerator
+        # get move generator from groups table without creating a group view
+        self._RT_moveGenerator = self.__groups.get_move_generator(self.__lastSelectedGroupIndex)
         # remove generator
         if isinstance(self._RT_moveGenerator, RemoveGenerator):
             movedRealCoordinates = None
@@ -2093,41 +2586,44 @@ class Engine(object):
             self._RT_groupAtomsIndexes    = self._RT_moveGenerator.pick_from_list(self)
             notCollectedAtomsIndexes      = np.array(self._atomsCollector.are_not_collected(self._RT_groupAtomsIndexes), dtype=bool)
             self._RT_groupAtomsIndexes    = self._RT_groupAtomsIndexes[ notCollectedAtomsIndexes ]
-            self._RT_groupRelativeIndexes = np.array([self._atomsCollector.get_relative_index(idx) for idx in self._RT_groupAtomsIndexes], dtype=INT_TYPE)
+            self._RT_groupRelativeIndexes = self._atomsCollector.get_relative_indexes(self._RT_groupAtomsIndexes).astype(INT_TYPE)
             _coordsBeforeMove             = None
         # move generator
         else:
-            # get atoms indexes
-            self._RT_groupAtomsIndexes = self._RT_selectedGroup.indexes
-            notCollectedAtomsIndexes   = np.array(self._atomsCollector.are_not_collected(self._RT_groupAtomsIndexes), dtype=bool)
-            self._RT_groupAtomsIndexes = self._RT_groupAtomsIndexes[ notCollectedAtomsIndexes ]
+            # get atoms indexes and relative indexes as cached by the groups table
+            self._RT_groupAtomsIndexes, groupRelativeIndexes = self.__groups.get_relative_indexes(self.__lastSelectedGroupIndex, self._atomsCollector)
+            geometryVersion = None
             # check if all group atoms are collected
             if not len(self._RT_groupAtomsIndexes):
                 self._RT_groupRelativeIndexes = self._RT_groupAtomsIndexes
                 _coordsBeforeMove             = np.array([], dtype=self.__realCoordinates.dtype).reshape((0,3))
-            # get group atoms coordinates before applying move
+            # get group atoms coordinates before applying move. geometryVersion
+            # is only set when coordinates are the group's current ones
             elif isinstance(self._RT_moveGenerator, SwapGenerator):
             #if isinstance(self._RT_moveGenerator, SwapGenerator):
                 if len(self._RT_groupAtomsIndexes) == self._RT_moveGenerator.swapLength:
                     self._RT_groupAtomsIndexes    = self._RT_moveGenerator.get_ready_for_move(engine=self,  groupAtomsIndexes=self._RT_groupAtomsIndexes)
                     notCollectedAtomsIndexes      = np.array(self._atomsCollector.are_not_collected(self._RT_groupAtomsIndexes), dtype=bool)
                     self._RT_groupAtomsIndexes    = self._RT_groupAtomsIndexes[ notCollectedAtomsIndexes ]
-                    self._RT_groupRelativeIndexes = np.array([self._atomsCollector.get_relative_index(idx) for idx in self._RT_groupAtomsIndexes], dtype=INT_TYPE)
-                    _coordsBeforeMove = np.array(self.__realCoordinates[self._RT_groupRelativeIndexes], dtype=self.__realCoordinates.dtype)
+                    self._RT_groupRelativeIndexes = self._atomsCollector.get_relative_indexes(self._RT_groupAtomsIndexes).astype(INT_TYPE)
+                    _coordsBeforeMove = self.__realCoordinates[self._RT_groupRelativeIndexes]
                 else:
-                    self._RT_groupAtomsIndexes    = np.array([], dtype=self._RT_selectedGroup.indexes.dtype)
+                    self._RT_groupAtomsIndexes    = np.array([], dtype=INT_TYPE)
                     self._RT_groupRelativeIndexes = self._RT_groupAtomsIndexes
                     _coordsBeforeMove             = np.array([], dtype=self.__realCoordinates.dtype).reshape((0,3))
+            # fancy indexing realCoordinates already returns a copy
             elif _coordsBeforeMove is None or not self.__groupSelector.isRecurring:
-                self._RT_groupRelativeIndexes = np.array([self._atomsCollector.get_relative_index(idx) for idx in self._RT_groupAtomsIndexes], dtype=INT_TYPE)
-                _coordsBeforeMove = np.array(self.__realCoordinates[self._RT_groupRelativeIndexes], dtype=self.__realCoordinates.dtype)
+                self._RT_groupRelativeIndexes = groupRelativeIndexes
+                _coordsBeforeMove = self.__realCoordinates[self._RT_groupRelativeIndexes]
+                geometryVersion   = (self.__accepted, self._atomsCollector.state)
             elif self.__groupSelector.explore:
-                self._RT_groupRelativeIndexes = np.array([self._atomsCollector.get_relative_index(idx) for idx in self._RT_groupAtomsIndexes], dtype=INT_TYPE)
+                self._RT_groupRelativeIndexes = groupRelativeIndexes
                 if _moveTried:
                     _coordsBeforeMove = movedRealCoordinates
             elif not self.__groupSelector.refine:
-                self._RT_groupRelativeIndexes = np.array([self._atomsCollector.get_relative_index(idx) for idx in self._RT_groupAtomsIndexes], dtype=INT_TYPE)
-                _coordsBeforeMove = np.array(self.__realCoordinates[self._RT_groupRelativeIndexes], dtype=self.__realCoordinates.dtype)
+                self._RT_groupRelativeIndexes = groupRelativeIndexes
+                _coordsBeforeMove = self.__realCoordinates[self._RT_groupRelativeIndexes]
+                geometryVersion   = (self.__accepted, self._atomsCollector.state)
             ## WHEN AT THIS POINT PROPERTIES ARE GroupSelector (RecursiveGroupSelector) explore (False) refine (True).
             #else:
             #    m  = "Unknown fitting mode, unable to get coordinates before applying move. "
@@ -2137,7 +2633,12 @@ class Engine(object):
             #    raise Exception(LOGGER.critical(m))
             # compute moved coordinates
             if len(_coordsBeforeMove):
+                # share group geometric properties with move generators. They
+                # are reused until any move is accepted
+                geometry = self.__groups.get_geometry(self.__lastSelectedGroupIndex, _coordsBeforeMove, version=geometryVersion)
+                self._RT_moveGenerator._set_runtime_geometry(geometry)
                 movedRealCoordinates = self._RT_moveGenerator.move(_coordsBeforeMove)
+                self._RT_moveGenerator._set_runtime_geometry(None)
                 movedBoxCoordinates  = transform_coordinates(transMatrix=self.__reciprocalBasisVectors , coords=movedRealCoordinates)
             else:
                 movedRealCoordinates = _coordsBeforeMove
@@ -2172,7 +2673,8 @@ class Engine(object):
             for c in _constraints:
                 c.reject_amputation(realIndex=self._RT_groupAtomsIndexes, relativeIndex=self._RT_groupRelativeIndexes)
             # log tried move rejected
-            LOGGER.rejected("Tried remove %i is rejected"%self.__generated)
+            if self._runtime_logRejected:
+                LOGGER.rejected("Tried remove %i is rejected", self.__generated)
         ################################# accept tried remove #################################
         else:
             self.__accepted += 1
@@ -2186,20 +2688,27 @@ class Engine(object):
             # collect atoms
             self._on_collector_collect_atom(realIndex = self._RT_groupAtomsIndexes[0])
             # log new successful move
-            triedRatio    = 100.*(float(self.__tried)/float(self.__generated))
-            acceptedRatio = 100.*(float(self.__accepted)/float(self.__generated))
-            LOGGER.accepted("Gen:%i - Tr:%i(%.3f%%) - Acc:%i(%.3f%%) - Rem:%i(%.3f%%) - Err:%.6f" %(self.__generated , self.__tried, triedRatio, self.__accepted, acceptedRatio, self.__removed[1], 100.*self.__removed[2], self.__totalStandardError))
+            if self._runtime_logAccepted:
+                summary, args = self.__get_runtime_summary()
+                LOGGER.accepted(summary, *args)
 
-    def __on_runtime_step_try_move(self, _constraints, _usedConstraints, _rigidConstraints, movedRealCoordinates, movedBoxCoordinates):
+    def __on_runtime_step_try_move(self, _constraints, _usedConstraints, _rigidConstraints, movedRealCoordinates, movedBoxCoordinates, _bondedTerms):
+        # set move to bonded terms evaluator
+        _bondedTerms.set_move(self._RT_groupAtomsIndexes, self._RT_groupRelativeIndexes, movedBoxCoordinates)
         ########################### compute rigidConstraints ############################
         rejectMove      = False
+        measure         = self._runtime_measureConstraints
         for c in _rigidConstraints:
+            if measure:
+                startTime = time.time()
             # compute before move
             c.compute_before_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes = self._RT_groupRelativeIndexes)
             # compute after move
             c.compute_after_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes = self._RT_groupRelativeIndexes, movedBoxCoordinates=movedBoxCoordinates)
             # get rejectMove
             rejectMove = c.should_step_get_rejected(c.afterMoveStandardError)
+            if measure:
+                c._record_runtime_evaluation(time.time()-startTime, rejectMove)
             #print c.__class__.__name__, c.standardError, c.afterMoveStandardError, rejectMove
             if rejectMove:
                 break
@@ -2210,36 +2719,55 @@ class Engine(object):
             for c in _rigidConstraints:
                 c.reject_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes=self._RT_groupRelativeIndexes)
             # log generated move rejected before getting tried
-            LOGGER.nottried("Generated move %i is not tried"%self.__generated)
+            if self._runtime_logNotTried:
+                LOGGER.nottried("Generated move %i is not tried", self.__generated)
         ###################################### try move #######################################
         else:
             self.__tried += 1
-            for c in _constraints:
+            # with no tolerance, move is certainly rejected once the partial
+            # new total standard error of the computed constraints exceeds
+            # the current total because standard errors are non-negative
+            earlyExit            = self.__tolerance == 0
+            partialStandardError = 0.
+            for idx, c in enumerate(_constraints):
+                if measure:
+                    startTime = time.time()
                 # compute before move
                 c.compute_before_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes=self._RT_groupRelativeIndexes)
                 # compute after move
                 c.compute_after_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes = self._RT_groupRelativeIndexes, movedBoxCoordinates=movedBoxCoordinates)
+                if measure:
+                    c._record_runtime_evaluation(time.time()-startTime, c.afterMoveStandardError>c.standardError)
+                if earlyExit:
+                    partialStandardError += c.afterMoveStandardError/c.varianceSquared
+                    if partialStandardError > self.__totalStandardError:
+                        rejectMove = True
+                        _computedConstraints = _constraints[:idx+1]
+                        break
         ################################ compute new totalStandardError ################################
-            newTotalStandardError = self.compute_total_standard_error(_constraints, current="afterMoveStandardError")
-            #if len(_constraints) and (newTotalStandardError >= self.__totalStandardError):
-            if newTotalStandardError > self.__totalStandardError:
-                if generate_random_float() > self.__tolerance:
-                    rejectMove = True
+            if not rejectMove:
+                _computedConstraints  = _constraints
+                newTotalStandardError = self.compute_total_standard_error(_constraints, current="afterMoveStandardError")
+                #if len(_constraints) and (newTotalStandardError >= self.__totalStandardError):
+                if newTotalStandardError > self.__totalStandardError:
+                    if generate_random_float() > self.__tolerance:
+                        rejectMove = True
+                    else:
+                        self.__tolerated += 1
+                        self.__totalStandardError  = newTotalStandardError
                 else:
-                    self.__tolerated += 1
-                    self.__totalStandardError  = newTotalStandardError
-            else:
-                self.__totalStandardError = newTotalStandardError
+                    self.__totalStandardError = newTotalStandardError
         ################################## reject tried move ##################################
         if rejectMove:
             # set selector move rejected
             self.__groupSelector.move_rejected(self.__lastSelectedGroupIndex)
             if _moveTried:
-                # constraints reject move
-                for c in _constraints:
+                # computed constraints reject move
+                for c in _computedConstraints:
                     c.reject_move(realIndexes=self._RT_groupAtomsIndexes, relativeIndexes=self._RT_groupRelativeIndexes)
                 # log tried move rejected
-                LOGGER.rejected("Tried move %i is rejected"%self.__generated)
+                if self._runtime_logRejected:
+                    LOGGER.rejected("Tried move %i is rejected", self.__generated)
         ##################################### accept move #####################################
         else:
             self.__accepted  += 1
@@ -2252,11 +2780,20 @@ class Engine(object):
             self.__realCoordinates[self._RT_groupRelativeIndexes] = movedRealCoordinates
             self.__boxCoordinates[self._RT_groupRelativeIndexes]  = movedBoxCoordinates
             # log new successful move
-            triedRatio    = 100.*(float(self.__tried)/float(self.__generated))
-            acceptedRatio = 100.*(float(self.__accepted)/float(self.__generated))
-            LOGGER.accepted("Gen:%i - Tr:%i(%.3f%%) - Acc:%i(%.3f%%) - Rem:%i(%.3f%%) - Err:%.6f" %(self.__generated , self.__tried, triedRatio, self.__accepted, acceptedRatio, self.__removed[1], 100.*self.__removed[2],self.__totalStandardError))
+            if self._runtime_logAccepted:
+                summary, args = self.__get_runtime_summary()
+                LOGGER.accepted(summary, *args)
+        # unset bonded terms evaluator move
+        _bondedTerms.set_move(None)
 
 
+    def __get_runtime_summary(self):
+        # return engine run statistics format string and arguments
+        triedRatio    = 100.*(float(self.__tried)/float(self.__generated))
+        acceptedRatio = 100.*(float(self.__accepted)/float(self.__generated))
+        return "Gen:%i - Tr:%i(%.3f%%) - Acc:%i(%.3f%%) - Rem:%i(%.3f%%) - Err:%.6f", \
+               (self.__generated , self.__tried, triedRatio, self.__accepted, acceptedRatio, self.__removed[1], 100.*self.__removed[2], self.__totalStandardError)
+
     def __on_runtime_step_save_engine(self, _saveFrequency, step, _frame, _usedConstraints, _lastSavedTotalStandardError):
         ##################################### save engine #####################################
         if _saveFrequency is not None:
@@ -2282,17 +2819,97 @@ class Engine(object):
         if _xyzFrequency is not None:
             if not(step+1)%_xyzFrequency:
                 _xyzfd.write("%s\n"%self.numberOfAtoms)
-                triedRatio    = 100.*(float(self.__tried)/float(self.__generated))
-                acceptedRatio = 100.*(float(self.__accepted)/float(self.__generated))
-                _xyzfd.write("Gen:%i - Tr:%i(%.3f%%) - Acc:%i(%.3f%%) - Rem:%i(%.3f%%) - Err:%.6f\n" %(self.__generated , self.__tried, triedRatio, self.__accepted, acceptedRatio, self.__removed[1], 100.*self.__removed[2],self.__totalStandardError))
+                summary, args = self.__get_runtime_summary()
+                _xyzfd.write((summary+"\n")%args)
                 frame = [self.__allNames[idx]+ " " + "%10.5f"%self.__realCoordinates[idx][0] + " %10.5f"%self.__realCoordinates[idx][1] + " %10.5f"%self.__realCoordinates[idx][2] + "\n" for idx in self.__pdb.xindexes]
                 _xyzfd.write("".join(frame))
 
 
+    def __on_runtime_step_order_constraints(self, _adaptiveOrderingFrequency, _constraints, _rigidConstraints, step):
+        ######################## order constraints by expected cost ########################
+        if _adaptiveOrderingFrequency is not None:
+            if not(step+1)%_adaptiveOrderingFrequency:
+                for constraints in (_rigidConstraints, _constraints):
+                    costs = [c.get_runtime_expected_cost() for c in constraints]
+                    if None in costs:
+                        continue
+                    # sort in place because lists are shared with runtime step methods
+                    order = sorted(range(len(constraints)), key=lambda idx:costs[idx])
+                    constraints[:] = [constraints[idx] for idx in order]
+
+
+    def __on_runtime_step_summary(self, _summaryFrequency, step):
+        ################################### log run summary ###################################
+        if _summaryFrequency is not None:
+            if not(step+1)%_summaryFrequency:
+                summary, args = self.__get_runtime_summary()
+                LOGGER.info(summary%args)
+
+
+    def __on_runtime_step_check_drift(self, _driftCheckFrequency, _usedConstraints, step):
+        ################################ check constraints drift ###############################
+        if _driftCheckFrequency is not None:
+            if not(step+1)%_driftCheckFrequency:
+                self.check_drift(constraints=_usedConstraints)
+
+
+    def __on_runtime_step_resync(self, _resync, _usedConstraints, _constraints):
+        ############################### resync constraints data ################################
+        if _resync is not None and len(_usedConstraints):
+            if self.__accepted >= _resync['next']:
+                # one constraint at a time so no single step pays for all of them
+                _resync['next']  = self.__accepted + _resync['interval']
+                _resync['index'] = _resync['index']%len(_usedConstraints)
+                constraint       = _usedConstraints[_resync['index']]
+                _resync['index'] += 1
+                gap = self.resync_constraint(constraint, threshold=_resync['threshold'])
+                if gap is not None and gap['applied']:
+                    self.__totalStandardError = self.compute_total_standard_error(_constraints, current="standardError")
+
+
+    def __on_runtime_step_stop(self, _stop, _engineStartTime, step):
+        ##################################### check stop ######################################
+        # update best total standard error
+        if _stop['best'] is None or self.__totalStandardError<_stop['best']:
+            _stop['best']     = self.__totalStandardError
+            _stop['bestStep'] = step
+        # call callback
+        if _stop['callback'] is not None:
+            if not(step+1)%_stop['callbackFrequency']:
+                stats = RunStatistics(step                   = step+1,
+                                      generated              = self.__generated,
+                                      tried                  = self.__tried,
+                                      accepted               = self.__accepted,
+                                      removed                = self.__removed[1],
+                                      totalStandardError     = self.__totalStandardError,
+                                      bestTotalStandardError = _stop['best'],
+                                      elapsedTime            = time.time()-_engineStartTime)
+                if _stop['callback'](stats) is True:
+                    return "callback requested stop"
+        # check target
+        if _stop['targetStandardError'] is not None:
+            if self.__totalStandardError<=_stop['targetStandardError']:
+                return "target total standard error %.6f reached"%_stop['targetStandardError']
+        # check stall
+        if _stop['stallSteps'] is not None:
+            if step-_stop['bestStep']>=_stop['stallSteps']:
+                return "no improvement in the last %i steps"%_stop['stallSteps']
+        # check wall time
+        if _stop['maxWallTime'] is not None:
+            if time.time()-_engineStartTime>=_stop['maxWallTime']:
+                return "maximum wall time of %.1f seconds reached"%_stop['maxWallTime']
+        return None
+
+
     def run(self, numberOfSteps=100000,     sortConstraints=True,
                   saveFrequency=1000,       frame=None,
                   xyzFrequency=None,        xyzPath="trajectory.xyz",
-                  restartPdb='restart.pdb', ncores=None):
+                  restartPdb='restart.pdb', ncores=None,
+                  driftCheckFrequency=None, adaptiveOrderingFrequency=None,
+                  resyncFrequency=None,     resyncThreshold=None,
+                  maxWallTime=None,         targetStandardError=None,
+                  stallSteps=None,          callback=None,
+                  callbackFrequency=1000,   summaryFrequency=None):
         """
         Run stochastic fitting engine.
 
@@ -2317,14 +2934,68 @@ class Engine(object):
                If None is given, ncores will be set automatically to 1.
                This argument is only effective if fullrmc is compiled with
                openmp.
+            #. driftCheckFrequency (None, integer): Every driftCheckFrequency
+               steps, log the gap between constraints incrementally updated
+               data and a full recomputation using check_drift method.
+               If None is given, no drift check will be performed.
+            #. adaptiveOrderingFrequency (None, integer): Every
+               adaptiveOrderingFrequency steps, reorder rigid and non rigid
+               constraints evaluation according to their runtime measured
+               average evaluation time and rejection probability, starting
+               with the cheapest and the most likely to reject ones.
+               If None is given, constraints are evaluated in the order set
+               at run start.
+            #. resyncFrequency (None, integer): Every resyncFrequency
+               accepted moves, every used constraint incrementally updated
+               data is replaced by a full recomputation using
+               resync_constraint method. Constraints are resynchronized one
+               at a time, staggered evenly over resyncFrequency accepted
+               moves. If None is given, no resync will be performed.
+            #. resyncThreshold (None, number): Passed to resync_constraint.
+               If None is given, full recomputation is always applied.
+               Otherwise it's only applied when the constraint data gap
+               exceeds resyncThreshold and only logged otherwise.
+            #. maxWallTime (None, number): Stop running after maxWallTime
+               seconds. If None is given, no wall time limit is set.
+            #. targetStandardError (None, number): Stop running as soon as
+               total standard error is smaller or equal to
+               targetStandardError. If None is given, no target is set.
+            #. stallSteps (None, integer): Stop running when total standard
+               error has not improved in the last stallSteps steps.
+               If None is given, running never stops for stalling.
+            #. callback (None, callable): Called every callbackFrequency
+               steps with a read-only RunStatistics namedtuple of step,
+               generated, tried, accepted, removed, totalStandardError,
+               bestTotalStandardError and elapsedTime in seconds.
+               Running stops if callback returns True.
+            #. callbackFrequency (integer): Callback calling frequency in
+               steps.
+            #. summaryFrequency (None, integer): Every summaryFrequency steps,
+               log generated, tried, accepted and removed moves along with
+               total standard error at info level. Unlike per move accepted
+               logging, this is rate limited regardless of the acceptance
+               ratio. If None is given, no summary will be logged.
+
+           When running stops before numberOfSteps, the engine is saved if
+           saveFrequency is not None and a repository is defined.
         """
         # get arguments
         _numberOfSteps          = self.__runtime_get_number_of_steps(numberOfSteps)
         _saveFrequency, _frame  = self.__runtime_get_save_engine(saveFrequency, frame)
         _xyzFrequency, _xyzPath = self.__runtime_get_save_xyz(xyzFrequency, xyzPath)
+        _driftCheckFrequency    = self.__runtime_get_drift_check(driftCheckFrequency)
+        _adaptiveOrderingFrequency = self.__runtime_get_adaptive_ordering(adaptiveOrderingFrequency)
+        _resyncFrequency, _resyncThreshold = self.__runtime_get_resync(resyncFrequency, resyncThreshold)
+        _summaryFrequency = self.__runtime_get_summary(summaryFrequency)
+        _stop = self.__runtime_get_stop(maxWallTime, targetStandardError, stallSteps, callback, callbackFrequency)
+        _mustCheckStop = any([_stop[k] is not None for k in ('maxWallTime','targetStandardError','stallSteps','callback')])
         assert _frame == self.__usedFrame, LOGGER.error("Must save engine before changing frame.")
         if _saveFrequency<=_numberOfSteps:
             assert self.__repository is not None, LOGGER.error("engine might be saving during this run but repository is not defined. Use Engine.save method before calling run method.")
+        # pull lazily loaded data
+        self.materialize()
+        # insure groups table is set and engine aware
+        self.groups._set_engine(self)
         # set runtime ncores
         self.__set_runtime_ncores(ncores)
         # create xyz file
@@ -2348,6 +3019,20 @@ class Engine(object):
         self.__groupSelector._runtime_initialize()
         # runtime initialize constraints
         [c._runtime_initialize() for c in _usedConstraints]
+        # reset constraints runtime statistics
+        [c._reset_runtime_statistics() for c in _usedConstraints]
+        # compute moved terms of all used bonded constraints at once so
+        # bonded atoms vectors are computed only once per move
+        _bondedTerms = _BondedTermsEvaluator(_usedConstraints)
+        if len(_bondedTerms)>1:
+            _bondedTerms.attach()
+        self._runtime_measureConstraints = _adaptiveOrderingFrequency is not None
+        # cache moves logging flags so disabled log levels cost nothing
+        self._runtime_logAccepted = LOGGER.is_enabled("move accepted")
+        self._runtime_logRejected = LOGGER.is_enabled("move rejected")
+        self._runtime_logNotTried = LOGGER.is_enabled("move not tried")
+        if not LOGGER.is_enabled("info"):
+            _summaryFrequency = None
         # compute totalStandardError
         self.__totalStandardError = self.compute_total_standard_error(_constraints, current="standardError")
         # initialize useful arguments
@@ -2356,6 +3041,14 @@ class Engine(object):
         _coordsBeforeMove            = None
         _moveTried                   = False
         movedRealCoordinates         = None
+        _resync                      = None
+        _stopReason                  = None
+        if _resyncFrequency is not None:
+            _interval = max(1, _resyncFrequency//max(1,len(_usedConstraints)))
+            _resync   = {'interval' :_interval,
+                         'next'     :self.__accepted+_interval,
+                         'index'    :0,
+                         'threshold':_resyncThreshold}
         # save whole engine if must be done
         if self.__mustSave: # Currently it is always False. will check and fix it later
             self.save()
@@ -2375,7 +3068,8 @@ class Engine(object):
                                                 movedRealCoordinates = movedRealCoordinates,
                                                 _moveTried           = _moveTried)
             if not len(self._RT_groupAtomsIndexes):
-                LOGGER.nottried("Generated move %i can't be tried because all atoms are collected."%self.__generated)
+                if self._runtime_logNotTried:
+                    LOGGER.nottried("Generated move %i can't be tried because all atoms are collected.", self.__generated)
             else:
                 # try move atom
                 if movedRealCoordinates is None:
@@ -2388,7 +3082,8 @@ class Engine(object):
                                                     _rigidConstraints    = _rigidConstraints,
                                                     _usedConstraints     = _usedConstraints,
                                                     movedRealCoordinates = movedRealCoordinates,
-                                                    movedBoxCoordinates  = movedBoxCoordinates)
+                                                    movedBoxCoordinates  = movedBoxCoordinates,
+                                                    _bondedTerms         = _bondedTerms)
             ## save engine
             _lastSavedTotalStandardError = \
             self.__on_runtime_step_save_engine(_saveFrequency               = _saveFrequency,
@@ -2399,6 +3094,29 @@ class Engine(object):
             ## save xyz trajecctory
             ## special care must be taken because once atoms are collected xyz files needs to adapt
             self.__on_runtime_step_save_xyz(_xyzFrequency=_xyzFrequency, _xyzfd=_xyzfd, step=step)
+            ## log run summary
+            self.__on_runtime_step_summary(_summaryFrequency=_summaryFrequency, step=step)
+            ## check constraints drift
+            self.__on_runtime_step_check_drift(_driftCheckFrequency=_driftCheckFrequency, _usedConstraints=_usedConstraints, step=step)
+            ## resync constraints data
+            self.__on_runtime_step_resync(_resync=_resync, _usedConstraints=_usedConstraints, _constraints=_constraints)
+            ## order constraints by runtime measured expected cost
+            self.__on_runtime_step_order_constraints(_adaptiveOrderingFrequency=_adaptiveOrderingFrequency, _constraints=_constraints, _rigidConstraints=_rigidConstraints, step=step)
+            ## check stopping criteria
+            if _mustCheckStop:
+                _stopReason = self.__on_runtime_step_stop(_stop=_stop, _engineStartTime=_engineStartTime, step=step)
+                if _stopReason is not None:
+                    break
+        # detach bonded terms evaluator
+        _bondedTerms.detach()
+        # save engine when stopped before all steps are executed
+        if _stopReason is not None and _saveFrequency is not None and self.__repository is not None:
+            _lastSavedTotalStandardError = \
+            self.__on_runtime_step_save_engine(_saveFrequency               = 1,
+                                               step                         = step,
+                                               _frame                       = _frame,
+                                               _usedConstraints             = _usedConstraints,
+                                               _lastSavedTotalStandardError = _lastSavedTotalStandardError)
         # close .xyz file
         if _xyzFrequency is not None:
             _xyzfd.close()
@@ -2408,4 +3126,25 @@ class Engine(object):
 
         #   #####################################################################################   #
         #   ################################# FINISH ENGINE RUN #################################   #
-        LOGGER.info("Engine finishes executing all '%i' steps in %s" % (_numberOfSteps, get_elapsed_time(_engineStartTime, format="%d(days) %d:%d:%d")))
+        if _stopReason is None:
+            LOGGER.info("Engine finishes executing all '%i' steps in %s" % (_numberOfSteps, get_elapsed_time(_engineStartTime, format="%d(days) %d:%d:%d")))
+        else:
+            LOGGER.info("Engine stops after executing '%i' steps out of '%i' because %s in %s" % (step+1, _numberOfSteps, _stopReason, get_elapsed_time(_engineStartTime, format="%d(days) %d:%d:%d")))
+
+
+
+# scoring worker process engine, set by _init_scoring_worker
+_SCORING_ENGINE = None
+
+def _init_scoring_worker(path, frame):
+    """ Load engine in scoring worker process and detach it from its
+    repository so nothing is written while scoring."""
+    global _SCORING_ENGINE
+    engine = Engine().load(path)
+    assert engine.usedFrame == frame, LOGGER.error("saved engine used frame '%s' is not the scoring frame '%s'. Save engine before scoring configurations."%(engine.usedFrame, frame))
+    engine._set_repository(None)
+    _SCORING_ENGINE = engine
+
+def _score_configuration(realCoordinates):
+    """ Score configuration using worker process engine."""
+    return _SCORING_ENGINE._score_coordinates(realCoordinates)
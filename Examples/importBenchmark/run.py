@@ -0,0 +1,52 @@
+##########################################################################################
+##############################  IMPORTING USEFUL DEFINITIONS  ############################
+# standard libraries imports
+import os, sys, subprocess
+
+
+##########################################################################################
+#####################################  PARAMETERS  #######################################
+# number of fresh interpreters to import fullrmc in
+NTRIALS     = 10
+# maximum allowed mean import time in seconds
+MAX_TIME    = 0.5
+# modules that must not be loaded by a plain 'import fullrmc'
+HEAVY       = ['fullrmc.Engine', 'pdbParser.pdbParser', 'pyrep', 'matplotlib']
+# code run in every fresh interpreter. It prints import time then eagerly loaded modules
+CODE = """
+import sys, time
+tic = time.time()
+import fullrmc
+print time.time()-tic
+print ','.join([m for m in %r if m in sys.modules])
+"""%(HEAVY,)
+
+
+##########################################################################################
+###################################  RUN BENCHMARK  ######################################
+times = []
+eager = set()
+for _ in range(NTRIALS):
+    out = subprocess.check_output([sys.executable, '-c', CODE]).strip().splitlines()
+    times.append( float(out[0]) )
+    if len(out)>1 and len(out[1]):
+        eager.update( out[1].split(',') )
+minTime  = min(times)
+meanTime = sum(times)/len(times)
+
+
+##########################################################################################
+###################################  REPORT RESULTS  #####################################
+print "import fullrmc over %i fresh interpreters"%NTRIALS
+print "    min  time: %.4f s"%minTime
+print "    mean time: %.4f s (maximum allowed %.4f s)"%(meanTime, MAX_TIME)
+failed = False
+if len(eager):
+    print "    REGRESSION: modules eagerly imported: %s"%(', '.join(sorted(eager)))
+    failed = True
+if meanTime > MAX_TIME:
+    print "    REGRESSION: mean import time exceeds maximum allowed"
+    failed = True
+if failed:
+    sys.exit(1)
+print "    OK"
@@ -64,8 +64,8 @@ if HISTOGRAMS:
         for n in CORES:
             mtime = []
             for _ in range(AVERAGE):
-                hintra = np.zeros((elIdx,elIdx,histSize), dtype=np.float32)
-                hinter = np.zeros((elIdx,elIdx,histSize), dtype=np.float32)
+                hintra = np.zeros((elIdx,elIdx,histSize), dtype=np.int32)
+                hinter = np.zeros((elIdx,elIdx,histSize), dtype=np.int32)
                 tic = time.time()              
                 single_pairs_histograms( atomIndex     = atomIndex, 
                                          distances     = distances,
@@ -6,8 +6,9 @@ cimport cython
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from cython.parallel import prange
+from cython.parallel import prange, threadid
 from fullrmc.Core.pairs_distances import pairs_distances_to_point
+from fullrmc.Core.Collection import get_cells_list
 
 # declare types
 NUMPY_FLOAT32 = np.float32
@@ -16,10 +17,21 @@ ctypedef np.float32_t C_FLOAT32
 ctypedef np.int32_t   C_INT32
 
 # declare constants
+cdef C_FLOAT32 HALF_BOX_LENGTH = 0.5
 cdef C_FLOAT32 FLOAT_ZERO  = 0.0
 cdef C_FLOAT32 FLOAT_ONE   = 1.0
 cdef C_INT32   INT32_ZERO  = 0
 cdef C_INT32   INT32_ONE   = 1
+cdef C_INT32   INT32_TWO   = 2
+
+# declare math functions
+cdef extern from "math.h":
+    C_FLOAT32 floor(C_FLOAT32 x) nogil
+    C_FLOAT32 ceil(C_FLOAT32 x)  nogil
+    C_FLOAT32 sqrt(C_FLOAT32 x)  nogil
+
+cdef inline C_FLOAT32 round(C_FLOAT32 num) nogil:
+    return floor(num + HALF_BOX_LENGTH) if (num > FLOAT_ZERO) else ceil(num - HALF_BOX_LENGTH)
 
 
 
@@ -356,7 +368,28 @@ def all_atoms_coord_number_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None
                                    list                       asCoreDefIdxs,
                                    list                       inShellDefIdxs,
                                    C_FLOAT32[:]               coordNumData,
-                                   C_INT32                    ncores = 1):
+                                   C_INT32                    ncores = 1,
+                                   bint                       useCells = False):
+    # use a cells list when the system is big enough to be divided into cells
+    if useCells and len(upperShells):
+        atomsIndex, cellsOffsets, neighbours = get_cells_list(boxCoords = boxCoords,
+                                                              basis     = np.asarray(basis),
+                                                              isPBC     = isPBC,
+                                                              cutoff    = max(upperShells))
+        if atomsIndex is not None:
+            cells_atoms_coord_number_coords( boxCoords     = boxCoords,
+                                             basis         = basis,
+                                             isPBC         = isPBC,
+                                             atomsIndex    = atomsIndex,
+                                             cellsOffsets  = cellsOffsets,
+                                             neighbours    = neighbours,
+                                             coresIndexes  = coresIndexes,
+                                             shellsIndexes = shellsIndexes,
+                                             lowerShells   = lowerShells,
+                                             upperShells   = upperShells,
+                                             coordNumData  = coordNumData,
+                                             ncores        = ncores)
+            return
     # declare variables
     cdef C_INT32 i
     # get indexes
@@ -376,6 +409,147 @@ def all_atoms_coord_number_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None
                                      ncores         = ncores)
 
 
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef void _cells_coord_number( C_FLOAT32[:,:] boxCoords,
+                               C_FLOAT32[:,:] basis,
+                               bint           isPBC,
+                               C_INT32[:]     atomsIndex,
+                               C_INT32[:]     cellsOffsets,
+                               C_INT32[:,:]   neighbours,
+                               C_INT32[:,:]   isCore,
+                               C_INT32[:,:]   isShell,
+                               C_FLOAT32[:]   lowerShells,
+                               C_FLOAT32[:]   upperShells,
+                               C_INT32[:,:]   coordNum,
+                               C_INT32        ncores = 1) nogil:
+    # declare variables
+    cdef C_INT32 c, n, nc, ii, jj, i, j, d, tid
+    cdef C_FLOAT32 box_dx, box_dy, box_dz
+    cdef C_FLOAT32 real_dx, real_dy, real_dz, distance
+    cdef C_INT32 numberOfCells = <C_INT32>cellsOffsets.shape[0]-INT32_ONE
+    cdef C_INT32 numberOfNeighbours = <C_INT32>neighbours.shape[1]
+    cdef C_INT32 numberOfDefinitions = <C_INT32>lowerShells.shape[0]
+    cdef C_INT32 num_threads = ncores
+    # every thread fills its own counts, no entry is shared between threads
+    for c in prange(INT32_ZERO, numberOfCells, INT32_ONE, nogil=True, schedule="dynamic", num_threads=num_threads):
+        tid = threadid()
+        for n in range(numberOfNeighbours):
+            nc = neighbours[c,n]
+            if nc < INT32_ZERO:
+                continue
+            for ii in range(cellsOffsets[c], cellsOffsets[c+1]):
+                i = atomsIndex[ii]
+                for jj in range(cellsOffsets[nc], cellsOffsets[nc+1]):
+                    j = atomsIndex[jj]
+                    # every pair is found once from its smallest index
+                    if j <= i:
+                        continue
+                    # calculate distance
+                    if isPBC:
+                        box_dx  = boxCoords[i,0] - boxCoords[j,0]
+                        box_dy  = boxCoords[i,1] - boxCoords[j,1]
+                        box_dz  = boxCoords[i,2] - boxCoords[j,2]
+                        box_dx  = box_dx - round(box_dx)
+                        box_dy  = box_dy - round(box_dy)
+                        box_dz  = box_dz - round(box_dz)
+                        real_dx = box_dx*basis[0,0] + box_dy*basis[1,0] + box_dz*basis[2,0]
+                        real_dy = box_dx*basis[0,1] + box_dy*basis[1,1] + box_dz*basis[2,1]
+                        real_dz = box_dx*basis[0,2] + box_dy*basis[1,2] + box_dz*basis[2,2]
+                    else:
+                        real_dx = boxCoords[i,0] - boxCoords[j,0]
+                        real_dy = boxCoords[i,1] - boxCoords[j,1]
+                        real_dz = boxCoords[i,2] - boxCoords[j,2]
+                    distance = <C_FLOAT32>sqrt(real_dx*real_dx + real_dy*real_dy + real_dz*real_dz)
+                    # a core-shell pair is counted once from the core and once from the shell
+                    for d in range(numberOfDefinitions):
+                        if not (lowerShells[d] <= distance <= upperShells[d]):
+                            continue
+                        if isCore[d,i] and isShell[d,j]:
+                            coordNum[tid,d] += INT32_TWO
+                        if isCore[d,j] and isShell[d,i]:
+                            coordNum[tid,d] += INT32_TWO
+
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+def cells_atoms_coord_number_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                                     C_FLOAT32[:,:]             basis not None,
+                                     bint                       isPBC,
+                                     ndarray[C_INT32, ndim=1]   atomsIndex not None,
+                                     ndarray[C_INT32, ndim=1]   cellsOffsets not None,
+                                     ndarray[C_INT32, ndim=2]   neighbours not None,
+                                     list                       coresIndexes,
+                                     list                       shellsIndexes,
+                                     list                       lowerShells,
+                                     list                       upperShells,
+                                     C_FLOAT32[:]               coordNumData,
+                                     C_INT32                    ncores = 1):
+    """
+    Computes all atoms coordination numbers given atomic coordinates and a cells
+    list as built by fullrmc.Core.Collection.get_cells_list. Only pairs of atoms
+    in the same or neighbouring cells are computed. Every thread accumulates its
+    own private counts that are reduced at the end. Counts are added to
+    coordNumData the same way all_atoms_coord_number_coords does, every core-shell
+    pair counted twice.
+    
+    :Arguments:
+       #. boxCoords (float32 array): The whole system box coordinates.
+       #. basis (float32 array): The box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. atomsIndex (int32 array): The atoms index array sorted by cell.
+       #. cellsOffsets (int32 array): The cells offsets array of length number of cells+1.
+       #. neighbours (int32 array): The (number of cells, 27) neighbouring cells array where -1 entries are skipped.
+       #. coresIndexes (list): Every definition core atoms indexes.
+       #. shellsIndexes (list): Every definition shell atoms indexes.
+       #. lowerShells (list): Every definition shell lower limit.
+       #. upperShells (list): Every definition shell upper limit. Must be smaller or equal to cells width.
+       #. coordNumData (float32 array): Every definition coordination number to increment.
+       #. ncores (int32) [default=1]: The number of cores to use. 
+    """
+    cdef C_INT32 d
+    cdef C_INT32 numberOfAtoms       = <C_INT32>boxCoords.shape[0]
+    cdef C_INT32 numberOfDefinitions = <C_INT32>len(lowerShells)
+    ncores = <C_INT32>max(INT32_ONE, ncores)
+    # create definitions core and shell atoms masks
+    cdef ndarray[C_INT32, mode="c", ndim=2] isCore  = np.zeros((numberOfDefinitions,numberOfAtoms), dtype=NUMPY_INT32)
+    cdef ndarray[C_INT32, mode="c", ndim=2] isShell = np.zeros((numberOfDefinitions,numberOfAtoms), dtype=NUMPY_INT32)
+    for d from 0 <= d < numberOfDefinitions:
+        isCore[d, np.asarray(coresIndexes[d],  dtype=NUMPY_INT32)] = INT32_ONE
+        isShell[d,np.asarray(shellsIndexes[d], dtype=NUMPY_INT32)] = INT32_ONE
+    # create threads private counts
+    cdef ndarray[C_INT32, mode="c", ndim=2] coordNum = np.zeros((ncores,numberOfDefinitions), dtype=NUMPY_INT32)
+    # compute counts
+    _cells_coord_number( boxCoords    = boxCoords,
+                         basis        = basis,
+                         isPBC        = isPBC,
+                         atomsIndex   = atomsIndex,
+                         cellsOffsets = cellsOffsets,
+                         neighbours   = neighbours,
+                         isCore       = isCore,
+                         isShell      = isShell,
+                         lowerShells  = np.array(lowerShells, dtype=NUMPY_FLOAT32),
+                         upperShells  = np.array(upperShells, dtype=NUMPY_FLOAT32),
+                         coordNum     = coordNum,
+                         ncores       = ncores)
+    # reduce threads counts
+    counts = np.sum(coordNum, axis=0)
+    # atoms both core and shell are at zero distance from themselves
+    for d from 0 <= d < numberOfDefinitions:
+        if lowerShells[d] <= FLOAT_ZERO:
+            counts[d] += INT32_TWO*np.sum(isCore[d]*isShell[d])
+    for d from 0 <= d < numberOfDefinitions:
+        coordNumData[d] += <C_FLOAT32>counts[d]
+
+
             
     
     
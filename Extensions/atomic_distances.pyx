@@ -7,8 +7,9 @@ cimport cython
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from cython.parallel import prange
+from cython.parallel import prange, threadid
 from fullrmc.Core.pairs_distances import pairs_distances_to_indexcoords
+from fullrmc.Core.Collection import get_cells_list
 
 # declare types
 NUMPY_FLOAT32 = np.float32
@@ -33,6 +34,9 @@ cdef extern from "math.h":
     C_FLOAT32 abs(C_FLOAT32 x)   nogil # not sure why abs(-1.1) = 1 not 1.1, it is rounding. so we won't use it.
     C_FLOAT32 fabs(C_FLOAT32 x)  nogil 
 
+cdef inline C_FLOAT32 round(C_FLOAT32 num) nogil:
+    return floor(num + HALF_BOX_LENGTH) if (num > FLOAT_ZERO) else ceil(num - HALF_BOX_LENGTH)
+
             
 @cython.nonecheck(False)
 @cython.boundscheck(False)
@@ -63,17 +67,17 @@ cdef void _single_atomic_distances_dists( C_INT32          atomIndex,
     cdef C_FLOAT32 distance, upper, lower
     cdef C_INT32 i, startIndex, endIndex
     cdef C_INT32 inLoopMoleculeIndex, inLoopElementIndex
-    cdef C_INT32 num_threads = ncores
     # start index
     if allAtoms:
         startIndex = INT32_ZERO
     else:
         startIndex = <C_INT32>atomIndex
     endIndex = <C_INT32>distances.shape[0]
-    # start openmp loop
-    for i in prange(startIndex, endIndex, INT32_ONE, nogil=True, schedule="static", num_threads=num_threads): # added OCT 2016
-    #for i in prange(INT32_ZERO, <C_INT32>distances.shape[0], INT32_ONE, nogil=True, schedule="static", num_threads=num_threads):
-    #for i from startIndex <= i < endIndex:
+    # all pairs of this atom increment the same arrays entries, concurrent
+    # increments of the same entry would be lost. Loop is kept serial and
+    # ncores is used by distances computation only.
+    #for i in prange(startIndex, endIndex, INT32_ONE, nogil=True, schedule="static", num_threads=num_threads): # added OCT 2016
+    for i from startIndex <= i < endIndex:
         if i == atomIndex: continue
         inLoopMoleculeIndex = moleculeIndex[i]
         # whether atoms are of the same molecule and intramolecular is not needed
@@ -492,6 +496,190 @@ def multiple_atomic_distances_dists( ndarray[C_INT32, ndim=1]      indexes not N
 
 
     
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef void _cells_atomic_distances( C_FLOAT32[:,:]     boxCoords,
+                                   C_FLOAT32[:,:]     basis,
+                                   bint               isPBC,
+                                   C_INT32[:]         moleculeIndex,
+                                   C_INT32[:]         elementIndex,
+                                   C_INT32[:]         atomsIndex,
+                                   C_INT32[:]         cellsOffsets,
+                                   C_INT32[:,:]       neighbours,
+                                   C_FLOAT32[:,:,:,:] dintra,
+                                   C_FLOAT32[:,:,:,:] dinter,
+                                   C_INT32[:,:,:,:]   nintra,
+                                   C_INT32[:,:,:,:]   ninter,
+                                   C_FLOAT32[:,:,:]   lowerLimit,
+                                   C_FLOAT32[:,:,:]   upperLimit,
+                                   bint               interMolecular = True,
+                                   bint               intraMolecular = True,
+                                   bint               reduceDistanceToUpper = False,
+                                   bint               reduceDistanceToLower = False,
+                                   bint               reduceDistance = False,
+                                   C_INT32            ncores = 1) nogil:
+    # declare variables
+    cdef C_INT32 c, n, nc, ii, jj, i, j, tid
+    cdef C_FLOAT32 box_dx, box_dy, box_dz
+    cdef C_FLOAT32 real_dx, real_dy, real_dz
+    cdef C_FLOAT32 distance, upper, lower
+    cdef C_INT32 numberOfCells = <C_INT32>cellsOffsets.shape[0]-INT32_ONE
+    cdef C_INT32 numberOfNeighbours = <C_INT32>neighbours.shape[1]
+    cdef C_INT32 num_threads = ncores
+    # every thread fills its own arrays, no entry is shared between threads
+    for c in prange(INT32_ZERO, numberOfCells, INT32_ONE, nogil=True, schedule="dynamic", num_threads=num_threads):
+        tid = threadid()
+        for n in range(numberOfNeighbours):
+            nc = neighbours[c,n]
+            if nc < INT32_ZERO:
+                continue
+            for ii in range(cellsOffsets[c], cellsOffsets[c+1]):
+                i = atomsIndex[ii]
+                for jj in range(cellsOffsets[nc], cellsOffsets[nc+1]):
+                    j = atomsIndex[jj]
+                    # every pair is counted once from its smallest index
+                    if j <= i:
+                        continue
+                    # whether atoms are of the same molecule and intramolecular is not needed
+                    if (not intraMolecular) and (moleculeIndex[i]==moleculeIndex[j]):
+                        continue
+                    # whether atoms are not of the same molecule and intermolecular is not needed
+                    if (not interMolecular) and (not moleculeIndex[i]==moleculeIndex[j]):
+                        continue
+                    # calculate distance
+                    if isPBC:
+                        box_dx  = boxCoords[i,0] - boxCoords[j,0]
+                        box_dy  = boxCoords[i,1] - boxCoords[j,1]
+                        box_dz  = boxCoords[i,2] - boxCoords[j,2]
+                        box_dx  = box_dx - round(box_dx)
+                        box_dy  = box_dy - round(box_dy)
+                        box_dz  = box_dz - round(box_dz)
+                        real_dx = box_dx*basis[0,0] + box_dy*basis[1,0] + box_dz*basis[2,0]
+                        real_dy = box_dx*basis[0,1] + box_dy*basis[1,1] + box_dz*basis[2,1]
+                        real_dz = box_dx*basis[0,2] + box_dy*basis[1,2] + box_dz*basis[2,2]
+                    else:
+                        real_dx = boxCoords[i,0] - boxCoords[j,0]
+                        real_dy = boxCoords[i,1] - boxCoords[j,1]
+                        real_dz = boxCoords[i,2] - boxCoords[j,2]
+                    distance = <C_FLOAT32>sqrt(real_dx*real_dx + real_dy*real_dy + real_dz*real_dz)
+                    # check limits
+                    lower = lowerLimit[elementIndex[j],elementIndex[i],0]
+                    upper = upperLimit[elementIndex[j],elementIndex[i],0]
+                    if distance<lower:
+                        continue
+                    if distance>=upper:
+                        continue
+                    # reduce distance to the smaller difference between distance and limits.
+                    if reduceDistanceToUpper:
+                        distance = fabs(upper-distance)
+                    elif reduceDistanceToLower:
+                        distance = fabs(lower-distance)
+                    elif reduceDistance:
+                        if distance > (lower+upper)/FLOAT_TWO:
+                            distance = fabs(upper-distance)
+                        else:
+                            distance = fabs(lower-distance)
+                    # increment thread arrays
+                    if moleculeIndex[i] == moleculeIndex[j]:
+                        dintra[tid,elementIndex[i],elementIndex[j],0] += distance
+                        nintra[tid,elementIndex[i],elementIndex[j],0] += INT32_ONE
+                    else:
+                        dinter[tid,elementIndex[i],elementIndex[j],0] += distance
+                        ninter[tid,elementIndex[i],elementIndex[j],0] += INT32_ONE
+
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+def cells_atomic_distances_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                                   np.ndarray[C_FLOAT32, ndim=2] basis not None,
+                                   bint                          isPBC,
+                                   ndarray[C_INT32, ndim=1]      moleculeIndex not None,
+                                   ndarray[C_INT32, ndim=1]      elementIndex not None,
+                                   ndarray[C_INT32, ndim=1]      atomsIndex not None,
+                                   ndarray[C_INT32, ndim=1]      cellsOffsets not None,
+                                   ndarray[C_INT32, ndim=2]      neighbours not None,
+                                   C_INT32                       numberOfElements,
+                                   np.ndarray[C_FLOAT32, ndim=3] lowerLimit not None,
+                                   np.ndarray[C_FLOAT32, ndim=3] upperLimit not None,
+                                   bint                          interMolecular=True,
+                                   bint                          intraMolecular=True,
+                                   bint                          reduceDistanceToUpper=False,
+                                   bint                          reduceDistanceToLower=False,
+                                   bint                          reduceDistance=False,
+                                   C_INT32                       ncores = 1):
+    """
+    Computes all atoms inter-molecular distances found within limits given atomic
+    coordinates and a cells list as built by fullrmc.Core.Collection.get_cells_list.
+    Only pairs of atoms in the same or neighbouring cells are computed. Every thread
+    accumulates its own private arrays that are reduced at the end.
+    
+    :Arguments:
+       #. boxCoords (float32 array): The whole system box coordinates.
+       #. basis (float32 array): The box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. moleculeIndex (int32 array): The molecule's index array, assigning a molecule index for every atom.
+       #. elementIndex (int32 array): The element's index array, assigning an element index for every atom.
+       #. atomsIndex (int32 array): The atoms index array sorted by cell.
+       #. cellsOffsets (int32 array): The cells offsets array of length number of cells+1.
+       #. neighbours (int32 array): The (number of cells, 27) neighbouring cells array where -1 entries are skipped.
+       #. numberOfElements (int32): The number of elements in the system.
+       #. lowerLimit (float32 array): The (numberOfElements,numberOfElements,1) array of lower distance limits.
+       #. upperLimit (float32 array): The (numberOfElements,numberOfElements,1) array of upper distance limits. All upper limits must be smaller or equal to cells width.
+       #. interMolecular (bool): Whether to consider inter-molecular distances. DEFAULT: True
+       #. intraMolecular (bool): Whether to consider intra-molecular distances. DEFAULT: True
+       #. reduceDistanceToUpper (bool): Whether to reduce counted distances to the difference between the found distance and the upper limit. When True, this flag has the higher priority. DEFAULT: False
+       #. reduceDistanceToLower (bool): Whether to reduce counted distances to the difference between the found distance and the lower limit. When True, this flag may lose its priority for reduceDistanceToUpper if the later is True. DEFAULT: False
+       #. reduceDistance (bool): Whether to reduce counted distances to the difference between the found distance and the closest limit. When True, this flag may lose its priority if any of reduceDistanceToLower or reduceDistanceToUpper is True. DEFAULT: False
+       #. ncores (int32) [default=1]: The number of cores to use. 
+       
+    :Returns:
+       #. nintra (int32 array): The created (numberOfElements,numberOfElements,1) array for intra-molecular counted elements.
+       #. dintra (float32 array): The created (numberOfElements,numberOfElements,1) array for intra-molecular counted distances.
+       #. ninter (int32 array): The created (numberOfElements,numberOfElements,1) array for inter-molecular counted elements.
+       #. dinter (float32 array): The created (numberOfElements,numberOfElements,1) array for inter-molecular counted distances.
+    """
+    ncores = <C_INT32>max(INT32_ONE, ncores)
+    # create threads private arrays
+    cdef ndarray[C_FLOAT32,  mode="c", ndim=4] dintra = np.zeros((ncores,numberOfElements,numberOfElements,1), dtype=NUMPY_FLOAT32)
+    cdef ndarray[C_FLOAT32,  mode="c", ndim=4] dinter = np.zeros((ncores,numberOfElements,numberOfElements,1), dtype=NUMPY_FLOAT32)
+    cdef ndarray[C_INT32,    mode="c", ndim=4] nintra = np.zeros((ncores,numberOfElements,numberOfElements,1), dtype=NUMPY_INT32)
+    cdef ndarray[C_INT32,    mode="c", ndim=4] ninter = np.zeros((ncores,numberOfElements,numberOfElements,1), dtype=NUMPY_INT32)
+    # compute distances
+    _cells_atomic_distances( boxCoords             = boxCoords,
+                             basis                 = basis,
+                             isPBC                 = isPBC,
+                             moleculeIndex         = moleculeIndex,
+                             elementIndex          = elementIndex,
+                             atomsIndex            = atomsIndex,
+                             cellsOffsets          = cellsOffsets,
+                             neighbours            = neighbours,
+                             dintra                = dintra,
+                             dinter                = dinter,
+                             nintra                = nintra,
+                             ninter                = ninter,
+                             lowerLimit            = lowerLimit,
+                             upperLimit            = upperLimit,
+                             interMolecular        = interMolecular,
+                             intraMolecular        = intraMolecular,
+                             reduceDistanceToUpper = reduceDistanceToUpper,
+                             reduceDistanceToLower = reduceDistanceToLower,
+                             reduceDistance        = reduceDistance,
+                             ncores                = ncores)
+    # reduce threads arrays
+    return np.sum(nintra, axis=0, dtype=NUMPY_INT32),   \
+           np.sum(dintra, axis=0, dtype=NUMPY_FLOAT32), \
+           np.sum(ninter, axis=0, dtype=NUMPY_INT32),   \
+           np.sum(dinter, axis=0, dtype=NUMPY_FLOAT32)
+
+
+
 @cython.nonecheck(False)
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -511,7 +699,8 @@ def full_atomic_distances_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
                                   bint                          reduceDistanceToLower=False,
                                   bint                          reduceDistance=False,
                                   bint                          countWithinLimits=True,
-                                  C_INT32                       ncores = 1):    
+                                  C_INT32                       ncores = 1,
+                                  bint                          useCells = False):    
     """
     Computes all atoms inter-molecular distances constraint given coordinates.
     
@@ -531,6 +720,7 @@ def full_atomic_distances_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
        #. reduceDistanceToLower (bool): Whether to reduce counted distances to the difference between the found distance and the lower limit. When True, this flag may lose its priority for reduceDistanceToUpper if the later is True. DEFAULT: False
        #. reduceDistance (bool): Whether to reduce counted distances to the difference between the found distance and the closest limit. When True, this flag may lose its priority if any of reduceDistanceToLower or reduceDistanceToUpper is True. DEFAULT: False
        #. ncores (int32) [default=1]: The number of cores to use. 
+       #. useCells (bool) [default=False]: Whether to use a cells list when only distances within limits are counted and the system is big enough to be divided into cells. Meant for whole system computations only and not for small subsets of atoms.
        
     :Returns:
        #. dintra (float32 array): The created (numberOfElements,numberOfElements,1) array for intra-molecular counted distances.
@@ -538,6 +728,30 @@ def full_atomic_distances_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
        #. nintra (float32 array): The created (numberOfElements,numberOfElements,1) array for intra-molecular counted elements.
        #. ninter (float32 array): The created (numberOfElements,numberOfElements,1) array for inter-molecular counted elements.
     """
+    # use a cells list when only distances within limits are counted
+    if useCells and countWithinLimits:
+        atomsIndex, cellsOffsets, neighbours = get_cells_list(boxCoords = boxCoords,
+                                                              basis     = basis,
+                                                              isPBC     = isPBC,
+                                                              cutoff    = np.max(upperLimit))
+        if atomsIndex is not None:
+            return cells_atomic_distances_coords( boxCoords             = boxCoords,
+                                                  basis                 = basis,
+                                                  isPBC                 = isPBC,
+                                                  moleculeIndex         = moleculeIndex,
+                                                  elementIndex          = elementIndex,
+                                                  atomsIndex            = atomsIndex,
+                                                  cellsOffsets          = cellsOffsets,
+                                                  neighbours            = neighbours,
+                                                  numberOfElements      = numberOfElements,
+                                                  lowerLimit            = lowerLimit,
+                                                  upperLimit            = upperLimit,
+                                                  interMolecular        = interMolecular,
+                                                  intraMolecular        = intraMolecular,
+                                                  reduceDistance        = reduceDistance,
+                                                  reduceDistanceToLower = reduceDistanceToLower,
+                                                  reduceDistanceToUpper = reduceDistanceToUpper,
+                                                  ncores                = ncores)
     # get number of atoms
     cdef ndarray[C_INT32,  mode="c", ndim=1] indexes = np.arange( <C_INT32>boxCoords.shape[0], dtype=NUMPY_INT32)
     # calculate histograms
@@ -0,0 +1,508 @@
+"""
+This is a C compiled module to compute bonds, angles, dihedral angles and
+improper angles constraints in a single pass sharing the bonded atoms vectors.
+"""
+import cython
+cimport cython
+import numpy as np
+cimport numpy as np
+from numpy cimport ndarray
+from cython.parallel import prange
+
+# declare types
+NUMPY_FLOAT32 = np.float32
+NUMPY_INT32   = np.int32
+NUMPY_INT64   = np.int64
+ctypedef np.float32_t C_FLOAT32
+ctypedef np.int32_t   C_INT32
+
+# declare constants
+cdef C_FLOAT32 FLOAT32_NEG_ONE = -1.0
+cdef C_FLOAT32 FLOAT32_ZERO    = 0.0
+cdef C_FLOAT32 FLOAT32_ONE     = 1.0
+cdef C_FLOAT32 FLOAT32_TWO     = 2.0
+cdef C_FLOAT32 HALF_BOX_LENGTH = 0.5
+cdef C_FLOAT32 PI              = 3.141592653589793
+cdef C_FLOAT32 PI_2            = PI/2
+cdef C_FLOAT32 FULL_CIRCLE     = 360.
+cdef C_FLOAT32 RAD_TO_DEG      = 180./PI
+cdef C_INT32   INT32_ZERO      = 0
+cdef C_INT32   INT32_ONE       = 1
+
+
+cdef extern from "math.h":
+    C_FLOAT32 floor(C_FLOAT32 x) nogil
+    C_FLOAT32 ceil(C_FLOAT32 x)  nogil
+    C_FLOAT32 sqrt(C_FLOAT32 x)  nogil
+    C_FLOAT32 fabs(C_FLOAT32 x)  nogil
+    C_FLOAT32 acos(C_FLOAT32 x)  nogil
+    C_FLOAT32 atan2(C_FLOAT32 y, C_FLOAT32 x) nogil
+
+cdef inline C_FLOAT32 round(C_FLOAT32 num) nogil:
+    return floor(num + HALF_BOX_LENGTH) if (num > FLOAT32_ZERO) else ceil(num - HALF_BOX_LENGTH)
+
+cdef inline C_FLOAT32 clip(C_FLOAT32 num) nogil:
+    if num > FLOAT32_ONE:
+        return FLOAT32_ONE
+    elif num < FLOAT32_NEG_ONE:
+        return FLOAT32_NEG_ONE
+    return num
+
+
+
+############################################################################################
+################################### C VECTORS DEFINITIONS ##################################
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef void _pair_vector( C_FLOAT32[:,:] boxCoords,
+                        C_FLOAT32[:,:] basis,
+                        bint           isPBC,
+                        C_INT32        idxFrom,
+                        C_INT32        idxTo,
+                        C_FLOAT32[:,:] vectors,
+                        C_INT32        index) nogil:
+    # declare variables
+    cdef C_FLOAT32 diff_x, diff_y, diff_z
+    # calculate difference
+    diff_x = boxCoords[idxTo,0]-boxCoords[idxFrom,0]
+    diff_y = boxCoords[idxTo,1]-boxCoords[idxFrom,1]
+    diff_z = boxCoords[idxTo,2]-boxCoords[idxFrom,2]
+    if isPBC:
+        diff_x = diff_x-round(diff_x)
+        diff_y = diff_y-round(diff_y)
+        diff_z = diff_z-round(diff_z)
+        vectors[index,0] = diff_x*basis[0,0] + diff_y*basis[1,0] + diff_z*basis[2,0]
+        vectors[index,1] = diff_x*basis[0,1] + diff_y*basis[1,1] + diff_z*basis[2,1]
+        vectors[index,2] = diff_x*basis[0,2] + diff_y*basis[1,2] + diff_z*basis[2,2]
+    else:
+        vectors[index,0] = diff_x
+        vectors[index,1] = diff_y
+        vectors[index,2] = diff_z
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef inline void _get_vector( C_FLOAT32[:,:] vectors,
+                              C_INT32        ref,
+                              C_FLOAT32*     vector) nogil:
+    # ref is the signed vector row plus one. Negative ref is the opposite vector.
+    if ref > INT32_ZERO:
+        vector[0] = vectors[ref-INT32_ONE,0]
+        vector[1] = vectors[ref-INT32_ONE,1]
+        vector[2] = vectors[ref-INT32_ONE,2]
+    else:
+        vector[0] = -vectors[-ref-INT32_ONE,0]
+        vector[1] = -vectors[-ref-INT32_ONE,1]
+        vector[2] = -vectors[-ref-INT32_ONE,2]
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef inline C_INT32 _normalize(C_FLOAT32* vector) nogil:
+    cdef C_FLOAT32 norm
+    norm = sqrt(vector[0]*vector[0] + vector[1]*vector[1] + vector[2]*vector[2])
+    if norm == FLOAT32_ZERO:
+        return INT32_ONE
+    vector[0] /= norm
+    vector[1] /= norm
+    vector[2] /= norm
+    return INT32_ZERO
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef inline C_FLOAT32 _reduced(C_FLOAT32 value,
+                               C_FLOAT32 lower,
+                               C_FLOAT32 upper) nogil:
+    if value>=lower and value<=upper:
+        return FLOAT32_ZERO
+    elif value > (lower+upper)/FLOAT32_TWO:
+        return fabs(upper-value)
+    else:
+        return fabs(lower-value)
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef inline C_FLOAT32 _reduced_shell(C_FLOAT32 value,
+                                     C_FLOAT32 lower,
+                                     C_FLOAT32 upper) nogil:
+    # shells with upper limit smaller than lower limit cross the full circle
+    if (upper<lower) and value>upper:
+        return FLOAT32_ZERO
+    return _reduced(value, lower, upper)
+
+
+
+############################################################################################
+#################################### C TERMS DEFINITIONS ###################################
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef C_INT32 _bond_term( C_FLOAT32[:,:] vectors,
+                         C_INT32[:]     refs,
+                         C_FLOAT32[:]   lower,
+                         C_FLOAT32[:]   upper,
+                         C_FLOAT32[:]   values,
+                         C_FLOAT32[:]   reduced,
+                         C_INT32        index) nogil:
+    cdef C_FLOAT32 b[3]
+    cdef C_FLOAT32 length
+    _get_vector(vectors, refs[index], b)
+    length = sqrt(b[0]*b[0] + b[1]*b[1] + b[2]*b[2])
+    values[index]  = length
+    reduced[index] = _reduced(length, lower[index], upper[index])
+    return INT32_ZERO
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef C_INT32 _angle_term( C_FLOAT32[:,:] vectors,
+                          C_INT32[:]     leftRefs,
+                          C_INT32[:]     rightRefs,
+                          C_FLOAT32[:]   lower,
+                          C_FLOAT32[:]   upper,
+                          C_FLOAT32[:]   values,
+                          C_FLOAT32[:]   reduced,
+                          C_INT32        index) nogil:
+    cdef C_FLOAT32 left[3]
+    cdef C_FLOAT32 right[3]
+    cdef C_FLOAT32 angle
+    _get_vector(vectors, leftRefs[index],  left)
+    _get_vector(vectors, rightRefs[index], right)
+    if _normalize(left) or _normalize(right):
+        return INT32_ONE
+    angle = acos( clip(left[0]*right[0] + left[1]*right[1] + left[2]*right[2]) )
+    values[index]  = angle
+    reduced[index] = _reduced(angle, lower[index], upper[index])
+    return INT32_ZERO
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef C_INT32 _dihedral_term( C_FLOAT32[:,:] vectors,
+                             C_INT32[:]     b1Refs,
+                             C_INT32[:]     b2Refs,
+                             C_INT32[:]     b3Refs,
+                             C_FLOAT32[:]   lower1,
+                             C_FLOAT32[:]   upper1,
+                             C_FLOAT32[:]   lower2,
+                             C_FLOAT32[:]   upper2,
+                             C_FLOAT32[:]   lower3,
+                             C_FLOAT32[:]   upper3,
+                             C_FLOAT32[:]   values,
+                             C_FLOAT32[:]   reduced,
+                             C_INT32        index) nogil:
+    cdef C_FLOAT32 b1[3]
+    cdef C_FLOAT32 b2[3]
+    cdef C_FLOAT32 b3[3]
+    cdef C_FLOAT32 n1_x, n1_y, n1_z
+    cdef C_FLOAT32 n2_x, n2_y, n2_z
+    cdef C_FLOAT32 m1_x, m1_y, m1_z
+    cdef C_FLOAT32 x, y, angle, reducedAngle, var
+    _get_vector(vectors, b1Refs[index], b1)
+    _get_vector(vectors, b2Refs[index], b2)
+    _get_vector(vectors, b3Refs[index], b3)
+    if _normalize(b1) or _normalize(b2) or _normalize(b3):
+        return INT32_ONE
+    # compute n1 (b1 X b2) and n2 (b2 X b3)
+    n1_x = b1[1] * b2[2] - b1[2] * b2[1]
+    n1_y = b1[2] * b2[0] - b1[0] * b2[2]
+    n1_z = b1[0] * b2[1] - b1[1] * b2[0]
+    n2_x = b2[1] * b3[2] - b2[2] * b3[1]
+    n2_y = b2[2] * b3[0] - b2[0] * b3[2]
+    n2_z = b2[0] * b3[1] - b2[1] * b3[0]
+    # compute m1 (n1 X b2) so n1,m1 and b2 form an orthogonal  frame
+    m1_x = n1_y * b2[2] - n1_z * b2[1]
+    m1_y = n1_z * b2[0] - n1_x * b2[2]
+    m1_z = n1_x * b2[1] - n1_y * b2[0]
+    # compute n2 in (n1,m1,b2) frame and dihedral angle in degrees between 0-360
+    x = n1_x*n2_x + n1_y*n2_y + n1_z*n2_z
+    y = m1_x*n2_x + m1_y*n2_y + m1_z*n2_z
+    angle = atan2(y, x)*RAD_TO_DEG
+    if angle < FLOAT32_ZERO:
+        angle = FULL_CIRCLE+angle
+    # reduced angle is the minimum over all three shells
+    reducedAngle = _reduced_shell(angle, lower1[index], upper1[index])
+    if reducedAngle != FLOAT32_ZERO:
+        var = _reduced_shell(angle, lower2[index], upper2[index])
+        if var < reducedAngle:
+            reducedAngle = var
+    if reducedAngle != FLOAT32_ZERO:
+        var = _reduced_shell(angle, lower3[index], upper3[index])
+        if var < reducedAngle:
+            reducedAngle = var
+    values[index]  = angle
+    reduced[index] = reducedAngle
+    return INT32_ZERO
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef C_INT32 _improper_term( C_FLOAT32[:,:] vectors,
+                             C_INT32[:]     impRefs,
+                             C_INT32[:]     oxRefs,
+                             C_INT32[:]     oyRefs,
+                             C_FLOAT32[:]   lower,
+                             C_FLOAT32[:]   upper,
+                             C_FLOAT32[:]   values,
+                             C_FLOAT32[:]   reduced,
+                             C_INT32        index) nogil:
+    cdef C_FLOAT32 imp[3]
+    cdef C_FLOAT32 ox[3]
+    cdef C_FLOAT32 oy[3]
+    cdef C_FLOAT32 oz_x, oz_y, oz_z
+    cdef C_FLOAT32 angle
+    _get_vector(vectors, impRefs[index], imp)
+    _get_vector(vectors, oxRefs[index],  ox)
+    _get_vector(vectors, oyRefs[index],  oy)
+    if _normalize(imp) or _normalize(ox) or _normalize(oy):
+        return INT32_ONE
+    # compute OZ vector as ox X oy
+    oz_x =  ox[1]*oy[2] - ox[2]*oy[1]
+    oz_y = -ox[0]*oy[2] + ox[2]*oy[0]
+    oz_z =  ox[0]*oy[1] - ox[1]*oy[0]
+    angle = PI_2 - acos( clip(imp[0]*oz_x + imp[1]*oz_y + imp[2]*oz_z) )
+    values[index]  = angle
+    reduced[index] = _reduced(angle, lower[index], upper[index])
+    return INT32_ZERO
+
+
+
+############################################################################################
+################################### PYTHON DEFINITIONS #####################################
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def full_bonded_terms_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                              ndarray[C_FLOAT32, ndim=2] basis not None,
+                              bint                       isPBC,
+                              bonds     = None,
+                              angles    = None,
+                              dihedrals = None,
+                              impropers = None,
+                              C_INT32                    ncores = 1):
+    """
+    Computes bonds, angles, dihedral angles and improper angles constraints
+    in a single pass. Bonded atoms vectors are computed once for all given
+    terms. A vector that is shared between different terms or used in
+    opposite directions is computed only once.
+
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. bonds (None, tuple): Bonds definition as (idx1, idx2, lower, upper) arrays.
+       #. angles (None, tuple): Angles definition as (central, left, right, lower, upper) arrays.
+       #. dihedrals (None, tuple): Dihedral angles definition as
+          (indexes1, indexes2, indexes3, indexes4, lower1, upper1, lower2, upper2, lower3, upper3) arrays.
+       #. impropers (None, tuple): Improper angles definition as (improperIdxs, oIdxs, xIdxs, yIdxs, lower, upper) arrays.
+       #. ncores (int32) [default=1]: The number of cores to use.
+
+    :Returns:
+       #. bonds (None, tuple): The calculated (bondsLength, reducedLengths) if bonds are given.
+       #. angles (None, tuple): The calculated (angles, reducedAngles) in rad if angles are given.
+       #. dihedrals (None, tuple): The calculated (angles, reducedAngles) in degrees if dihedrals are given.
+       #. impropers (None, tuple): The calculated (angles, reducedAngles) in rad if impropers are given.
+    """
+    cdef C_INT32 i, n, nulls
+    cdef C_INT32 num_threads = ncores
+    cdef C_INT32 numberOfVectors
+    cdef C_FLOAT32[:,:] boxView   = boxCoords
+    cdef C_FLOAT32[:,:] basisView = basis
+    cdef C_INT32[:]     pairsFrom
+    cdef C_INT32[:]     pairsTo
+    cdef C_FLOAT32[:,:] vectors
+    cdef C_FLOAT32[:]   values
+    cdef C_FLOAT32[:]   reduced
+    cdef C_INT32[:]     refs1
+    cdef C_INT32[:]     refs2
+    cdef C_INT32[:]     refs3
+    cdef C_FLOAT32[:]   limit1
+    cdef C_FLOAT32[:]   limit2
+    cdef C_FLOAT32[:]   limit3
+    cdef C_FLOAT32[:]   limit4
+    cdef C_FLOAT32[:]   limit5
+    cdef C_FLOAT32[:]   limit6
+    # collect all bonded atoms directed pairs of all terms as
+    # (terms, number of atoms index columns, directed pairs columns)
+    TERMS = ( (bonds,     2, ((0,1),)),
+              (angles,    3, ((0,1),(0,2))),
+              (dihedrals, 4, ((0,1),(1,2),(2,3))),
+              (impropers, 4, ((0,1),(1,2),(1,3))) )
+    allFrom = []
+    allTo   = []
+    for terms, _, pairs in TERMS:
+        if terms is None:
+            continue
+        for f, t in pairs:
+            allFrom.append( np.asarray(terms[f], dtype=NUMPY_INT32) )
+            allTo.append( np.asarray(terms[t], dtype=NUMPY_INT32) )
+    if not len(allFrom):
+        return None, None, None, None
+    allFrom = np.concatenate(allFrom)
+    allTo   = np.concatenate(allTo)
+    # fold directed pairs to unique vectors and signed references
+    low   = np.minimum(allFrom, allTo).astype(NUMPY_INT64)
+    high  = np.maximum(allFrom, allTo).astype(NUMPY_INT64)
+    keys, inverse = np.unique(low*boxCoords.shape[0]+high, return_inverse=True)
+    allRefs = ((inverse+1)*np.where(allFrom<=allTo, 1, -1)).astype(NUMPY_INT32)
+    pairsFrom = (keys//boxCoords.shape[0]).astype(NUMPY_INT32)
+    pairsTo   = (keys%boxCoords.shape[0]).astype(NUMPY_INT32)
+    # compute unique vectors
+    numberOfVectors = <C_INT32>keys.shape[0]
+    vectors = np.empty((numberOfVectors,3), dtype=NUMPY_FLOAT32)
+    for i in prange(numberOfVectors, nogil=True, schedule="static", num_threads=num_threads):
+        _pair_vector(boxView, basisView, isPBC, pairsFrom[i], pairsTo[i], vectors, i)
+    # compute terms
+    results = []
+    offset  = 0
+    for termsType, (terms, numberOfColumns, pairs) in enumerate(TERMS):
+        if terms is None:
+            results.append(None)
+            continue
+        n       = <C_INT32>len(terms[0])
+        refs    = [allRefs[offset+k*n:offset+(k+1)*n] for k in range(len(pairs))]
+        offset += n*len(pairs)
+        limits  = [np.asarray(l, dtype=NUMPY_FLOAT32) for l in terms[numberOfColumns:]]
+        values  = np.zeros(n, dtype=NUMPY_FLOAT32)
+        reduced = np.zeros(n, dtype=NUMPY_FLOAT32)
+        nulls   = INT32_ZERO
+        if termsType == 0:
+            refs1, limit1, limit2 = refs[0], limits[0], limits[1]
+            for i in prange(n, nogil=True, schedule="static", num_threads=num_threads):
+                _bond_term(vectors, refs1, limit1, limit2, values, reduced, i)
+        elif termsType == 1:
+            refs1, refs2, limit1, limit2 = refs[0], refs[1], limits[0], limits[1]
+            for i in prange(n, nogil=True, schedule="static", num_threads=num_threads):
+                nulls += _angle_term(vectors, refs1, refs2, limit1, limit2, values, reduced, i)
+        elif termsType == 2:
+            refs1, refs2, refs3 = refs[0], refs[1], refs[2]
+            limit1, limit2, limit3, limit4, limit5, limit6 = limits
+            for i in prange(n, nogil=True, schedule="static", num_threads=num_threads):
+                nulls += _dihedral_term(vectors, refs1, refs2, refs3, limit1, limit2, limit3, limit4, limit5, limit6, values, reduced, i)
+        else:
+            refs1, refs2, refs3, limit1, limit2 = refs[0], refs[1], refs[2], limits[0], limits[1]
+            for i in prange(n, nogil=True, schedule="static", num_threads=num_threads):
+                nulls += _improper_term(vectors, refs1, refs2, refs3, limit1, limit2, values, reduced, i)
+        if nulls:
+            raise Exception("Computing bonded terms, %i term(s) found to have a null length vector"%nulls)
+        results.append( (np.asarray(values), np.asarray(reduced)) )
+    # return results
+    return tuple(results)
+
+
+def full_bonds_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                       ndarray[C_FLOAT32, ndim=2] basis not None,
+                       bint                       isPBC,
+                       bonds,
+                       C_INT32                    ncores = 1):
+    """
+    Computes bonds constraint of box coordinates.
+
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. bonds (tuple): Bonds definition as (idx1, idx2, lower, upper) arrays.
+       #. ncores (int32) [default=1]: The number of cores to use.
+
+    :Returns:
+       #. bondsLength: The calculated bonds length.
+       #. reducedLengths: The calculated reduced bonds length.
+    """
+    return full_bonded_terms_coords(boxCoords, basis, isPBC, bonds=bonds, ncores=ncores)[0]
+
+
+def full_angles_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                        ndarray[C_FLOAT32, ndim=2] basis not None,
+                        bint                       isPBC,
+                        angles,
+                        C_INT32                    ncores = 1):
+    """
+    Computes angles constraint of box coordinates.
+
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. angles (tuple): Angles definition as (central, left, right, lower, upper) arrays.
+       #. ncores (int32) [default=1]: The number of cores to use.
+
+    :Returns:
+       #. angles: The calculated angles in rad.
+       #. reducedAngles: The calculated reduced angles.
+    """
+    return full_bonded_terms_coords(boxCoords, basis, isPBC, angles=angles, ncores=ncores)[1]
+
+
+def full_dihedral_angles_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                                 ndarray[C_FLOAT32, ndim=2] basis not None,
+                                 bint                       isPBC,
+                                 dihedrals,
+                                 C_INT32                    ncores = 1):
+    """
+    Computes dihedral angles constraint of box coordinates.
+
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. dihedrals (tuple): Dihedral angles definition as
+          (indexes1, indexes2, indexes3, indexes4, lower1, upper1, lower2, upper2, lower3, upper3) arrays.
+       #. ncores (int32) [default=1]: The number of cores to use.
+
+    :Returns:
+       #. angles: The calculated dihedral angles in degrees.
+       #. reducedAngles: The calculated reduced angles.
+    """
+    return full_bonded_terms_coords(boxCoords, basis, isPBC, dihedrals=dihedrals, ncores=ncores)[2]
+
+
+def full_improper_angles_coords( ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                                 ndarray[C_FLOAT32, ndim=2] basis not None,
+                                 bint                       isPBC,
+                                 impropers,
+                                 C_INT32                    ncores = 1):
+    """
+    Computes improper angles constraint of box coordinates.
+
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. impropers (tuple): Improper angles definition as (improperIdxs, oIdxs, xIdxs, yIdxs, lower, upper) arrays.
+       #. ncores (int32) [default=1]: The number of cores to use.
+
+    :Returns:
+       #. angles: The calculated improper angles in rad.
+       #. reducedAngles: The calculated reduced angles.
+    """
+    return full_bonded_terms_coords(boxCoords, basis, isPBC, impropers=impropers, ncores=ncores)[3]
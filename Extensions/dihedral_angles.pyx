@@ -1,5 +1,7 @@
 """
 This is a C compiled module to compute improper angles.
+Deprecated, kept for backward compatibility. Constraints use
+fullrmc.Core.bonded_terms which shares bonded atoms vectors between terms.
 """            
 from libc.math cimport sqrt, fabs
 import cython
@@ -1,5 +1,7 @@
 """
 This is a C compiled module to compute pair distances histograms.
+Histograms are integer pairs count arrays so that incremental updates
+remain exact regardless of the number of counted pairs.
 """ 
 #from libc.math cimport sqrt, abs
 import cython
@@ -7,8 +9,9 @@ cimport cython
 import numpy as np
 cimport numpy as np
 from numpy cimport ndarray
-from cython.parallel import prange
+from cython.parallel import prange, threadid
 from fullrmc.Core.pairs_distances import pairs_distances_to_indexcoords
+from fullrmc.Core.Collection import get_cells_list
 
 
 # declare types
@@ -26,6 +29,15 @@ cdef C_FLOAT32 FLOAT_TWO       = 2.0
 cdef C_INT32   INT32_ZERO      = 0
 cdef C_INT32   INT32_ONE       = 1
 
+# declare math functions
+cdef extern from "math.h":
+    C_FLOAT32 floor(C_FLOAT32 x) nogil
+    C_FLOAT32 ceil(C_FLOAT32 x)  nogil
+    C_FLOAT32 sqrt(C_FLOAT32 x)  nogil
+
+cdef inline C_FLOAT32 round(C_FLOAT32 num) nogil:
+    return floor(num + HALF_BOX_LENGTH) if (num > FLOAT32_ZERO) else ceil(num - HALF_BOX_LENGTH)
+
 
 
 @cython.nonecheck(False)
@@ -41,16 +53,18 @@ cdef void _single_pairs_histograms( C_INT32          atomIndex,
                                     C_FLOAT32[:]     distances,
                                     C_INT32[:]       moleculeIndex,
                                     C_INT32[:]       elementIndex,
-                                    C_FLOAT32[:,:,:] hintra,
-                                    C_FLOAT32[:,:,:] hinter,
+                                    C_INT32[:,:,:]   hintra,
+                                    C_INT32[:,:,:]   hinter,
                                     C_FLOAT32        minDistance,
                                     C_FLOAT32        maxDistance,
                                     C_FLOAT32        bin,
                                     C_INT32          ncores = 1) nogil:
     cdef C_FLOAT32 distance
     cdef C_INT32 i, binIndex
-    cdef C_INT32 num_threads = ncores
-    for i in prange(startIndex, endIndex, INT32_ONE, nogil=True, schedule="static", num_threads=num_threads):
+    # all pairs of this atom increment the same histograms row, concurrent
+    # increments of the same bin would be lost. Counting is kept serial and
+    # ncores is used by distances computation only.
+    for i in range(startIndex, endIndex):
         if i == atomIndex: continue
         # get distance         
         distance = distances[i]
@@ -63,9 +77,9 @@ cdef void _single_pairs_histograms( C_INT32          atomIndex,
         binIndex = <C_INT32>((distance-minDistance)/bin)
         # increment histograms
         if moleculeIndex[i] == atomMoleculeIndex:
-            hintra[atomSymbolIndex,elementIndex[i],binIndex] += FLOAT32_ONE
+            hintra[atomSymbolIndex,elementIndex[i],binIndex] += INT32_ONE
         else:
-            hinter[atomSymbolIndex,elementIndex[i],binIndex] += FLOAT32_ONE
+            hinter[atomSymbolIndex,elementIndex[i],binIndex] += INT32_ONE
     
                              
 
@@ -78,8 +92,8 @@ def single_pairs_histograms( C_INT32                    atomIndex,
                              ndarray[C_FLOAT32, ndim=1] distances not None,
                              ndarray[C_INT32, ndim=1]   moleculeIndex not None,
                              ndarray[C_INT32, ndim=1]   elementIndex not None,
-                             ndarray[C_FLOAT32, ndim=3] hintra not None,
-                             ndarray[C_FLOAT32, ndim=3] hinter not None,
+                             ndarray[C_INT32, ndim=3]   hintra not None,
+                             ndarray[C_INT32, ndim=3]   hinter not None,
                              C_FLOAT32                  minDistance,
                              C_FLOAT32                  maxDistance,
                              C_FLOAT32                  bin, 
@@ -93,8 +107,8 @@ def single_pairs_histograms( C_INT32                    atomIndex,
        #. distances (float32 array): The distances array.
        #. moleculeIndex (int32 array): The molecule's index array, assigning a molecule index for every atom.
        #. elementIndex (int32 array): The element's index array, assigning an element index for every atom.
-       #. hintra (float32 array): The (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
        #. minDistance (float32): The minimum distance to be counted in the histogram.
        #. maxDistance (float32): The maximum distance to be counted in the histogram.
        #. bin (float32): The histogram bin size.
@@ -102,8 +116,8 @@ def single_pairs_histograms( C_INT32                    atomIndex,
        #. ncores (int32) [default=1]: The number of cores to use. 
                                   
     :Returns:
-       #. hintra (float32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
     """
     # declare variables
     cdef C_INT32 i, startIndex, endIndex
@@ -159,7 +173,9 @@ def multiple_pairs_histograms_coords( ndarray[C_INT32, ndim=1]      indexes not
                                       C_FLOAT32                     bin,
                                       C_INT32                       histSize,
                                       bint                          allAtoms = True,
-                                      C_INT32                       ncores = 1 ):    
+                                      C_INT32                       ncores = 1,
+                                      ndarray[C_INT32, ndim=3]      hintra = None,
+                                      ndarray[C_INT32, ndim=3]      hinter = None ):    
     """
     Computes the pair distribution histograms of multiple atoms given atomic coordinates.
     
@@ -177,10 +193,12 @@ def multiple_pairs_histograms_coords( ndarray[C_INT32, ndim=1]      indexes not
        #. histSize(int32): The histograms size.
        #. allAtoms (bool): Perform the calculation over all the atoms. If False calculation starts from the given atomIndex. DEFAULT: True
        #. ncores (int32) [default=1]: The number of cores to use. 
+       #. hintra (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with intra-molecular distances histograms. If None, a new array is created.
+       #. hinter (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with inter-molecular distances histograms. If None, a new array is created.
        
     :Returns:
-       #. hintra (float32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
     """
     # declare variables
     cdef C_INT32 i, ii
@@ -189,9 +207,15 @@ def multiple_pairs_histograms_coords( ndarray[C_INT32, ndim=1]      indexes not
     minDistance = <C_FLOAT32>minDistance
     maxDistance = <C_FLOAT32>maxDistance
     histSize    = <C_INT32>histSize
-    # create histograms
-    cdef ndarray[C_FLOAT32,  mode="c", ndim=3] hintra = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_FLOAT32)
-    cdef ndarray[C_FLOAT32,  mode="c", ndim=3] hinter = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_FLOAT32)
+    # create or reset histograms
+    if hintra is None:
+        hintra = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
+    else:
+        hintra.fill(INT32_ZERO)
+    if hinter is None:
+        hinter = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
+    else:
+        hinter.fill(INT32_ZERO)
     
     # loop atoms
     for i in indexes:
@@ -250,8 +274,8 @@ def multiple_pairs_histograms_dists( ndarray[C_INT32, ndim=1]      indexes not N
        #. ncores (int32) [default=1]: The number of cores to use. 
        
     :Returns:
-       #. hintra (float32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
     """
     # declare variables
     cdef C_INT32 i
@@ -261,8 +285,8 @@ def multiple_pairs_histograms_dists( ndarray[C_INT32, ndim=1]      indexes not N
     maxDistance = <C_FLOAT32>maxDistance
     histSize    = <C_INT32>histSize
     # create histograms
-    cdef ndarray[C_FLOAT32,  mode="c", ndim=3] hintra = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_FLOAT32)
-    cdef ndarray[C_FLOAT32,  mode="c", ndim=3] hinter = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_FLOAT32)
+    cdef ndarray[C_INT32,  mode="c", ndim=3] hintra = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
+    cdef ndarray[C_INT32,  mode="c", ndim=3] hinter = np.zeros((numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
 
     # loop
     for i from <C_INT32>0 <= i < <C_INT32>indexes.shape[0]:
@@ -281,6 +305,163 @@ def multiple_pairs_histograms_dists( ndarray[C_INT32, ndim=1]      indexes not N
     return hintra, hinter
     
     
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+cdef void _cells_pairs_histograms( C_FLOAT32[:,:]     boxCoords,
+                                   C_FLOAT32[:,:]     basis,
+                                   bint               isPBC,
+                                   C_INT32[:]         moleculeIndex,
+                                   C_INT32[:]         elementIndex,
+                                   C_INT32[:]         atomsIndex,
+                                   C_INT32[:]         cellsOffsets,
+                                   C_INT32[:,:]       neighbours,
+                                   C_INT32[:,:,:,:]   hintra,
+                                   C_INT32[:,:,:,:]   hinter,
+                                   C_FLOAT32          minDistance,
+                                   C_FLOAT32          maxDistance,
+                                   C_FLOAT32          bin,
+                                   C_INT32            ncores = 1) nogil:
+    # declare variables
+    cdef C_INT32 c, n, nc, ii, jj, i, j, tid, binIndex
+    cdef C_FLOAT32 box_dx, box_dy, box_dz
+    cdef C_FLOAT32 real_dx, real_dy, real_dz, distance
+    cdef C_INT32 numberOfCells = <C_INT32>cellsOffsets.shape[0]-INT32_ONE
+    cdef C_INT32 numberOfNeighbours = <C_INT32>neighbours.shape[1]
+    cdef C_INT32 num_threads = ncores
+    # every thread fills its own histograms, no bin is shared between threads
+    for c in prange(INT32_ZERO, numberOfCells, INT32_ONE, nogil=True, schedule="dynamic", num_threads=num_threads):
+        tid = threadid()
+        for n in range(numberOfNeighbours):
+            nc = neighbours[c,n]
+            if nc < INT32_ZERO:
+                continue
+            for ii in range(cellsOffsets[c], cellsOffsets[c+1]):
+                i = atomsIndex[ii]
+                for jj in range(cellsOffsets[nc], cellsOffsets[nc+1]):
+                    j = atomsIndex[jj]
+                    # every pair is counted once from its smallest index
+                    if j <= i:
+                        continue
+                    # calculate distance
+                    if isPBC:
+                        box_dx  = boxCoords[i,0] - boxCoords[j,0]
+                        box_dy  = boxCoords[i,1] - boxCoords[j,1]
+                        box_dz  = boxCoords[i,2] - boxCoords[j,2]
+                        box_dx  = box_dx - round(box_dx)
+                        box_dy  = box_dy - round(box_dy)
+                        box_dz  = box_dz - round(box_dz)
+                        real_dx = box_dx*basis[0,0] + box_dy*basis[1,0] + box_dz*basis[2,0]
+                        real_dy = box_dx*basis[0,1] + box_dy*basis[1,1] + box_dz*basis[2,1]
+                        real_dz = box_dx*basis[0,2] + box_dy*basis[1,2] + box_dz*basis[2,2]
+                    else:
+                        real_dx = boxCoords[i,0] - boxCoords[j,0]
+                        real_dy = boxCoords[i,1] - boxCoords[j,1]
+                        real_dz = boxCoords[i,2] - boxCoords[j,2]
+                    distance = <C_FLOAT32>sqrt(real_dx*real_dx + real_dy*real_dy + real_dz*real_dz)
+                    # check limits
+                    if distance<minDistance:
+                        continue
+                    if distance>=maxDistance:
+                        continue
+                    # get index
+                    binIndex = <C_INT32>((distance-minDistance)/bin)
+                    # increment thread histograms
+                    if moleculeIndex[i] == moleculeIndex[j]:
+                        hintra[tid,elementIndex[i],elementIndex[j],binIndex] += INT32_ONE
+                    else:
+                        hinter[tid,elementIndex[i],elementIndex[j],binIndex] += INT32_ONE
+
+
+
+@cython.nonecheck(False)
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+@cython.always_allow_keywords(False)
+def cells_pairs_histograms_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not None,
+                                   np.ndarray[C_FLOAT32, ndim=2] basis not None,
+                                   bint                          isPBC,
+                                   ndarray[C_INT32, ndim=1]      moleculeIndex not None,
+                                   ndarray[C_INT32, ndim=1]      elementIndex not None,
+                                   ndarray[C_INT32, ndim=1]      atomsIndex not None,
+                                   ndarray[C_INT32, ndim=1]      cellsOffsets not None,
+                                   ndarray[C_INT32, ndim=2]      neighbours not None,
+                                   C_INT32                       numberOfElements,
+                                   C_FLOAT32                     minDistance,
+                                   C_FLOAT32                     maxDistance,
+                                   C_FLOAT32                     bin,
+                                   C_INT32                       histSize,
+                                   C_INT32                       ncores = 1,
+                                   ndarray[C_INT32, ndim=3]      hintra = None,
+                                   ndarray[C_INT32, ndim=3]      hinter = None):
+    """
+    Computes the pair distribution histograms of all atoms given atomic coordinates
+    and a cells list as built by fullrmc.Core.Collection.get_cells_list. Only pairs
+    of atoms in the same or neighbouring cells are computed. Every thread accumulates
+    its own private histograms that are reduced at the end.
+    
+    :Arguments:
+       #. boxCoords (float32 (n,3) numpy.ndarray): The atomic coordinates array.
+       #. basis (float32 (3,3) numpy.ndarray): The (3x3) boundary conditions box vectors.
+       #. isPBC (bool): Whether it is a periodic boundary conditions or infinite.
+       #. moleculeIndex (int32 array): The molecule's index array, assigning a molecule index for every atom.
+       #. elementIndex (int32 array): The element's index array, assigning an element index for every atom.
+       #. atomsIndex (int32 array): The atoms index array sorted by cell.
+       #. cellsOffsets (int32 array): The cells offsets array of length number of cells+1.
+       #. neighbours (int32 array): The (number of cells, 27) neighbouring cells array where -1 entries are skipped.
+       #. numberOfElements (int32): The number of elements in the system.
+       #. minDistance (float32): The minimum distance to be counted in the histogram.
+       #. maxDistance (float32): The maximum distance to be counted in the histogram. Must be smaller or equal to cells width.
+       #. bin (float32): The histogram bin size.
+       #. histSize(int32): The histograms size.
+       #. ncores (int32) [default=1]: The number of cores to use. 
+       #. hintra (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with intra-molecular distances histograms. If None, a new array is created.
+       #. hinter (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with inter-molecular distances histograms. If None, a new array is created.
+       
+    :Returns:
+       #. hintra (int32 array): The computed (numberOfElements,numberOfElements,histSize) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The computed (numberOfElements,numberOfElements,histSize) array for inter-molecular distances histograms.
+    """
+    # cast arguments
+    bin         = <C_FLOAT32>bin
+    minDistance = <C_FLOAT32>minDistance
+    maxDistance = <C_FLOAT32>maxDistance
+    histSize    = <C_INT32>histSize
+    ncores      = <C_INT32>max(INT32_ONE, ncores)
+    # create threads private histograms
+    cdef ndarray[C_INT32, mode="c", ndim=4] threadsHintra = np.zeros((ncores,numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
+    cdef ndarray[C_INT32, mode="c", ndim=4] threadsHinter = np.zeros((ncores,numberOfElements,numberOfElements,histSize), dtype=NUMPY_INT32)
+    # compute histograms
+    _cells_pairs_histograms( boxCoords     = boxCoords,
+                             basis         = basis,
+                             isPBC         = isPBC,
+                             moleculeIndex = moleculeIndex,
+                             elementIndex  = elementIndex,
+                             atomsIndex    = atomsIndex,
+                             cellsOffsets  = cellsOffsets,
+                             neighbours    = neighbours,
+                             hintra        = threadsHintra,
+                             hinter        = threadsHinter,
+                             minDistance   = minDistance,
+                             maxDistance   = maxDistance,
+                             bin           = bin,
+                             ncores        = ncores)
+    # reduce threads histograms
+    if hintra is None:
+        hintra = np.sum(threadsHintra, axis=0, dtype=NUMPY_INT32)
+    else:
+        np.sum(threadsHintra, axis=0, dtype=NUMPY_INT32, out=hintra)
+    if hinter is None:
+        hinter = np.sum(threadsHinter, axis=0, dtype=NUMPY_INT32)
+    else:
+        np.sum(threadsHinter, axis=0, dtype=NUMPY_INT32, out=hinter)
+    return hintra, hinter
+
+
+
 @cython.nonecheck(False)
 @cython.boundscheck(False)
 @cython.wraparound(False)
@@ -296,7 +477,10 @@ def full_pairs_histograms_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
                                   C_FLOAT32                     maxDistance,
                                   C_FLOAT32                     bin,
                                   C_INT32                       histSize,
-                                  C_INT32                       ncores = 1):    
+                                  C_INT32                       ncores = 1,
+                                  ndarray[C_INT32, ndim=3]      hintra = None,
+                                  ndarray[C_INT32, ndim=3]      hinter = None,
+                                  bint                          useCells = False):    
     """
     Computes the pair distribution histograms of multiple atoms given atomic coordinates.
     
@@ -312,11 +496,38 @@ def full_pairs_histograms_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
        #. bin (float32): The histogram bin size.
        #. histSize(int32): The histograms size.
        #. ncores (int32) [default=1]: The number of cores to use. 
+       #. hintra (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with intra-molecular distances histograms. If None, a new array is created.
+       #. hinter (None, int32 array) [default=None]: Preallocated (numberOfElements,numberOfElements,histSize) array to reset and fill with inter-molecular distances histograms. If None, a new array is created.
+       #. useCells (bool) [default=False]: Whether to use a cells list when the system is big enough to be divided into cells. Meant for whole system computations only and not for small subsets of atoms.
        
     :Returns:
-       #. hintra (float32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
     """
+    # use a cells list when the system is big enough to be divided into cells
+    atomsIndex = None
+    if useCells:
+        atomsIndex, cellsOffsets, neighbours = get_cells_list(boxCoords = boxCoords,
+                                                              basis     = basis,
+                                                              isPBC     = isPBC,
+                                                              cutoff    = maxDistance)
+    if atomsIndex is not None:
+        return cells_pairs_histograms_coords(boxCoords        = boxCoords,
+                                             basis            = basis,
+                                             isPBC            = isPBC,
+                                             moleculeIndex    = moleculeIndex,
+                                             elementIndex     = elementIndex,
+                                             atomsIndex       = atomsIndex,
+                                             cellsOffsets     = cellsOffsets,
+                                             neighbours       = neighbours,
+                                             numberOfElements = numberOfElements,
+                                             minDistance      = minDistance,
+                                             maxDistance      = maxDistance,
+                                             bin              = bin,
+                                             histSize         = histSize,
+                                             ncores           = ncores,
+                                             hintra           = hintra,
+                                             hinter           = hinter)
     # get number of atoms
     cdef ndarray[C_INT32,  mode="c", ndim=1] indexes = np.arange(<C_INT32>boxCoords.shape[0], dtype=NUMPY_INT32)
     # calculate histograms
@@ -332,7 +543,9 @@ def full_pairs_histograms_coords( np.ndarray[C_FLOAT32, ndim=2] boxCoords not No
                                             bin              = bin,
                                             histSize         = histSize,
                                             ncores           = ncores,
-                                            allAtoms         = False)
+                                            allAtoms         = False,
+                                            hintra           = hintra,
+                                            hinter           = hinter)
 
 
 @cython.nonecheck(False)
@@ -364,8 +577,8 @@ def full_pairs_histograms_dists( np.ndarray[C_FLOAT32, ndim=2] distances not Non
        #. ncores (int32) [default=1]: The number of cores to use. 
        
     :Returns:
-       #. hintra (float32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
-       #. hinter (float32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
+       #. hintra (int32 array): The updated (numberOfElements,numberOfElements,1) array for intra-molecular distances histograms.
+       #. hinter (int32 array): The updated (numberOfElements,numberOfElements,1) array for inter-molecular distances histograms.
     """
     # get indexes
     cdef ndarray[C_INT32,  mode="c", ndim=1] indexes = np.arange(<C_INT32>distances.shape[1], dtype=NUMPY_INT32)
@@ -105,6 +105,13 @@ pyx = [### boundary conditions collection
                  include_dirs=[np.get_include()],
                  language="c",
                  sources = [os.path.join(EXTENSIONS_PATH,"improper_angles.pyx")]),
+       ### bonded terms
+       Extension('bonded_terms',
+                 include_dirs=[np.get_include()],
+                 language="c",
+                 extra_compile_args = EXTRA_COMPILE_ARGS,
+                 extra_link_args    = EXTRA_LINK_ARGS,
+                 sources = [os.path.join(EXTENSIONS_PATH,"bonded_terms.pyx")]),
        ]
 
 
@@ -154,7 +154,7 @@ class RotationGenerator(MoveGenerator):
             # get rotation matrix
             rotationMatrix = get_rotation_matrix(rotationAxis, rotationAngle)
             # get atoms group center
-            center = np.sum(coordinates, 0)/coordinates.shape[0]
+            center = self._get_center(coordinates)
             # translate to origin
             rotatedCoordinates = coordinates-center
             # rotate
@@ -252,7 +252,7 @@ class RotationAboutAxisGenerator(RotationGenerator):
         # get rotation matrix
         rotationMatrix = get_rotation_matrix(self.__axis, rotationAngle)
         # get atoms group center and rotation axis
-        center,_,_,_,_,_,_ = get_principal_axis(coordinates)
+        center = self._get_center(coordinates)
         # translate to origin
         rotatedCoordinates = coordinates-center
         # rotate
@@ -343,7 +343,7 @@ class RotationAboutSymmetryAxisGenerator(RotationGenerator):
             # get rotation angle
             rotationAngle = (1-2*generate_random_float())*self.amplitude
             # get atoms group center and rotation axis
-            center,_,_,_,X,Y,Z =get_principal_axis(coordinates)
+            center,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             rotationAxis = [X,Y,Z][self.__axis]
             # get rotation matrix
             rotationMatrix = get_rotation_matrix(rotationAxis, rotationAngle)
@@ -479,7 +479,7 @@ class RotationAboutSymmetryAxisPath(PathGenerator):
                                                       maxAmp=self.__amplitude[1])
         else:
             # get atoms group center and rotation axis
-            center,_,_,_,X,Y,Z =get_principal_axis(coordinates)
+            center,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             rotationAxis = [X,Y,Z][self.__axis]
             # get rotation matrix
             rotationMatrix = get_rotation_matrix(rotationAxis, argument)
@@ -607,6 +607,12 @@ class OrientationGenerator(MoveGenerator):
         else:
             return True, ""
 
+    def _requires_group(self):
+        """ This is a fullrmc API method to get whether the generator needs
+        its group to generate moves. Orientation axis computed from atoms
+        requires the group's engine."""
+        return bool(self.__mustComputeOrientationAxis)
+
     def set_flip(self, flip):
         """
         Set flip flag value.
@@ -724,7 +730,7 @@ class OrientationGenerator(MoveGenerator):
 
     def __get_group_axis__(self, coordinates):
         if self.__mustComputeGroupAxis:
-            _,_,_,_,X,Y,Z = get_principal_axis(coordinates)
+            _,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             axis = [X,Y,Z][self.__groupAxis["symmetry"]]
         else:
             axis = self.__groupAxis["fixed"]
@@ -763,7 +769,7 @@ class OrientationGenerator(MoveGenerator):
                                                               maxAngle=self.__maximumOffsetAngle,
                                                               numberOfVectors=1)[0]
             # get coordinates center
-            center = np.array(np.sum(coordinates, 0)/coordinates.shape[0] , dtype=FLOAT_TYPE)
+            center = self._get_center(coordinates)
             # translate to origin
             rotatedCoordinates = coordinates-center
             # align coordinates
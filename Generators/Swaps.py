@@ -174,11 +174,7 @@ class SwapCentersGenerator(SwapGenerator):
             #. swapLength (None): The swap length.
         """
         self.__swapLength = None
-        self.__swapList   = ()
-        # set uncollected atoms swapList
-        self._remainingAtomsSwapList = self.__swapList
-        # reset collector state
-        self._collectorState = None
+        self._update_swap_list( () )
 
     def set_group(self, group):
         """
@@ -528,7 +528,7 @@ class TranslationAlongSymmetryAxisGenerator(TranslationGenerator):
             else:
                 amplitude = -generate_random_float()*maxAmp
             # get axis of translation
-            _,_,_,_,X,Y,Z =get_principal_axis(coordinates)
+            _,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             translationAxis = [X,Y,Z][self.__axis]
             # compute baseVector
             baseVector = FLOAT_TYPE(np.sign(amplitude)*translationAxis*self.amplitude[0])
@@ -628,7 +628,7 @@ class TranslationTowardsSymmetryAxisGenerator(TranslationAlongSymmetryAxisGenera
                                                       maxAmp=self.__amplitude[1])
         else:
             # get axis
-            _,_,_,_,X,Y,Z =get_principal_axis(coordinates)
+            _,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             axis = [X,Y,Z][self.axis]
             # generate translation axis
             translationAxis = generate_vectors_in_solid_angle(direction=axis,
@@ -774,10 +774,10 @@ class TranslationAlongSymmetryAxisPath(PathGenerator):
             # get translation amplitude
             amplitude = FLOAT_TYPE(argument)
             # get vector of translation
-            _,_,_,_,X,Y,Z =get_principal_axis(coordinates)
+            _,_,_,_,X,Y,Z = self._get_principal_axis(coordinates)
             vector = [X,Y,Z][self.__axis]
             # amplify vector
-            vector *= FLOAT_TYPE(amplitude)
+            vector = vector*FLOAT_TYPE(amplitude)
             # translate and return
             return coordinates+vector
 
@@ -856,6 +856,12 @@ class TranslationTowardsCenterGenerator(TranslationGenerator):
         """ Angle value in rad."""
         return self.__angle
 
+    def _requires_group(self):
+        """ This is a fullrmc API method to get whether the generator needs
+        its group to generate moves. Center computed from atoms indexes
+        requires the group's engine."""
+        return bool(self.__mustCompute)
+
     def set_direction(self, direction):
         """
         Set the generated translation vectors direction.
@@ -980,7 +986,7 @@ class TranslationTowardsCenterGenerator(TranslationGenerator):
         # get center
         center = self.__get_center()
         # compute coordinates center
-        coordsCenter = np.mean(coordinates, axis=0)
+        coordsCenter = self._get_center(coordinates)
         direction    = center-coordsCenter
         # translation vector
         translationAxis = self.__get_translation_axis(direction)
@@ -65,38 +65,51 @@ class Logger(LOG):
         #self.force_log_type_flags(logType="implement",stdoutFlag=True, fileFlag=True)
         #self.force_log_type_flags(logType="usage",    stdoutFlag=True, fileFlag=True)
         
-    def fixed(self, message):
+    def is_enabled(self, logType):
+        """Get whether given logType is logged to standard output or file."""
+        return bool( (self.logToStdout and self.logTypeStdoutFlags[logType]) or \
+                     (self.logToFile   and self.logTypeFileFlags[logType]) )
+
+    def _lazy_log(self, logType, message, args):
+        """log message after formatting it with args only if logType is enabled"""
+        if not self.is_enabled(logType):
+            return
+        if len(args):
+            message = message%args
+        self.log(logType, message)
+
+    def fixed(self, message, *args):
         """alias to message at fixed level"""
-        self.log("argument fixed", message)
+        self._lazy_log("argument fixed", message, args)
     
-    def accepted(self, message):
+    def accepted(self, message, *args):
         """alias to message at move accepted level"""
-        self.log("move accepted", message)
+        self._lazy_log("move accepted", message, args)
         
-    def rejected(self, message):
+    def rejected(self, message, *args):
         """alias to message at move rejected level"""
-        self.log("move rejected", message)
+        self._lazy_log("move rejected", message, args)
 
-    def nottried(self, message):
+    def nottried(self, message, *args):
         """alias to message at move not tried level"""
-        self.log("move not tried", message)
+        self._lazy_log("move not tried", message, args)
     
-    def saved(self, message):
+    def saved(self, message, *args):
         """alias to message at save engine level"""
-        self.log("engine saved", message)
+        self._lazy_log("engine saved", message, args)
     
-    def impl(self, message):
+    def impl(self, message, *args):
         """alias to message at implement engine level"""
-        self.log("implement", message)
+        self._lazy_log("implement", message, args)
     
-    def implement(self, message):
+    def implement(self, message, *args):
         """alias to message at usage engine level"""
-        self.log("usage", message)
+        self._lazy_log("usage", message, args)
         
-    def usage(self, message):
+    def usage(self, message, *args):
         """alias to message at usage engine level"""
-        self.log("usage", message)
-        
+        self._lazy_log("usage", message, args)
+
 # initialize Logger        
 LOGGER = Logger(name="fullrmc")  
 
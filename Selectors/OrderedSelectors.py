@@ -107,16 +107,12 @@ class DefinedOrderSelector(GroupSelector):
             assert isinstance(order, (list, set, tuple, np.ndarray)), LOGGER.error("order must a instance among list, set, tuple or numpy.ndarray")
             if isinstance(order, np.ndarray):
                 assert len(order.shape)==1, LOGGER.error("order numpy.ndarray must have one dimension")
-            order = list(order)
+            order = np.array(list(order))
             assert len(order)>0, LOGGER.error("order can't be empty")
-            newOrder = []
-            for idx in order:
-                assert is_integer(idx), LOGGER.error("order indexes must be integers")
-                idx = int(idx)
-                assert idx>=0, LOGGER.error("order indexes must be positive")
-                assert idx<len(self.engine.groups), LOGGER.error("order indexes must be smaller than engine's number of groups")
-                newOrder.append(idx)
-            newOrder = np.array(newOrder, dtype=INT_TYPE)
+            assert order.dtype.kind in ('i','u'), LOGGER.error("order indexes must be integers")
+            assert np.min(order)>=0, LOGGER.error("order indexes must be positive")
+            assert np.max(order)<len(self.engine.groups), LOGGER.error("order indexes must be smaller than engine's number of groups")
+            newOrder = order.astype(INT_TYPE)
         # set order
         self.__order = newOrder
         # re-initialize selector
@@ -166,6 +162,8 @@ class DirectionalOrderSelector(DefinedOrderSelector):
            * TG_amp = generatorsParams['TG']['amplitude']: Used for TranslationTowardsCenterGenerator amplitude parameters.
            * TG_ang = generatorsParams['TG']['angle']: Used as TranslationTowardsCenterGenerator angle parameters.
            * TG_dam = generatorsParams['TG']['damping']: Also used for TranslationTowardsCenterGenerator amplitude parameters.
+           * TG_lev = generatorsParams['TG']['levels']: Number of amplitude levels between TG_amp and TG_amp.TG_dam.
+             Groups of the same level share the same generator instance.
            * RG_ang = generatorsParams['RG']['amplitude']: Used as RotationGenerator angle parameters.
            
            **Parameters are used as the following:**\n
@@ -209,7 +207,7 @@ class DirectionalOrderSelector(DefinedOrderSelector):
     """
     def __init__(self, engine, center=None, expand=True,
                        adjustMoveGenerators=False,
-                       generatorsParams={"TG":{"amplitude":0.1, "damping":0.1, "angle":90},
+                       generatorsParams={"TG":{"amplitude":0.1, "damping":0.1, "angle":90, "levels":100},
                                          "RG":{"amplitude":10}}):
         # initialize GroupSelector
         super(DirectionalOrderSelector, self).__init__(engine=engine, order=None)
@@ -220,17 +218,29 @@ class DirectionalOrderSelector(DefinedOrderSelector):
         # set expand
         self.set_adjust_move_generators(adjustMoveGenerators)  
         # set expand
-        self.set_generators_parameters(generatorsParams)          
+        self.set_generators_parameters(generatorsParams)
+        # initialize adjusted move generators
+        self.__generators = {}          
         
     def _runtime_initialize(self):
         """   
         Automatically sets the selector order at the engine runtime.
         """
-        diffs = np.array([(np.sum(self.engine.realCoordinates[g.indexes], axis=0)/len(g))-self.__center for g in self.engine.groups], dtype=FLOAT_TYPE)
-        dists = np.array([np.sqrt(np.add.reduce(diff**2)) for diff in diffs])
+        groups   = self.engine.groups
+        offsets  = groups.offsets
+        indexes  = groups.indexes
+        lengths  = np.diff(offsets)
+        nonEmpty = lengths>0
+        # compute all groups center at once as a segmented sum over groups table
+        centers = np.zeros((len(lengths),3), dtype=FLOAT_TYPE)
+        if len(indexes):
+            sums = np.add.reduceat(self.engine.realCoordinates[indexes], offsets[:-1][nonEmpty], axis=0)
+            centers[nonEmpty] = sums/lengths[nonEmpty].reshape((-1,1))
+        dists = np.sqrt(np.add.reduce((centers-self.__center)**2, axis=1)).astype(FLOAT_TYPE)
+        dists[~nonEmpty] = 0
         order = np.argsort(dists).astype(INT_TYPE)
         if self.__expand:
-            order = [o for o in reversed(order)]
+            order = order[::-1]
         # set order
         self.set_order(order)
         # set groups move generators
@@ -241,17 +251,36 @@ class DirectionalOrderSelector(DefinedOrderSelector):
             TG_amp  = self.__generatorsParams['TG']['amplitude']
             TG_ang  = self.__generatorsParams['TG']['angle']
             TG_dam  = self.__generatorsParams['TG']['damping']
+            TG_lev  = self.__generatorsParams['TG']['levels']
             RG_ang  = self.__generatorsParams['RG']['amplitude']
             maxDist = FLOAT_TYPE(np.max(dists))
             TG_ampInterval = TG_amp-TG_amp*TG_dam
-            for idx in range(len(self.engine.groups)):
-                g = self.engine.groups[idx]
-                damping = ((maxDist-dists[idx])/maxDist)*TG_ampInterval
-                coll = [TranslationTowardsCenterGenerator(center={"fixed":self.__center}, amplitude=TG_amp-damping, angle=TG_ang, direction=not self.__expand)]
-                if len(g) > 1:
-                    coll.append(RotationGenerator(amplitude=RG_ang))
-                mg = MoveGeneratorCollector(collection=coll, randomize=True)
-                g.set_move_generator( mg )
+            # quantize damping to levels of shared generators
+            if maxDist>0 and TG_lev>1:
+                levels = np.round( (maxDist-dists)/maxDist*(TG_lev-1) ).astype(INT_TYPE)
+            else:
+                levels = np.zeros(len(dists), dtype=INT_TYPE)
+            # one shared generator per damping level and rotation need
+            keys = 2*levels + (lengths>1)
+            keys, inverse = np.unique(keys, return_inverse=True)
+            sortedGroups  = np.argsort(inverse, kind='mergesort').astype(INT_TYPE)
+            splits        = np.flatnonzero(np.diff(inverse[sortedGroups]))+1
+            # generators of previous runs are reused when parameters are the same
+            lastGenerators = self.__dict__.get('_DirectionalOrderSelector__generators', {})
+            generators     = {}
+            for key, groupsIndex in zip(keys, np.split(sortedGroups, splits)):
+                level, rotate = divmod(int(key), 2)
+                damping = (float(level)/max(TG_lev-1,1))*TG_ampInterval
+                genKey  = (tuple(self.__center), self.__expand, TG_amp-damping, TG_ang, rotate, RG_ang)
+                mg      = lastGenerators.get(genKey, None)
+                if mg is None:
+                    coll = [TranslationTowardsCenterGenerator(center={"fixed":self.__center}, amplitude=TG_amp-damping, angle=TG_ang, direction=not self.__expand)]
+                    if rotate:
+                        coll.append(RotationGenerator(amplitude=RG_ang))
+                    mg = MoveGeneratorCollector(collection=coll, randomize=True)
+                generators[genKey] = mg
+                groups.set_move_generator(mg, groups=groupsIndex)
+            self.__generators = generators
                                 
     @property
     def expand(self):
@@ -288,6 +317,8 @@ class DirectionalOrderSelector(DefinedOrderSelector):
            * TG_amp = generatorsParams['TG']['amplitude']: Used for TranslationTowardsCenterGenerator amplitude parameters.
            * TG_ang = generatorsParams['TG']['angle']: Used as TranslationTowardsCenterGenerator angle parameters.
            * TG_dam = generatorsParams['TG']['damping']: Also used for TranslationTowardsCenterGenerator amplitude parameters.
+           * TG_lev = generatorsParams['TG']['levels']: Number of amplitude levels between TG_amp and TG_amp.TG_dam.
+             Groups of the same level share the same generator instance.
            * RG_ang = generatorsParams['RG']['amplitude']: Used as RotationGenerator angle parameters.
            
            **Parameters are used as the following:**\n
@@ -301,7 +332,7 @@ class DirectionalOrderSelector(DefinedOrderSelector):
         if generatorsParams is None:
             generatorsParams = {}
         assert isinstance(generatorsParams, dict), LOGGER.error("generatorsParams must be a python dictionary")
-        newGenParams = {"TG":{"amplitude":0.1, "damping":0.1, "angle":90},
+        newGenParams = {"TG":{"amplitude":0.1, "damping":0.1, "angle":90, "levels":100},
                         "RG":{"amplitude":10}}
         # update  TranslationTowardsCenterGenerator values
         for gkey in newGenParams.keys():
@@ -311,10 +342,14 @@ class DirectionalOrderSelector(DefinedOrderSelector):
             for key in newGenParams[gkey].keys():
                 newGenParams[gkey][key] = generatorsParams[gkey].get(key, newGenParams[gkey][key])
         # check generatorsParams damping parameters
-        assert is_number(generatorsParams["TG"]["damping"]), LOGGER.error("generatorsParams['TG']['damping'] must be a number")
-        generatorsParams["TG"]["damping"] = FLOAT_TYPE(generatorsParams["TG"]["damping"])
-        assert generatorsParams["TG"]["damping"]>=0, LOGGER.error("generatorsParams['TG']['damping'] must be bigger than 0")
-        assert generatorsParams["TG"]["damping"]<=1, LOGGER.error("generatorsParams['TG']['damping'] must be smaller than 1")
+        assert is_number(newGenParams["TG"]["damping"]), LOGGER.error("generatorsParams['TG']['damping'] must be a number")
+        newGenParams["TG"]["damping"] = FLOAT_TYPE(newGenParams["TG"]["damping"])
+        assert newGenParams["TG"]["damping"]>=0, LOGGER.error("generatorsParams['TG']['damping'] must be bigger than 0")
+        assert newGenParams["TG"]["damping"]<=1, LOGGER.error("generatorsParams['TG']['damping'] must be smaller than 1")
+        # check generatorsParams levels parameter
+        assert is_integer(newGenParams["TG"]["levels"]), LOGGER.error("generatorsParams['TG']['levels'] must be an integer")
+        newGenParams["TG"]["levels"] = int(newGenParams["TG"]["levels"])
+        assert newGenParams["TG"]["levels"]>=1, LOGGER.error("generatorsParams['TG']['levels'] must be bigger than 0")
         # set generatorsParams
         self.__generatorsParams = newGenParams   
         
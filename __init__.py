@@ -319,9 +319,12 @@ positions separately.
 +----------------------------------------+----------------------------------------+----------------------------------------+
 
 """
+# standard libraries imports
+import sys as _sys
+import types as _types
+
 # import package info
 from __pkginfo__ import __version__, __author__, __email__, __onlinedoc__, __repository__, __pypi__
-from Engine import Engine
 
 def get_version():
     """Get fullrmc's version number."""
@@ -346,3 +349,28 @@ def get_repository():
 def get_pypi():
     """Get fullrmc's official online repository link."""
     return __pypi__
+
+
+class _LazyPackage(_types.ModuleType):
+    """fullrmc package module. Engine class and its dependencies are only
+    imported upon first access of fullrmc.Engine, therefore importing
+    fullrmc or any of its light submodules stays fast."""
+    @property
+    def Engine(self):
+        """fullrmc Engine class."""
+        from fullrmc.Engine import Engine
+        return Engine
+
+    @Engine.setter
+    def Engine(self, value):
+        # import machinery sets Engine submodule as a package attribute.
+        # fullrmc.Engine is always resolved as the Engine class
+        pass
+
+
+# replace package module by its lazy counterpart. Original module is kept
+# referenced so its globals remain valid for the functions defined here
+_package = _LazyPackage(__name__, __doc__)
+_package.__dict__.update( dict([(k,v) for k,v in globals().items() if k != 'Engine']) )
+_package._module = _sys.modules[__name__]
+_sys.modules[__name__] = _package
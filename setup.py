@@ -276,6 +276,11 @@ EXTENSIONS = [# boundary conditions collection
                         include_dirs=[np.get_include()],
                         language="c",
                         sources = [os.path.join(EXTENSIONS_PATH,"improper_angles.pyx")]),
+              # bonded terms
+              Extension('fullrmc.Core.bonded_terms',
+                        include_dirs=[np.get_include()],
+                        language="c",
+                        sources = [os.path.join(EXTENSIONS_PATH,"bonded_terms.pyx")]),
               ]
 CMDCLASS = {'build_ext' : build_ext}
        